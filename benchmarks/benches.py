@@ -0,0 +1,208 @@
+import gc
+import logging
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import Callable
+from src.api.api_client import APIClient
+from src.api.api_worker import APIWorker
+from src.api.mock_server import Faults, MockBackend
+from src.api.outbox import Outbox
+from src.api.task_queue import TaskQueue
+from src.api.task_types import Task, TaskType, encode_body
+from src.context.race_context import RaceContext
+from src.fsm.driver_fsm import DriverFSM
+from src.managers.fuel_manager import FuelManager
+from src.managers.grid_manager import GridManager
+from src.managers.lap_manager import LapManager
+from src.managers.pitstop_manager import PitstopManager
+from src.managers.session_manager import SessionManager
+from src.managers.stint_manager import StintManager
+from src.models.lap import Lap
+from src.telemetry.ring_buffer import TelemetryRingBuffer
+from src.telemetry.telemetry_loop import TelemetryLoop
+from benchmarks.harness import Probe, Result
+from benchmarks.synthetic import DRIVER_NAME, SyntheticClient
+
+# in the engine's order
+MANAGERS = (SessionManager, PitstopManager, StintManager, LapManager, FuelManager, GridManager)
+
+# one pit stop cycle, repeated after connect + session_start
+PIT_CYCLE = ("enter_pit_road", "enter_pit_box", "exit_pit_box", "exit_pit_road")
+
+
+@contextmanager
+def _paused_gc():
+    """Keep collector pauses out of the timing pass."""
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def _run_loop(make_client: Callable, probes: dict[str, Probe], trace: bool):
+    """One pass of the telemetry loop over the whole source, with probes wrapped in."""
+    context = RaceContext(user_name=DRIVER_NAME)
+    context.history = TelemetryRingBuffer(600, 60)
+    queue = TaskQueue()
+
+    fsm = DriverFSM()
+    managers = [manager_cls(context, queue) for manager_cls in MANAGERS]
+    fsm.attach_managers(managers, extra_fields=context.history.channels)
+
+    client = make_client()
+    if isinstance(client, SyntheticClient):
+        client.prepare(fsm.tick_schema.fields)
+    # a one-slot ring makes the reader and manager stages take turns, so
+    # neither shows up in the other's timings or allocations
+    loop = TelemetryLoop(
+        client, fsm, DRIVER_NAME, hz=0, history=context.history, pipeline_size=1
+    )
+
+    loop._get_tick_data = probes["telemetry_loop.get_tick_data"].wrap(loop._get_tick_data, trace)
+    for manager in managers:
+        probe = probes[f"manager.{type(manager).__name__}.on_tick"]
+        manager.on_tick = probe.wrap(manager.on_tick, trace)
+
+    loop.run()
+
+
+def _best(runs: list[dict[str, Probe]], name: str) -> Probe:
+    # the quickest run is the one least disturbed by whatever else the machine was doing
+    return min((probes[name] for probes in runs), key=lambda probe: probe.result().p50_us)
+
+
+def loop_benchmarks(make_client: Callable, repeat: int = 3) -> list[Result]:
+    """Per-tick cost of reading a tick and of each manager's on_tick, in a full loop run.
+
+    Timed `repeat` times, keeping the best run per probe; allocations are
+    traced once.
+    """
+    names = ["telemetry_loop.get_tick_data"]
+    names += [f"manager.{manager_cls.__name__}.on_tick" for manager_cls in MANAGERS]
+
+    runs = []
+    for _ in range(max(1, repeat)):
+        probes = {name: Probe(name) for name in names}
+        with _paused_gc():
+            _run_loop(make_client, probes, trace=False)
+        runs.append(probes)
+
+    probes = {name: _best(runs, name) for name in names}
+    tracemalloc.start()
+    try:
+        _run_loop(make_client, probes, trace=True)
+    finally:
+        tracemalloc.stop()
+
+    return [probes[name].result() for name in names]
+
+
+def _fsm_pass(cycles: int, probe: Probe, trace: bool):
+    fsm = DriverFSM()
+    fsm.last_telem = {}
+    fsm.connect()
+    fsm.session_start()
+
+    triggers = [probe.wrap(getattr(fsm, event), trace) for event in PIT_CYCLE]
+    for _ in range(cycles):
+        for trigger in triggers:
+            trigger()
+
+
+def fsm_benchmark(cycles: int, repeat: int = 3) -> list[Result]:
+    """Cost of a DriverFSM transition, broadcast included, with no managers attached."""
+    runs = []
+    for _ in range(max(1, repeat)):
+        probe = Probe("fsm.transition")
+        with _paused_gc():
+            _fsm_pass(cycles, probe, trace=False)
+        runs.append({probe.name: probe})
+
+    probe = _best(runs, "fsm.transition")
+
+    tracemalloc.start()
+    try:
+        _fsm_pass(max(1, cycles // 10), probe, trace=True)
+    finally:
+        tracemalloc.stop()
+
+    return [probe.result()]
+
+
+def _lap_worker(url: str) -> tuple[APIWorker, TaskQueue, Outbox]:
+    outbox = Outbox()
+    # the laps hang off a stint the server already knows
+    outbox.record_id("bench-stint", 1)
+    queue = TaskQueue()
+    worker = APIWorker(RaceContext(), APIClient(url), queue, threading.Event(), outbox=outbox)
+    return worker, queue, outbox
+
+
+def _queue_laps(queue: TaskQueue, tasks: int):
+    for number in range(tasks):
+        lap = Lap(stint_id=None, number=number, time=90.0)
+        queue.put(Task(TaskType.LAP, encode_body(lap.to_dict()), key=lap.local_id, parent_key="bench-stint"))
+
+
+def _throughput_run(url: str, tasks: int) -> float:
+    """Seconds for a fresh worker to send `tasks` laps queued up front."""
+    worker, queue, _ = _lap_worker(url)
+    _queue_laps(queue, tasks)
+    queue.put(None)
+
+    start = time.perf_counter()
+    worker.run()
+    return time.perf_counter() - start
+
+
+def _recovery_run(backend: MockBackend, tasks: int) -> float:
+    """Seconds from the end of an outage until a backlog of `tasks` laps is through."""
+    worker, queue, outbox = _lap_worker(backend.url)
+    thread = threading.Thread(target=worker.run, daemon=True)
+
+    backend.set_outage(True)
+    thread.start()
+    _queue_laps(queue, tasks)
+    queue.join()
+
+    backend.set_outage(False)
+    start = time.perf_counter()
+    while len(outbox):
+        time.sleep(0.005)
+    elapsed = time.perf_counter() - start
+
+    queue.put(None)
+    thread.join()
+    return elapsed
+
+
+def api_worker_benchmarks(tasks: int) -> list[Result]:
+    """APIWorker throughput against the mock backend, with and without bulk
+    endpoints, and how long a backlog takes to clear once an outage ends."""
+    api_logger = logging.getLogger("src.api")
+    level = api_logger.level
+    # per-item INFO logs would swamp the output
+    # and the outage would log every refused request
+    api_logger.setLevel(logging.ERROR)
+
+    results = []
+    try:
+        for bulk in (True, False):
+            with MockBackend(faults=Faults(bulk=bulk)) as backend:
+                elapsed = _throughput_run(backend.url, tasks)
+
+            name = f"api_worker.laps.{'bulk' if bulk else 'single'}"
+            results.append(Result(name, calls=tasks, tasks_per_s=tasks / elapsed))
+
+        with MockBackend() as backend:
+            elapsed = _recovery_run(backend, tasks)
+        results.append(Result("api_worker.recovery", calls=tasks, recovery_s=elapsed))
+    finally:
+        api_logger.setLevel(level)
+
+    return results
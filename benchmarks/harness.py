@@ -0,0 +1,192 @@
+import json
+import os
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass
+from typing import Callable, Iterable, Optional
+
+# metrics where a bigger number is a regression; everything else is "higher is better"
+LOWER_IS_BETTER = {"p50_us", "p99_us", "mean_us", "peak_bytes", "retained_bytes", "recovery_s"}
+
+
+@dataclass
+class Result:
+    name: str
+    calls: int
+    p50_us: Optional[float] = None
+    p99_us: Optional[float] = None
+    mean_us: Optional[float] = None
+    # largest transient allocation above the starting point during a call
+    peak_bytes: Optional[int] = None
+    # memory still held after the calls, per call; should stay at ~0
+    retained_bytes: Optional[float] = None
+    tasks_per_s: Optional[float] = None
+    # time to clear a backlog after an outage
+    recovery_s: Optional[float] = None
+
+    def metrics(self) -> dict[str, float]:
+        return {
+            key: value
+            for key, value in asdict(self).items()
+            if key not in ("name", "calls") and value is not None
+        }
+
+
+def percentile(sorted_values: list[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    idx = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[idx]
+
+
+class Probe:
+    """Collects per-call cost of one function wherever it's called from.
+
+    wrap() returns a stand-in that either times each call or, with
+    trace=True, records what it allocates under tracemalloc. Timing and
+    tracing are meant to be separate passes, since tracing slows calls down.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.timings: list[int] = []
+        self.peak_bytes = 0
+        self.retained_bytes = 0
+        self.traced_calls = 0
+        self.overhead: Optional[tuple[int, float]] = None
+
+    def wrap(self, fn: Callable, trace: bool = False) -> Callable:
+        if trace:
+            return self._traced(fn)
+
+        timings = self.timings
+        perf_counter_ns = time.perf_counter_ns
+
+        def timed(*args, **kwargs):
+            start = perf_counter_ns()
+            result = fn(*args, **kwargs)
+            timings.append(perf_counter_ns() - start)
+            return result
+
+        return timed
+
+    @staticmethod
+    def _trace_overhead() -> tuple[int, float]:
+        """What the traced wrapper allocates around a call that allocates nothing."""
+        probe = Probe("overhead")
+        probe.overhead = (0, 0.0)
+        noop = probe._traced(lambda: None)
+        for _ in range(100):
+            noop()
+        return probe.peak_bytes, probe.retained_bytes / probe.traced_calls
+
+    def _traced(self, fn: Callable) -> Callable:
+        get_traced_memory = tracemalloc.get_traced_memory
+        reset_peak = tracemalloc.reset_peak
+
+        if self.overhead is None:
+            self.overhead = self._trace_overhead()
+
+        def traced(*args, **kwargs):
+            before, _ = get_traced_memory()
+            reset_peak()
+            result = fn(*args, **kwargs)
+            after, peak = get_traced_memory()
+            self.peak_bytes = max(self.peak_bytes, peak - before)
+            self.retained_bytes += after - before
+            self.traced_calls += 1
+            return result
+
+        return traced
+
+    def result(self) -> Result:
+        result = summarize(self.name, self.timings)
+        if self.traced_calls:
+            peak, retained = self.overhead
+            result.peak_bytes = max(0, self.peak_bytes - peak)
+            result.retained_bytes = max(0.0, self.retained_bytes / self.traced_calls - retained)
+        return result
+
+
+def summarize(name: str, timings: list[int]) -> Result:
+    """p50/p99/mean of per-call timings in nanoseconds."""
+    timings = sorted(timings)
+    count = len(timings)
+    return Result(
+        name=name,
+        calls=count,
+        p50_us=percentile(timings, 50) / 1000,
+        p99_us=percentile(timings, 99) / 1000,
+        mean_us=(sum(timings) / count / 1000) if count else 0.0,
+    )
+
+
+def load_baseline(path: str) -> dict[str, dict[str, float]]:
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_baseline(path: str, results: list[Result]):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({r.name: r.metrics() for r in results}, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def compare(
+    results: list[Result],
+    baseline: dict[str, dict[str, float]],
+    threshold: float,
+    metrics: Iterable[str],
+) -> list[str]:
+    """Regressions past `threshold` (0.2 = 20% worse) on the given metrics."""
+    regressions = []
+    for result in results:
+        base = baseline.get(result.name)
+        if not base:
+            continue
+
+        current = result.metrics()
+        for metric in metrics:
+            if metric not in current or not base.get(metric):
+                continue
+
+            if metric in LOWER_IS_BETTER:
+                worse = current[metric] / base[metric] - 1
+            elif current[metric]:
+                worse = base[metric] / current[metric] - 1
+            else:
+                worse = float("inf")
+
+            if worse > threshold:
+                regressions.append(
+                    f"{result.name} {metric}: {base[metric]:.3f} -> {current[metric]:.3f} "
+                    f"({worse:+.0%})"
+                )
+    return regressions
+
+
+def format_results(results: list[Result], baseline: dict[str, dict[str, float]]) -> str:
+    header = f"{'benchmark':<36} {'calls':>8} {'p50 us':>9} {'p99 us':>9} {'peak B':>9} {'ret B':>7} {'tasks/s':>9} {'recov s':>8}  vs baseline"
+    lines = [header, "-" * len(header)]
+
+    def cell(value, fmt, width):
+        return f"{value:{width}{fmt}}" if value is not None else " " * (width - 1) + "-"
+
+    for r in results:
+        base = baseline.get(r.name, {})
+        delta = ""
+        if r.p50_us is not None and base.get("p50_us"):
+            delta = f"p50 {r.p50_us / base['p50_us'] - 1:+.0%}"
+        elif r.tasks_per_s is not None and base.get("tasks_per_s"):
+            delta = f"tasks/s {r.tasks_per_s / base['tasks_per_s'] - 1:+.0%}"
+        elif r.recovery_s is not None and base.get("recovery_s"):
+            delta = f"recovery {r.recovery_s / base['recovery_s'] - 1:+.0%}"
+
+        lines.append(
+            f"{r.name:<36} {r.calls:>8} {cell(r.p50_us, '.2f', 9)} {cell(r.p99_us, '.2f', 9)} "
+            f"{cell(r.peak_bytes, 'd', 9)} {cell(r.retained_bytes, '.1f', 7)} "
+            f"{cell(r.tasks_per_s, '.0f', 9)} {cell(r.recovery_s, '.2f', 8)}  {delta}"
+        )
+    return "\n".join(lines)
@@ -0,0 +1,97 @@
+import argparse
+import os
+import sys
+from benchmarks.benches import api_worker_benchmarks, fsm_benchmark, loop_benchmarks
+from benchmarks.harness import compare, format_results, load_baseline, save_baseline
+from benchmarks.synthetic import SyntheticClient, synthetic_ticks
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+# 25 minutes at 60 Hz: three pit stops, so the stint, pitstop and fuel
+# managers are measured across four stints
+DEFAULT_TICKS = 90000
+
+# compared against the baseline by default; p99 and allocations are noisier
+DEFAULT_METRICS = ("p50_us", "tasks_per_s", "recovery_s")
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks",
+        description="Benchmark the telemetry loop, managers, FSM and API worker.",
+    )
+    parser.add_argument(
+        "--recording", help="replay a TelemetryRecorder file instead of synthetic ticks"
+    )
+    parser.add_argument(
+        "--ticks",
+        type=int,
+        default=DEFAULT_TICKS,
+        help=f"synthetic ticks to run (default: {DEFAULT_TICKS}, three pit stops)",
+    )
+    parser.add_argument("--repeat", type=int, default=3, help="timing passes, the best one counts")
+    parser.add_argument("--fsm-cycles", type=int, default=5000, help="pit stop cycles through the FSM")
+    parser.add_argument("--api-tasks", type=int, default=2000, help="laps sent through the APIWorker")
+    parser.add_argument("--skip-api", action="store_true", help="leave out the APIWorker benchmarks")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="baseline JSON file")
+    parser.add_argument("--save", action="store_true", help="write the results as the new baseline")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.25,
+        help="fail when a metric is this much worse than the baseline (default: 0.25 = 25%%)",
+    )
+    parser.add_argument(
+        "--metric",
+        action="append",
+        dest="metrics",
+        help=f"metric to check against the baseline, repeatable (default: {', '.join(DEFAULT_METRICS)})",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+
+    if args.recording:
+        from src.telemetry.replay_client import ReplayClient
+
+        def make_client():
+            return ReplayClient(args.recording)
+
+    else:
+        ticks = synthetic_ticks(args.ticks)
+
+        def make_client():
+            return SyntheticClient(ticks)
+
+    results = loop_benchmarks(make_client, args.repeat)
+    results += fsm_benchmark(args.fsm_cycles, args.repeat)
+    if not args.skip_api:
+        results += api_worker_benchmarks(args.api_tasks)
+
+    baseline = load_baseline(args.baseline)
+    print(format_results(results, baseline))
+
+    if args.save:
+        save_baseline(args.baseline, results)
+        print(f"\nBaseline saved to {args.baseline}")
+        return 0
+
+    if not baseline:
+        print(f"\nNo baseline at {args.baseline}, run with --save to create one")
+        return 0
+
+    regressions = compare(results, baseline, args.threshold, args.metrics or DEFAULT_METRICS)
+    if regressions:
+        print(f"\nRegressions over {args.threshold:.0%}:")
+        for line in regressions:
+            print(f"  {line}")
+        return 1
+
+    print(f"\nNo regressions over {args.threshold:.0%}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
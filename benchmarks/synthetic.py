@@ -0,0 +1,179 @@
+import math
+from typing import Any, Optional, Sequence
+import numpy as np
+from irsdk import Flags, SessionState, TrkLoc
+
+HZ = 60
+LAP_SECONDS = 90.0
+# every fifth lap ends in the pits
+PIT_EVERY = 5
+
+DRIVER_NAME = "Bench Driver"
+# CarIdx arrays are always this long; the rest of the slots are empty
+MAX_CARS = 64
+# rivals at CarIdx 1..GRID_SIZE, each a little slower than the last
+GRID_SIZE = 40
+DRIVER_INFO = {
+    "DriverCarIdx": 0,
+    "Drivers": [
+        {
+            "CarIdx": 0,
+            "UserName": DRIVER_NAME,
+            "CarClassShortName": "GT3",
+            "CarScreenName": "Porsche 911 GT3 R",
+        },
+        *(
+            {
+                "CarIdx": car_idx,
+                "UserName": f"Rival {car_idx}",
+                "CarClassShortName": "GT3",
+                "CarScreenName": "Porsche 911 GT3 R",
+            }
+            for car_idx in range(1, GRID_SIZE + 1)
+        ),
+    ],
+}
+SESSION_INFO = {"Sessions": [{"SessionType": "Race", "SessionTime": "86400.0000 sec"}]}
+WEEKEND_INFO = {"SubSessionID": 1, "TrackDisplayName": "Spa"}
+
+
+_RIVALS = np.arange(1, GRID_SIZE + 1)
+_RIVAL_LAP_SECONDS = LAP_SECONDS * (1.0 + 0.003 * _RIVALS)
+
+
+def grid_arrays(t: float) -> dict[str, list]:
+    """The CarIdx arrays at session time t; rivals pit on staggered laps."""
+    lap_f = t / _RIVAL_LAP_SECONDS
+    lap_completed = lap_f.astype(np.int32)
+    lap_pct = lap_f - lap_completed
+    on_pit_road = ((lap_completed + _RIVALS) % PIT_EVERY == PIT_EVERY - 1) & (lap_pct > 0.95)
+    position = np.empty(GRID_SIZE, dtype=np.int32)
+    position[np.argsort(-lap_f)] = np.arange(2, GRID_SIZE + 2)
+
+    lap = np.full(MAX_CARS, -1, dtype=np.int32)
+    surface = np.full(MAX_CARS, TrkLoc.not_in_world, dtype=np.int32)
+    pit = np.zeros(MAX_CARS, dtype=bool)
+    pos = np.zeros(MAX_CARS, dtype=np.int32)
+    last = np.full(MAX_CARS, -1.0)
+    lap[_RIVALS] = lap_completed
+    surface[_RIVALS] = np.where(on_pit_road, TrkLoc.aproaching_pits, TrkLoc.on_track)
+    pit[_RIVALS] = on_pit_road
+    pos[_RIVALS] = position
+    last[_RIVALS] = np.where(lap_completed > 0, _RIVAL_LAP_SECONDS, -1.0)
+
+    return {
+        "CarIdxLapCompleted": lap.tolist(),
+        "CarIdxOnPitRoad": pit.tolist(),
+        "CarIdxTrackSurface": surface.tolist(),
+        "CarIdxPosition": pos.tolist(),
+        "CarIdxLastLapTime": last.tolist(),
+    }
+
+
+def synthetic_tick(i: int, fuel: float) -> dict[str, Any]:
+    t = i / HZ
+    lap_f = t / LAP_SECONDS
+    lap_completed = int(lap_f)
+    lap_pct = lap_f - lap_completed
+    pit_lap = lap_completed % PIT_EVERY == PIT_EVERY - 1
+
+    return {
+        "SessionTime": t,
+        "SessionState": SessionState.racing if t > 1 else SessionState.warmup,
+        "SessionFlags": 0,
+        "SessionInfoUpdate": 1,
+        "PlayerCarClassPosition": 3,
+        "PlayerCarIdx": 0,
+        "PlayerCarMyIncidentCount": i // 20000,
+        "PlayerCarTowTime": 0.0,
+        "IsOnTrack": True,
+        "OnPitRoad": pit_lap and lap_pct > 0.95,
+        "PitstopActive": pit_lap and 0.97 < lap_pct < 0.99,
+        "Lap": lap_completed + 1,
+        "LapCompleted": lap_completed,
+        "LapLastLapTime": LAP_SECONDS if lap_completed else -1.0,
+        "LapDistPct": lap_pct,
+        "FuelLevel": fuel,
+        "Speed": 50.0 + 10.0 * math.sin(t),
+        "PitRepairLeft": 0.0,
+        "PitOptRepairLeft": 0.0,
+        "FastRepairAvailable": 1,
+        "dpRFTireChange": 1.0,
+        "dpLFTireChange": 1.0,
+        "dpRRTireChange": 0.0,
+        "dpLRTireChange": 0.0,
+        "DriverInfo": DRIVER_INFO,
+        "SessionInfo": SESSION_INFO,
+        "WeekendInfo": WEEKEND_INFO,
+        **grid_arrays(t),
+    }
+
+
+def synthetic_ticks(count: int) -> list[dict[str, Any]]:
+    """A race of `count` ticks at 60 Hz: steady laps, fuel burn and pit stops, for us and the grid."""
+    ticks = []
+    fuel = 100.0
+    for i in range(count):
+        tick = synthetic_tick(i, fuel)
+        fuel = min(100.0, fuel + 0.5) if tick["PitstopActive"] else max(0.0, fuel - 0.002)
+        ticks.append(tick)
+    return ticks
+
+
+class SyntheticClient:
+    """IRacingClient stand-in that plays back pre-built ticks.
+
+    Rows are laid out for the requested fields on the first read, so a read
+    is a list copy and the benchmarks measure the loop rather than this.
+    """
+
+    def __init__(self, ticks: Sequence[dict[str, Any]]):
+        self.ticks = ticks
+        self.pos = -1
+        self._fields: Optional[tuple[str, ...]] = None
+        self._rows: list[list[Any]] = []
+
+    def connect(self) -> bool:
+        return self.is_connected
+
+    def disconnect(self):
+        pass
+
+    @property
+    def is_connected(self) -> bool:
+        return self.pos + 1 < len(self.ticks)
+
+    @property
+    def is_exhausted(self) -> bool:
+        return not self.is_connected
+
+    def rewind(self):
+        self.pos = -1
+
+    def update(self):
+        self.pos += 1
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return self.ticks[self.pos].get(key, default)
+
+    def prepare(self, fields: Sequence[str]):
+        """Lay the rows out ahead of time, so the first read isn't an outlier."""
+        self._fields = tuple(fields)
+        self._rows = [[tick.get(key) for key in fields] for tick in self.ticks]
+
+    def read_fields(self, fields: Sequence[str], out: Optional[list] = None) -> list:
+        if self._fields != tuple(fields):
+            self.prepare(fields)
+
+        out = [] if out is None else out
+        out[:] = self._rows[self.pos]
+        return out
+
+    def get_driver_name(self, car_idx: Optional[int]) -> Optional[str]:
+        for driver in DRIVER_INFO["Drivers"]:
+            if driver["CarIdx"] == car_idx:
+                return driver["UserName"]
+        return None
+
+    def get_yaml(self, key: str) -> dict:
+        return self.get(key) or {}
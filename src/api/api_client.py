@@ -1,6 +1,14 @@
-from typing import Optional
+from typing import Any, Optional
+import gzip
 import logging
+import re
+import time
 import requests
+from requests.adapters import HTTPAdapter
+from src.api.retry import CircuitBreaker, RetryPolicy
+from src.api.task_types import encode_body
+from src.metrics.registry import REGISTRY
+from src.metrics.tracing import TRACER
 
 logger = logging.getLogger(__name__)
 logging.basicConfig(
@@ -9,13 +17,75 @@ logging.basicConfig(
 )
 
 
+JSON_HEADERS = {"Content-Type": "application/json"}
+GZIP_JSON_HEADERS = {**JSON_HEADERS, "Content-Encoding": "gzip"}
+
+# bodies from this size up are gzipped; below it the header costs more than it saves
+GZIP_MIN_BYTES = 1024
+
+# statuses meaning the server has no bulk endpoint for an entity
+BULK_UNSUPPORTED_STATUSES = (404, 405)
+
+
+# numeric path segments, folded so endpoints are labelled "/stints/{id}" rather than per id
+ID_SEGMENT = re.compile(r"/\d+(?=/|$)")
+
+REQUEST_SECONDS = REGISTRY.summary(
+    "api_request_seconds",
+    "Backend request latency per attempt, by method and endpoint.",
+    labelnames=("method", "endpoint"),
+)
+REQUEST_ERRORS = REGISTRY.counter(
+    "api_request_errors_total",
+    "Failed backend request attempts, by method, endpoint and reason (status or exception).",
+    labelnames=("method", "endpoint", "reason"),
+)
+
+
+class BulkNotSupported(Exception):
+    """Raised when the backend has no bulk endpoint for an entity."""
+
+
+class APIConflict(Exception):
+    """Raised on 409 where the caller asked to handle conflicts itself."""
+
+
+class APIUnavailable(Exception):
+    """Raised when the backend couldn't be reached or failed (5xx); worth retrying."""
+
+
 class APIClient:
     """Synchronous API client for interacting with telemetry backend."""
 
-    def __init__(self, base_url: str):
+    def __init__(
+        self,
+        base_url: str,
+        connect_timeout: float = 3.05,
+        read_timeout: float = 5.0,
+        retry: Optional[RetryPolicy] = None,
+        breaker: Optional[CircuitBreaker] = None,
+        gzip_min_bytes: Optional[int] = GZIP_MIN_BYTES,
+    ):
         self.base_url = base_url.rstrip("/")
         self.s = requests.Session()
-        self.is_connected = self.check_connection()
+        # one connection per dispatcher lane plus the worker thread
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=4)
+        self.s.mount("http://", adapter)
+        self.s.mount("https://", adapter)
+
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        # None sends every body uncompressed
+        self.gzip_min_bytes = gzip_min_bytes
+        self.retry = retry or RetryPolicy()
+        self.breaker = breaker or CircuitBreaker(probe=self.check_connection)
+
+        if not self.check_connection():
+            self.breaker.trip()
+
+    @property
+    def is_connected(self) -> bool:
+        return self.breaker.is_closed
 
     def __enter__(self):
         return self
@@ -24,21 +94,124 @@ class APIClient:
         self.s.close()
 
     # Core request handler
+    def _encode(self, body: Optional[bytes]) -> tuple[Optional[bytes], Optional[dict]]:
+        """Request data and headers for a JSON body, gzipped if it's big enough."""
+        if body is None:
+            return None, None
+        if self.gzip_min_bytes is not None and len(body) >= self.gzip_min_bytes:
+            return gzip.compress(body, compresslevel=6), GZIP_JSON_HEADERS
+        return body, JSON_HEADERS
+
+    def _send(
+        self, method: str, url: str, body: Optional[bytes], read_timeout: Optional[float] = None
+    ) -> requests.Response:
+        """Send a request, retrying connection errors and 5xx with jittered backoff.
+
+        Raises APIUnavailable once the retries are spent, or straight away
+        while the circuit breaker is open. Read timeouts aren't retried here:
+        the server may have acted on the request, so it's left to the outbox,
+        whose creates carry their local_id for the server to spot a resend.
+        """
+        endpoint = ID_SEGMENT.sub("/{id}", url[len(self.base_url):]) or "/"
+        if not self.breaker.allow():
+            REQUEST_ERRORS.labels(method, endpoint, "circuit_open").inc()
+            raise APIUnavailable(f"circuit open, not sending {method} {url}")
+
+        timeout = (self.connect_timeout, read_timeout or self.read_timeout)
+        data, headers = self._encode(body)
+        latency = REQUEST_SECONDS.labels(method, endpoint)
+        error = ""
+
+        for attempt in range(self.retry.attempts):
+            if attempt:
+                time.sleep(self.retry.delay(attempt - 1))
+
+            TRACER.mark_active("send")
+            start = time.perf_counter()
+            try:
+                r = self.s.request(method, url, data=data, headers=headers, timeout=timeout)
+            except requests.ConnectionError as e:
+                REQUEST_ERRORS.labels(method, endpoint, type(e).__name__).inc()
+                error = str(e)
+                logger.warning("API request failed: %s %s -> %s", method, url, e)
+                continue
+            except requests.RequestException as e:
+                REQUEST_ERRORS.labels(method, endpoint, type(e).__name__).inc()
+                error = str(e)
+                logger.warning("API request failed: %s %s -> %s", method, url, e)
+                break
+            finally:
+                latency.observe(time.perf_counter() - start)
+                TRACER.mark_active("response")
+
+            logger.debug("%s %s -> %s", method, url, r.status_code)
+            if r.status_code >= 400:
+                REQUEST_ERRORS.labels(method, endpoint, r.status_code).inc()
+            if r.status_code == 415 and headers is GZIP_JSON_HEADERS:
+                logger.info("Server doesn't accept gzipped bodies, sending them uncompressed")
+                self.gzip_min_bytes = None
+                return self._send(method, url, body, read_timeout)
+            if r.status_code < 500:
+                self.breaker.record_success()
+                return r
+
+            error = f"{r.status_code} from {url}"
+            logger.warning("API server error: %s %s -> %s", method, url, r.status_code)
+
+        self.breaker.record_failure()
+        raise APIUnavailable(error)
+
+    @staticmethod
+    def _json(r: requests.Response) -> Optional[Any]:
+        try:
+            return r.json()
+        except ValueError:
+            return None
+
     def _request(
-        self, method: str, endpoint: str, json: Optional[dict] = None
+        self,
+        method: str,
+        endpoint: str,
+        json: Optional[dict] = None,
+        raise_on_conflict: bool = False,
+        body: Optional[bytes] = None,
+        expected_statuses: tuple[int, ...] = (),
     ) -> Optional[dict]:
-        """Generic HTTP request."""
+        """Generic HTTP request, with a dict to encode or an already encoded body.
+
+        Returns None for responses without a usable body (409, 204) and for
+        other 4xx, which retrying won't fix; those are logged unless listed in
+        `expected_statuses`. Raises APIUnavailable otherwise.
+        """
         url = f"{self.base_url}/{endpoint.lstrip('/')}"
-        try:
-            r = self.s.request(method, url, json=json, timeout=5)
-            #r.raise_for_status()
-            if r.status_code in [409, 204]:
-                return None
-            logger.debug("%s %s -> %s", method, url, r.status_code)
-            return r.json()
-        except requests.RequestException as e:
-            logger.exception("API request failed: %s %s -> %s", method, url, e)
+        if json is not None:
+            body = encode_body(json)
+        r = self._send(method, url, body)
+        if r.status_code == 409 and raise_on_conflict:
+            raise APIConflict(f"{method} {url}")
+        if r.status_code in [409, 204]:
+            return None
+        if r.status_code >= 400:
+            if r.status_code not in expected_statuses:
+                logger.error("API request rejected: %s %s -> %s", method, url, r.status_code)
+            return None
+        return self._json(r)
+
+    def bulk(self, method: str, entity: str, items: list[bytes]) -> Optional[list]:
+        """Send many items of one entity in a single request.
+
+        The server answers with one result per item, in order (null for items
+        it rejected). Raises BulkNotSupported if it has no bulk endpoint.
+        """
+        url = f"{self.base_url}/{entity}/bulk"
+        body = b"[" + b",".join(items) + b"]"
+        r = self._send(method, url, body, read_timeout=self.read_timeout * 2)
+        if r.status_code in BULK_UNSUPPORTED_STATUSES:
+            raise BulkNotSupported(entity)
+        if r.status_code >= 400:
+            logger.error("Bulk request failed: %s %s -> %s", method, url, r.status_code)
             return None
+        return self._json(r)
 
     def get(self, endpoint: str) -> Optional[dict]:
         return self._request("GET", endpoint)
@@ -53,37 +226,55 @@ class APIClient:
         return self._request("PATCH", endpoint, json=json)
 
     # Domain specific methods
-    def post_session(self, session_data: dict):
-        return self.post("sessions", session_data)
+    # bodies arrive encoded (see Task); ids for the URL are passed alongside
+
+    def post_session(self, body: bytes):
+        return self._request("POST", "sessions", body=body)
 
     def get_latest_stint(self, session_id: int):
-        return self.get(f"sessions/{session_id}/stints/latest")
+        """The session's highest numbered stint; None (404) until it has one."""
+        return self._request("GET", f"sessions/{session_id}/stints/latest", expected_statuses=(404,))
+
+    def post_stint(self, session_id: int, body: bytes):
+        """Raises APIConflict if the stint number is already taken."""
+        return self._request(
+            "POST", f"sessions/{session_id}/stints", body=body, raise_on_conflict=True
+        )
+
+    def patch_stint(self, stint_id: int, body: bytes):
+        return self._request("PATCH", f"stints/{stint_id}", body=body)
+
+    def post_pitstop(self, stint_id: int, body: bytes):
+        return self._request("POST", f"stints/{stint_id}/pitstops", body=body)
+
+    def patch_pitstop(self, pitstop_id: int, body: bytes):
+        return self._request("PATCH", f"pitstops/{pitstop_id}", body=body)
+
+    def post_lap(self, stint_id: int, body: bytes):
+        return self._request("POST", f"stints/{stint_id}/laps", body=body)
 
-    def post_stint(self, stint_data: dict):
-        session_id = stint_data["session_id"]
-        return self.post(f"sessions/{session_id}/stints", stint_data)
+    def post_stints(self, bodies: list[bytes]):
+        return self.bulk("POST", "stints", bodies)
 
-    def patch_stint(self, stint_data: dict):
-        stint_id = stint_data["id"]
-        return self.patch(f"/stints/{stint_id}", stint_data)
+    def patch_stints(self, bodies: list[bytes]):
+        return self.bulk("PATCH", "stints", bodies)
 
-    def post_pitstop(self, pit_data: dict):
-        stint_id = pit_data["stint_id"]
-        return self.post(f"stints/{stint_id}/pitstops", pit_data)
+    def post_pitstops(self, bodies: list[bytes]):
+        return self.bulk("POST", "pitstops", bodies)
 
-    def patch_pitstop(self, pit_data: dict):
-        pitstop_id = pit_data["pitstop_id"]
-        return self.patch(f"pitstops/{pitstop_id}", pit_data)
+    def patch_pitstops(self, bodies: list[bytes]):
+        return self.bulk("PATCH", "pitstops", bodies)
 
-    def post_lap(self, lap_data: dict):
-        stint_id = lap_data["stint_id"]
-        return self.post(f"stints/{stint_id}/laps", lap_data)
+    def post_laps(self, bodies: list[bytes]):
+        return self.bulk("POST", "laps", bodies)
 
     # Utilities
     def check_connection(self) -> bool:
         """Check if backend is reachable."""
         try:
-            r = self.s.get(f"{self.base_url}/health", timeout=3)
+            r = self.s.get(
+                f"{self.base_url}/health", timeout=(self.connect_timeout, self.connect_timeout)
+            )
             return r.status_code == 200
         except requests.RequestException:
             return False
@@ -1,13 +1,15 @@
+import json
 import threading
-from typing import Optional
+import time
+from typing import Any, Callable, Optional
 from queue import Queue, Empty
 import logging
-from requests import HTTPError
-from src.api.task_types import TaskType
-from src.api.api_client import APIClient
-from src.models.stint import Stint
-from src.models.pitstop import PitStop
+from src.api.task_types import Task, TaskType, with_fields
+from src.api.api_client import APIClient, APIConflict, APIUnavailable, BulkNotSupported
+from src.api.outbox import Outbox
+from src.api.dispatcher import LaneDispatcher
 from src.context.race_context import RaceContext
+from src.metrics.tracing import TRACER
 
 logger = logging.getLogger(__name__)
 logging.basicConfig(
@@ -16,144 +18,591 @@ logging.basicConfig(
 )
 
 
+# sent in order on the worker thread before the rest of a batch, since
+# everything on the lanes hangs off the session and its stints
+SYNC_PHASES = (TaskType.SESSION, TaskType.STINT_CREATE)
+
+# tries at a free stint number before a create is given up on
+STINT_NUMBER_ATTEMPTS = 3
+
+# lane -> task types it sends, in order; lanes run concurrently
+LANES: dict[str, tuple[TaskType, ...]] = {
+    "stints": (TaskType.STINT_UPDATE,),
+    "laps": (TaskType.LAP,),
+    "pitstops": (TaskType.PITSTOP_CREATE, TaskType.PITSTOP_UPDATE),
+}
+
+
 class APIWorker(threading.Thread):
-    def __init__(self, context: RaceContext, client: APIClient, queue: Queue, stop_event: threading.Event):
+    def __init__(
+        self,
+        context: RaceContext,
+        client: APIClient,
+        queue: Queue,
+        stop_event: threading.Event,
+        batch_size: int = 100,
+        batch_window: float = 0.25,
+        outbox: Optional[Outbox] = None,
+    ):
         super().__init__(daemon=True)
         self.context = context
         self.client = client
         self.queue = queue
         self.stop_event = stop_event
+        # every task goes through the outbox and is sent from there
+        self.outbox = outbox if outbox is not None else Outbox()
+
+        self.batch_size = batch_size
+        self.batch_window = batch_window
+        # "<METHOD> <entity>" bulk endpoints the server turned out not to have
+        self.bulk_unsupported: set[str] = set()
+        # last stint number used per session, seeded from the server once
+        self._stint_numbers: dict[int, int] = {}
+        # number given to each stint create, by local_id, kept across resends
+        self._assigned_numbers: dict[str, int] = {}
+
+        self.dispatcher = LaneDispatcher(list(LANES))
+        # highest outbox seq handed to the lanes; rewound when a lane fails
+        self._dispatched_seq = 0
+        # set when tasks were left in the outbox for a stint or pitstop still
+        # being created; the next flush peeks them again
+        self.holding = threading.Event()
 
     def run(self):
+        try:
+            self._run()
+        finally:
+            self.dispatcher.wait()
+            self.dispatcher.shutdown()
+            self.outbox.close()
+
+    def _run(self):
+        # tasks left over from a previous run go out first
+        self.flush_outbox()
+
         while not self.stop_event.is_set():
             try:
-                task = self.queue.get(timeout=1)
-                if task is None:
-                    break
-                self.process_task(task)
-                self.queue.task_done()
+                batch = self._collect_batch()
             except Empty:
-                continue
-            except Exception as e:
-                logger.exception("Error processing task: %s", e)
+                batch = []
+
+            tasks = [task for task in batch if task is not None]
+            try:
+                # once the lanes have settled nothing is in flight, so any
+                # waiting update can take the new fields
+                if self.dispatcher.failed.is_set():
+                    self._rewind()
+                merged = self.outbox.append(tasks, merge_after=self._dispatched_seq)
+                TRACER.mark_many((task.trace_id for task in tasks), "outbox")
+                # the waiting task's trace carries on for both
+                for task in merged:
+                    TRACER.finish(task.trace_id, "collapsed")
+            finally:
+                for _ in batch:
+                    self.queue.task_done()
+
+            self.flush_outbox()
+
+            if len(tasks) < len(batch):
+                break
+
+    def flush_outbox(self):
+        """Dispatch unacknowledged tasks, oldest first, until the outbox is drained or the API is down."""
+        if self.holding.is_set():
+            self.holding.clear()
+            self._rewind()
+
+        while not self.stop_event.is_set():
+            if self.dispatcher.failed.is_set():
+                self._rewind()
+                return
+
+            entries = self.outbox.peek(self.batch_size, after=self._dispatched_seq)
+            if not entries:
+                return
+            self._dispatched_seq = entries[-1][0]
+
+            try:
+                self.process_batch(entries)
+            except APIUnavailable as e:
+                self.dispatcher.failed.set()
+                # quiet while the breaker is open, the client logged the failures
+                level = logging.WARNING if self.client.is_connected else logging.DEBUG
+                logger.log(level, "API unavailable, %d tasks held in outbox: %s", len(self.outbox), e)
+
+    def _rewind(self):
+        """After a failure or a hold, let the lanes settle and resend whatever wasn't acknowledged."""
+        self.dispatcher.wait()
+        self.dispatcher.reset()
+        self._dispatched_seq = 0
+
+    def _collect_batch(self) -> list[Optional[Task]]:
+        """Wait for a task, then take whatever else is queued within the batch window."""
+        batch = [self.queue.get(timeout=1)]
+        deadline = time.monotonic() + self.batch_window
+
+        while batch[-1] is not None:
+            TRACER.mark(batch[-1].trace_id, "dequeue")
+            if len(batch) >= self.batch_size:
+                break
+
+            remaining = deadline - time.monotonic()
+            try:
+                if remaining > 0:
+                    batch.append(self.queue.get(timeout=remaining))
+                else:
+                    batch.append(self.queue.get_nowait())
+            except Empty:
+                break
 
-    def process_task(self, task: dict):
-        task_type = task["type"]
-        data = task["data"]
+        return batch
+
+    def process_batch(self, entries: list[tuple[int, Task]]):
+        """Send sessions and stint creates here, then hand the rest to the lanes.
+
+        Each group is acknowledged once it's through, except for tasks held
+        for a stint or pitstop still being created. Raises APIUnavailable if
+        the synchronous part fails; lane failures show up on the dispatcher.
+        """
+        grouped: dict[TaskType, list[tuple[int, Task]]] = {task_type: [] for task_type in TaskType}
+        for seq, task in entries:
+            grouped[task.type].append((seq, task))
 
         handlers = {
-            TaskType.SESSION.value: self._process_session,
-            TaskType.STINT_CREATE.value: self._process_stint_create,
-            TaskType.STINT_UPDATE.value: self._process_stint_update,
-            TaskType.LAP.value: self._process_lap,
-            TaskType.PITSTOP_CREATE.value: self._process_pitstop_create,
-            TaskType.PITSTOP_UPDATE.value: self._process_pitstop_update,
+            TaskType.SESSION: self._process_sessions,
+            TaskType.STINT_CREATE: self._process_stint_creates,
+            TaskType.STINT_UPDATE: self._process_stint_updates,
+            TaskType.LAP: self._process_laps,
+            TaskType.PITSTOP_CREATE: self._process_pitstop_creates,
+            TaskType.PITSTOP_UPDATE: self._process_pitstop_updates,
         }
 
-        handler = handlers.get(task_type)
-        if handler:
-            handler(data)
-        else:
-            logger.warning("Unknown task type: %s", task_type)
+        for task_type in SYNC_PHASES:
+            items = grouped[task_type]
+            if items:
+                self._send_group(handlers[task_type], items)
+
+        for lane, task_types in LANES.items():
+            for task_type in task_types:
+                items = grouped[task_type]
+                if items:
+                    self.dispatcher.submit(lane, self._send_group, handlers[task_type], items)
+
+    def _send_group(
+        self, handler: Callable[[list[Task]], Optional[list[Task]]], items: list[tuple[int, Task]]
+    ):
+        """Run a handler over one group of entries and acknowledge them.
+
+        Tasks the handler returns are held: left unacknowledged in the outbox
+        and peeked again on the next flush.
+        """
+        trace_ids = [task.trace_id for _, task in items]
+        outcome = "acked"
+        held: list[Task] = []
+
+        with TRACER.activate(trace_ids):
+            TRACER.mark_active("serialize")
+            try:
+                held = handler([task for _, task in items]) or []
+            except APIUnavailable:
+                raise
+            except Exception as e:
+                # a group that can't be processed would block the outbox forever
+                logger.exception("Error processing tasks, dropping %d: %s", len(items), e)
+                outcome = "dropped"
+
+        held_ids = {id(task) for task in held}
+        if held_ids:
+            self.holding.set()
+
+        done = [(seq, task) for seq, task in items if id(task) not in held_ids]
+        self.outbox.ack(seq for seq, _ in done)
+        for _, task in done:
+            TRACER.finish(task.trace_id, outcome)
+
+    # Server ids
+    # tasks carry local_ids; ids handed out by the server are kept in the
+    # outbox (for replays) and published on the context
+
+    def _record_id(self, local_id: str, server_id: int):
+        self.outbox.record_id(local_id, server_id)
+        self.context.server_ids[local_id] = server_id
+
+    def _resolve(self, local_id: Optional[str]) -> Optional[int]:
+        return self.outbox.server_id(local_id)
+
+    def _acknowledged(self, task: Task):
+        """Publish the fields the server now holds for a stint or pitstop, so the
+        next patch only carries what changed since."""
+        synced = self.context.synced_fields
+        # replaced whole, so managers can read it from their own thread
+        synced[task.key] = {**synced.get(task.key, {}), **json.loads(task.body)}
+
+    def _split_unresolved(
+        self,
+        items: list[Task],
+        what: str,
+        create: TaskType,
+        local_id: Callable[[Task], Optional[str]],
+    ) -> tuple[list[Task], list[Task]]:
+        """Split items into those whose stint or pitstop has a server id and those to hold.
+
+        Items are only held while the create they depend on is still in the
+        outbox. Once it's gone without an id (rejected, or given up on) they
+        can never be sent, so they're left out of both lists and dropped.
+        """
+        entity = "stint" if create is TaskType.STINT_CREATE else "pitstop"
+        ready: list[Task] = []
+        held: list[Task] = []
+        pending: dict[Optional[str], bool] = {}
+
+        for task in items:
+            key = local_id(task)
+            if self._resolve(key) is not None:
+                ready.append(task)
+                continue
+            if key not in pending:
+                pending[key] = self.outbox.pending(create, key)
+            if pending[key]:
+                held.append(task)
+
+        dropped = len(items) - len(ready) - len(held)
+        if held:
+            logger.info("Holding %d %s until their %s is created", len(held), what, entity)
+        if dropped:
+            logger.warning("Dropping %d %s, their %s was never created", dropped, what, entity)
+        return ready, held
+
+    # Batches
+
+    @staticmethod
+    def _single(handler: Callable[[Task], None], task: Task):
+        """Send one task of a group on its own, so its trace only gets its own request."""
+        with TRACER.activate((task.trace_id,)):
+            handler(task)
+
+    def _process_in_bulk(
+        self,
+        key: str,
+        items: list[Task],
+        single: Callable[[Task], None],
+        payload: Callable[[Task], bytes],
+        send: Callable[[list[bytes]], Optional[list]],
+    ) -> Optional[list[Any]]:
+        """Send items as one bulk request and return the per-item results.
+
+        Returns None when there's nothing to map back: the items went out one
+        by one (a single item, no bulk endpoint for `key`, or a bulk request
+        the server rejected as a whole, so one bad item doesn't lose the rest).
+        """
+        if not items:
+            return None
+        if len(items) == 1 or key in self.bulk_unsupported:
+            for item in items:
+                self._single(single, item)
+            return None
 
-    def _process_session(self, session_data: dict):
-        logger.info("Posting new session")
         try:
-            self.client.post_session(session_data)
-        except HTTPError as e:
-            logger.error("HTTP error: %s", e)
+            results = send([payload(item) for item in items])
+        except BulkNotSupported:
+            logger.info("No bulk endpoint for %s, sending items one by one", key)
+            self.bulk_unsupported.add(key)
+            for item in items:
+                self._single(single, item)
+            return None
+
+        if results is None:
+            logger.warning("Bulk %s failed for %d items, sending them one by one", key, len(items))
+            for item in items:
+                self._single(single, item)
+            return None
+
+        if len(results) != len(items):
+            logger.warning(
+                "Bulk %s returned %d results for %d items", key, len(results), len(items)
+            )
+        return results
 
-    def _process_stint_create(self, task_data: dict):
-        session_id = task_data["session_id"]
-        stint: Optional[Stint] = task_data["stint_obj"]
+    def _process_sessions(self, items: list[Task]):
+        for task in items:
+            self._single(self._process_session, task)
 
-        if not stint:
-            logger.warning("No stint object provided in task_data")
+    def _next_stint_number(self, session_id: int) -> int:
+        """Stints are numbered locally; only the first stint of a session asks the server."""
+        if session_id not in self._stint_numbers:
+            latest_stint = self.client.get_latest_stint(session_id=session_id)
+            self._stint_numbers[session_id] = latest_stint["number"] if latest_stint else 0
+
+        self._stint_numbers[session_id] += 1
+        return self._stint_numbers[session_id]
+
+    def _stint_number(self, task: Task) -> int:
+        if task.key not in self._assigned_numbers:
+            self._assigned_numbers[task.key] = self._next_stint_number(task.session_id)
+        return self._assigned_numbers[task.key]
+
+    # creates carry their local_id, so the server can answer a resend (after a
+    # timeout, or from the outbox) with the row it already made
+    def _stint_post_payload(self, task: Task) -> bytes:
+        return with_fields(task.body, number=self._stint_number(task), local_id=task.key)
+
+    @staticmethod
+    def _is_own_stint(task: Task, stint: dict) -> bool:
+        """Whether a stint the server has was made by this create, on an earlier try."""
+        if stint.get("local_id"):
+            return stint["local_id"] == task.key
+        # a server that doesn't keep local_id: same driver, same start
+        body = json.loads(task.body)
+        return (
+            stint.get("start_time") == body.get("start_time")
+            and stint.get("driver_name") == body.get("driver_name")
+        )
+
+    def _reseed_stint_number(self, task: Task) -> Optional[dict]:
+        """Our number is taken. Returns the stint holding it if that's ours (a
+        resend after a timeout); otherwise renumbers from the server."""
+        taken = self._assigned_numbers.pop(task.key, 0)
+        latest = self.client.get_latest_stint(session_id=task.session_id)
+        if latest and latest.get("number") == taken and self._is_own_stint(task, latest):
+            logger.info("Stint %s was already created by an earlier try", taken)
+            self._assigned_numbers[task.key] = taken
+            return latest
+
+        # someone else took it (another driver's client)
+        logger.info("Stint number %s already taken, renumbering", taken)
+        self._stint_numbers[task.session_id] = latest["number"] if latest else 0
+        number = self._stint_number(task)
+
+        # the server's latest can lag behind whoever took our number
+        if number <= taken:
+            self._stint_numbers[task.session_id] = taken + 1
+            self._assigned_numbers[task.key] = taken + 1
+        return None
+
+    def _stint_created(self, task: Task, stint_id: int):
+        self._record_id(task.key, stint_id)
+        self._acknowledged(task)
+        self._assigned_numbers.pop(task.key, None)
+        self.context.stint_id = stint_id
+
+    def _process_stint_creates(self, items: list[Task]):
+        # a create replayed after its id was recorded has already gone through
+        items = [task for task in items if self._resolve(task.key) is None]
+
+        results = self._process_in_bulk(
+            "POST stints",
+            items,
+            self._process_stint_create,
+            self._stint_post_payload,
+            self.client.post_stints,
+        )
+
+        for task, result in zip(items, results or ()):
+            if result and "id" in result:
+                number = self._assigned_numbers.get(task.key)
+                self._stint_created(task, result["id"])
+                logger.info("Created new stint %s with ID %s", number, result["id"])
+            else:
+                # most likely a number conflict; retried one by one unless it's our own
+                existing = self._reseed_stint_number(task)
+                if existing and "id" in existing:
+                    self._stint_created(task, existing["id"])
+                else:
+                    self._single(self._process_stint_create, task)
+
+    def _stint_patch_payload(self, task: Task) -> bytes:
+        return with_fields(task.body, id=self._resolve(task.key))
+
+    def _process_stint_updates(self, items: list[Task]) -> list[Task]:
+        # ids are looked up now; the stint may have been created earlier in this batch
+        items, held = self._split_unresolved(
+            items, "stint updates", TaskType.STINT_CREATE, lambda task: task.key
+        )
+
+        results = self._process_in_bulk(
+            "PATCH stints",
+            items,
+            self._process_stint_update,
+            self._stint_patch_payload,
+            self.client.patch_stints,
+        )
+
+        for task, result in zip(items, results or ()):
+            if result is not None:
+                self._acknowledged(task)
+        if results is not None:
+            logger.info("Updated %d stints", sum(1 for r in results if r is not None))
+        return held
+
+    def _lap_payload(self, task: Task) -> bytes:
+        return with_fields(task.body, stint_id=self._resolve(task.parent_key), local_id=task.key)
+
+    def _process_laps(self, items: list[Task]) -> list[Task]:
+        items, held = self._split_unresolved(
+            items, "laps", TaskType.STINT_CREATE, lambda task: task.parent_key
+        )
+
+        results = self._process_in_bulk(
+            "POST laps",
+            items,
+            self._process_lap,
+            self._lap_payload,
+            self.client.post_laps,
+        )
+
+        if results is not None:
+            logger.info("Posted %d laps", sum(1 for r in results if r is not None))
+        return held
+
+    def _pitstop_post_payload(self, task: Task) -> bytes:
+        return with_fields(task.body, stint_id=self._resolve(task.parent_key), local_id=task.key)
+
+    def _process_pitstop_creates(self, items: list[Task]) -> list[Task]:
+        items = [task for task in items if self._resolve(task.key) is None]
+        items, held = self._split_unresolved(
+            items, "pitstops", TaskType.STINT_CREATE, lambda task: task.parent_key
+        )
+
+        results = self._process_in_bulk(
+            "POST pitstops",
+            items,
+            self._process_pitstop_create,
+            self._pitstop_post_payload,
+            self.client.post_pitstops,
+        )
+
+        for task, result in zip(items, results or ()):
+            stint_id = self._resolve(task.parent_key)
+            if result and "id" in result:
+                self._record_id(task.key, result["id"])
+                self._acknowledged(task)
+                logger.info("Pitstop posted successfully for stint %s", stint_id)
+            else:
+                logger.warning("Failed to post pitstop for stint %s", stint_id)
+        return held
+
+    def _pitstop_patch_payload(self, task: Task) -> bytes:
+        return with_fields(task.body, pitstop_id=self._resolve(task.key))
+
+    def _process_pitstop_updates(self, items: list[Task]) -> list[Task]:
+        items, held = self._split_unresolved(
+            items, "pitstop updates", TaskType.PITSTOP_CREATE, lambda task: task.key
+        )
+
+        results = self._process_in_bulk(
+            "PATCH pitstops",
+            items,
+            self._process_pitstop_update,
+            self._pitstop_patch_payload,
+            self.client.patch_pitstops,
+        )
+
+        for task, result in zip(items, results or ()):
+            if result is not None:
+                self._acknowledged(task)
+        if results is not None:
+            logger.info("Updated %d pitstops", sum(1 for r in results if r is not None))
+        return held
+
+    # Single items
+
+    def _process_session(self, task: Task):
+        logger.info("Posting new session")
+        self.client.post_session(task.body)
+
+    def _process_stint_create(self, task: Task):
+        session_id = task.session_id
+        if self._resolve(task.key) is not None:
             return
 
         logger.info("Creating new stint for session %s", session_id)
-        latest_stint = self.client.get_latest_stint(session_id=session_id)
-        stint.number = (latest_stint["number"] + 1) if latest_stint else 1
 
-        response = self.client.post_stint(stint.post_dict())
+        response = None
+        for _ in range(STINT_NUMBER_ATTEMPTS):
+            try:
+                response = self.client.post_stint(session_id, self._stint_post_payload(task))
+                break
+            except APIConflict:
+                response = self._reseed_stint_number(task)
+                if response is not None:
+                    break
+        else:
+            logger.warning("Gave up numbering stint for session %s", session_id)
 
+        number = self._assigned_numbers.get(task.key)
+        stint_id = None
         if response and "id" in response:
-            stint.id = response["id"]
-            self.context.stint_id = stint.id
+            stint_id = response["id"]
+            self._stint_created(task, stint_id)
 
         logger.info(
             "Created new stint %s for session %s with ID %s",
-            stint.number,
+            number,
             session_id,
-            stint.id,
+            stint_id,
         )
 
-    def _process_stint_update(self, task_data: dict):
-        stint_id = task_data.get("stint_id")
+    def _process_stint_update(self, task: Task):
+        stint_id = self._resolve(task.key)
         if not stint_id:
             logger.warning("Cannot update stint without ID")
             return
-        
-        stint: Optional[Stint] = task_data["stint_obj"]
-        if not stint:
-            logger.warning("No stint object provided in task_data")
-            return
 
         logger.info("Updating stint %s", stint_id)
-        response = self.client.patch_stint(stint.patch_dict())
+        response = self.client.patch_stint(stint_id, with_fields(task.body, id=stint_id))
         if response is None:
             logger.warning("Failed to update stint %s", stint_id)
         else:
+            self._acknowledged(task)
             logger.info("Stint %s updated successfully", stint_id)
 
-    def _process_lap(self, lap_data: dict):
-        lap_number = lap_data.get("lap_number")
-        stint_id = lap_data.get("stint_id")
+    def _process_lap(self, task: Task):
+        stint_id = self._resolve(task.parent_key)
 
-        logger.info(
-            "Posting lap %s for stint %s",
-            lap_number,
-            stint_id,
-        )
+        if stint_id is None:
+            logger.warning("Cannot post lap without a stint")
+            return
+
+        logger.info("Posting lap for stint %s", stint_id)
 
-        response = self.client.post_lap(lap_data)
+        response = self.client.post_lap(stint_id, self._lap_payload(task))
 
         if response is None:
-            logger.warning("Failed to post lap %s for stint %s", lap_number, stint_id)
+            logger.warning("Failed to post lap for stint %s", stint_id)
         else:
-            logger.info("Lap %s posted successfully for stint %s", lap_number, stint_id)
+            logger.info("Lap posted successfully for stint %s", stint_id)
 
-    def _process_pitstop_create(self, task_data: dict):
-        stint_id = task_data.get("stint_id")
-        pitstop: Optional[PitStop] = task_data.get("pitstop_obj")
+    def _process_pitstop_create(self, task: Task):
+        if self._resolve(task.key) is not None:
+            return
 
-        if not pitstop:
-            logger.warning("No pitstop object provided in task_data")
+        stint_id = self._resolve(task.parent_key)
+        if stint_id is None:
+            logger.warning("Cannot create pitstop without a stint")
             return
-        
+
         logger.info("Creating pitstop for stint %s", stint_id)
-        response = self.client.post_pitstop(pitstop.to_post_dict())
+        response = self.client.post_pitstop(stint_id, self._pitstop_post_payload(task))
 
         if response and "id" in response:
-            pitstop.pitstop_id = response["id"]
+            self._record_id(task.key, response["id"])
+            self._acknowledged(task)
             logger.info("Pitstop posted successfully for stint %s", stint_id)
         else:
             logger.warning("Failed to post pitstop for stint %s", stint_id)
 
-    def _process_pitstop_update(self, task_data: dict):
-        pitstop_id = task_data.get("pitstop_id")
+    def _process_pitstop_update(self, task: Task):
+        pitstop_id = self._resolve(task.key)
         if not pitstop_id:
             logger.warning("Cannot update pitstop without ID")
             return
-        
-        pitstop: Optional[PitStop] = task_data["pitstop_obj"]
-        if not pitstop:
-            logger.warning("No pitstop object provided in task_data")
-            return
 
         logger.info("Updating pitstop %s", pitstop_id)
-        response = self.client.patch_pitstop(pitstop.to_patch_dict())
+        response = self.client.patch_pitstop(
+            pitstop_id, with_fields(task.body, pitstop_id=pitstop_id)
+        )
         if response is None:
             logger.warning("Failed to update pitstop %s", pitstop_id)
         else:
+            self._acknowledged(task)
             logger.info("Pitstop %s updated succesfully", pitstop_id)
@@ -0,0 +1,64 @@
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import Callable, Sequence
+from src.api.api_client import APIUnavailable
+
+logger = logging.getLogger(__name__)
+
+
+class LaneDispatcher:
+    """Runs jobs on named lanes: in order within a lane, lanes in parallel.
+
+    Each lane is a single-thread executor, so work for one entity keeps its
+    order while a slow endpoint only holds up its own lane. When a job raises
+    APIUnavailable the dispatcher is marked failed and every job still queued
+    on any lane is skipped, so nothing is sent out of order. The caller waits
+    for the lanes to go idle, then resets and resends from its outbox.
+    """
+
+    def __init__(self, lanes: Sequence[str]):
+        self.executors = {
+            lane: ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"api-{lane}")
+            for lane in lanes
+        }
+        self.failed = threading.Event()
+        self.pending: set[Future] = set()
+        self.lock = threading.Lock()
+
+    def submit(self, lane: str, job: Callable[..., None], *args) -> Future:
+        future = self.executors[lane].submit(self._run, job, *args)
+        with self.lock:
+            self.pending.add(future)
+        future.add_done_callback(self._done)
+        return future
+
+    def _run(self, job: Callable[..., None], *args):
+        if self.failed.is_set():
+            return
+        try:
+            job(*args)
+        except APIUnavailable as e:
+            logger.debug("Lane job failed, holding the rest: %s", e)
+            self.failed.set()
+
+    def _done(self, future: Future):
+        with self.lock:
+            self.pending.discard(future)
+
+    @property
+    def busy(self) -> bool:
+        with self.lock:
+            return bool(self.pending)
+
+    def wait(self, timeout: float = None):
+        with self.lock:
+            pending = list(self.pending)
+        wait(pending, timeout=timeout)
+
+    def reset(self):
+        self.failed.clear()
+
+    def shutdown(self):
+        for executor in self.executors.values():
+            executor.shutdown(wait=True)
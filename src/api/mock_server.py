@@ -0,0 +1,414 @@
+import argparse
+import gzip
+import json
+import logging
+import random
+import re
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def parse_latency(spec: str) -> Callable[[random.Random], float]:
+    """Latency distribution in seconds from a spec like "uniform:0.01,0.05".
+
+    fixed:S, uniform:LOW,HIGH, normal:MEAN,STDEV and lognormal:MU,SIGMA
+    (of the underlying normal, so lognormal:-3,0.5 is ~50ms with a long tail).
+    Negative samples are clamped to 0.
+    """
+    kind, _, args = spec.partition(":")
+    params = [float(arg) for arg in args.split(",") if arg]
+
+    distributions = {
+        "fixed": (1, lambda rng: params[0]),
+        "uniform": (2, lambda rng: rng.uniform(params[0], params[1])),
+        "normal": (2, lambda rng: rng.gauss(params[0], params[1])),
+        "lognormal": (2, lambda rng: rng.lognormvariate(params[0], params[1])),
+    }
+    if kind not in distributions:
+        raise ValueError(f"Unknown latency distribution: {kind}")
+
+    arity, sample = distributions[kind]
+    if len(params) != arity:
+        raise ValueError(f"{kind} latency takes {arity} parameters, got {spec!r}")
+    return lambda rng: max(0.0, sample(rng))
+
+
+@dataclass
+class Faults:
+    """What the mock backend gets wrong, and how often.
+
+    Rates are per request. `outages` are (start, end) windows in seconds
+    since the server started; `outage_mode` is "503" to answer with
+    Service Unavailable or "drop" to close the connection unanswered.
+    /health follows outages but nothing else, like a real health check.
+    """
+
+    latency: Optional[Callable[[random.Random], float]] = None
+    error_rate: float = 0.0
+    conflict_rate: float = 0.0
+    outages: list[tuple[float, float]] = field(default_factory=list)
+    outage_mode: str = "503"
+    bulk: bool = True
+    # answer a create whose local_id was seen before with the row it made
+    dedupe: bool = True
+    seed: Optional[int] = None
+
+
+@dataclass
+class RequestRecord:
+    time: float
+    method: str
+    path: str
+    status: Optional[int]
+    latency: float
+    bytes: int
+    gzip: bool
+    items: int
+
+
+ROUTES = [
+    ("GET", re.compile(r"^/health$"), "health"),
+    ("POST", re.compile(r"^/sessions$"), "post_session"),
+    ("GET", re.compile(r"^/sessions/(\d+)/stints/latest$"), "latest_stint"),
+    ("POST", re.compile(r"^/sessions/(\d+)/stints$"), "post_stint"),
+    ("PATCH", re.compile(r"^/stints/(\d+)$"), "patch_stint"),
+    ("POST", re.compile(r"^/stints/(\d+)/laps$"), "post_lap"),
+    ("POST", re.compile(r"^/stints/(\d+)/pitstops$"), "post_pitstop"),
+    ("PATCH", re.compile(r"^/pitstops/(\d+)$"), "patch_pitstop"),
+    ("POST", re.compile(r"^/(stints|laps|pitstops)/bulk$"), "bulk"),
+    ("PATCH", re.compile(r"^/(stints|pitstops)/bulk$"), "bulk"),
+]
+
+
+class MockBackend:
+    """In-process stand-in for the stint tracker backend.
+
+    Serves the routes APIClient uses (bulk ones too, unless turned off),
+    keeps what it's sent in memory, and records every request it receives.
+    A create resent with a local_id it has already seen gets the row it
+    made the first time, rather than a second one.
+    Faults are drawn from a seeded RNG, so a run can be repeated exactly.
+    Outages can be scheduled in Faults or switched by hand with
+    set_outage().
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, faults: Optional[Faults] = None):
+        self.faults = faults or Faults()
+        self.rng = random.Random(self.faults.seed)
+        self.lock = threading.Lock()
+
+        self.sessions: dict[int, dict] = {}
+        self.stints: dict[int, dict] = {}
+        self.laps: list[dict] = []
+        self.pitstops: dict[int, dict] = {}
+        # rows by (entity, local_id) of the create that made them
+        self.created: dict[tuple[str, str], dict] = {}
+        self.requests: list[RequestRecord] = []
+        self._next_id = 1
+        self._forced_outage: Optional[bool] = None
+
+        self.server = ThreadingHTTPServer((host, port), _Handler)
+        self.server.daemon_threads = True
+        self.server.backend = self
+        self.started = time.monotonic()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    def start(self) -> "MockBackend":
+        self.started = time.monotonic()
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def set_outage(self, down: Optional[bool]):
+        """Force an outage on or off; None goes back to the scheduled windows."""
+        self._forced_outage = down
+
+    def in_outage(self) -> bool:
+        if self._forced_outage is not None:
+            return self._forced_outage
+        elapsed = time.monotonic() - self.started
+        return any(start <= elapsed < end for start, end in self.faults.outages)
+
+    def stats(self) -> dict[str, Any]:
+        with self.lock:
+            records = list(self.requests)
+
+        by_status: dict[str, int] = {}
+        for record in records:
+            key = str(record.status) if record.status is not None else "dropped"
+            by_status[key] = by_status.get(key, 0) + 1
+
+        return {
+            "requests": len(records),
+            "items": sum(record.items for record in records if record.status == 200),
+            "bytes": sum(record.bytes for record in records),
+            "by_status": by_status,
+        }
+
+    # helpers for the handler, called with the lock held
+
+    def _new_id(self) -> int:
+        new_id = self._next_id
+        self._next_id += 1
+        return new_id
+
+    def _chance(self, rate: float) -> bool:
+        return rate > 0 and self.rng.random() < rate
+
+    def _existing(self, entity: str, data: dict) -> Optional[dict]:
+        local_id = data.get("local_id")
+        if not self.faults.dedupe or not local_id:
+            return None
+        return self.created.get((entity, local_id))
+
+    def _created(self, entity: str, row: dict) -> dict:
+        if row.get("local_id"):
+            self.created[(entity, row["local_id"])] = row
+        return row
+
+    def _create_stint(self, session_id: int, data: dict) -> tuple[int, Any]:
+        existing = self._existing("stints", data)
+        if existing is not None:
+            return 200, existing
+
+        number = data.get("number")
+        taken = any(
+            s["session_id"] == session_id and s.get("number") == number
+            for s in self.stints.values()
+        )
+        if taken or self._chance(self.faults.conflict_rate):
+            return 409, {"detail": "stint number taken"}
+
+        stint_id = self._new_id()
+        self.stints[stint_id] = {**data, "id": stint_id, "session_id": session_id}
+        return 200, self._created("stints", self.stints[stint_id])
+
+    def handle(self, action: str, args: tuple[str, ...], data: Any) -> tuple[int, Any]:
+        with self.lock:
+            if action == "health":
+                return 200, {"status": "ok"}
+
+            if action == "post_session":
+                self.sessions[data["id"]] = data
+                return 200, data
+
+            if action == "latest_stint":
+                session_id = int(args[0])
+                stints = [
+                    s for s in self.stints.values()
+                    if s["session_id"] == session_id and s.get("number") is not None
+                ]
+                if not stints:
+                    return 404, {"detail": "no stints"}
+                return 200, max(stints, key=lambda s: s["number"])
+
+            if action == "post_stint":
+                return self._create_stint(int(args[0]), data)
+
+            if action == "patch_stint":
+                stint = self.stints.get(int(args[0]))
+                if stint is None:
+                    return 404, {"detail": "stint not found"}
+                stint.update(data)
+                return 200, stint
+
+            if action == "post_lap":
+                existing = self._existing("laps", data)
+                if existing is not None:
+                    return 200, existing
+                lap = {**data, "stint_id": int(args[0]), "id": self._new_id()}
+                self.laps.append(lap)
+                return 200, self._created("laps", lap)
+
+            if action == "post_pitstop":
+                existing = self._existing("pitstops", data)
+                if existing is not None:
+                    return 200, existing
+                pitstop_id = self._new_id()
+                self.pitstops[pitstop_id] = {**data, "stint_id": int(args[0]), "id": pitstop_id}
+                return 200, self._created("pitstops", self.pitstops[pitstop_id])
+
+            if action == "patch_pitstop":
+                pitstop = self.pitstops.get(int(args[0]))
+                if pitstop is None:
+                    return 404, {"detail": "pitstop not found"}
+                pitstop.update(data)
+                return 200, pitstop
+
+        if action == "bulk":
+            return self._bulk(args[0], data)
+
+        return 404, {"detail": "not found"}
+
+    def _bulk(self, entity: str, items: list[dict]) -> tuple[int, Any]:
+        if not self.faults.bulk:
+            return 404, {"detail": "not found"}
+
+        results = []
+        for item in items:
+            if entity == "laps":
+                status, result = self.handle("post_lap", (str(item.get("stint_id")),), item)
+            elif entity == "stints" and "id" in item:
+                status, result = self.handle("patch_stint", (str(item["id"]),), item)
+            elif entity == "stints":
+                with self.lock:
+                    status, result = self._create_stint(item.get("session_id"), item)
+            elif "pitstop_id" in item:
+                status, result = self.handle("patch_pitstop", (str(item["pitstop_id"]),), item)
+            else:
+                status, result = self.handle("post_pitstop", (str(item.get("stint_id")),), item)
+            results.append(result if status == 200 else None)
+        return 200, results
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # buffered, so headers and body leave in one segment (no delayed-ACK stalls)
+    wbufsize = -1
+    # and replies bigger than the buffer aren't held back by Nagle either
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        logger.debug("%s - %s", self.address_string(), format % args)
+
+    def _dispatch(self):
+        backend: MockBackend = self.server.backend
+        start = time.monotonic()
+        raw = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        compressed = self.headers.get("Content-Encoding") == "gzip"
+        path = self.path.split("?", 1)[0]
+        status: Optional[int] = None
+        items = 0
+
+        try:
+            with backend.lock:
+                delay = backend.faults.latency(backend.rng) if backend.faults.latency else 0.0
+                down = backend.in_outage()
+                failed = not down and path != "/health" and backend._chance(backend.faults.error_rate)
+            if delay:
+                time.sleep(delay)
+
+            if down and backend.faults.outage_mode == "drop":
+                self.close_connection = True
+                return
+            if down or failed:
+                status = 503
+                self._reply(status, {"detail": "service unavailable"})
+                return
+
+            for method, pattern, action in ROUTES:
+                match = pattern.match(path)
+                if method == self.command and match:
+                    data = json.loads(gzip.decompress(raw) if compressed else raw) if raw else None
+                    if isinstance(data, list):
+                        items = len(data)
+                    elif data is not None:
+                        items = 1
+                    status, payload = backend.handle(action, match.groups(), data)
+                    self._reply(status, payload)
+                    return
+
+            status = 404
+            self._reply(status, {"detail": "not found"})
+        finally:
+            record = RequestRecord(
+                time=start - backend.started,
+                method=self.command,
+                path=path,
+                status=status,
+                latency=time.monotonic() - start,
+                bytes=len(raw),
+                gzip=compressed,
+                items=items,
+            )
+            with backend.lock:
+                backend.requests.append(record)
+
+    def _reply(self, status: int, payload: Any):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    do_GET = _dispatch
+    do_POST = _dispatch
+    do_PATCH = _dispatch
+
+
+def _parse_outage(spec: str) -> tuple[float, float]:
+    start, _, end = spec.partition(":")
+    return float(start), float(end)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m src.api.mock_server",
+        description="Local stand-in for the stint tracker backend.",
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--latency", type=parse_latency, help="e.g. fixed:0.02, uniform:0.01,0.1, lognormal:-3,0.5")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of requests answered with 503")
+    parser.add_argument("--conflict-rate", type=float, default=0.0, help="share of stint creates answered with 409")
+    parser.add_argument(
+        "--outage", type=_parse_outage, action="append", default=[], help="START:END seconds after start, repeatable"
+    )
+    parser.add_argument("--outage-mode", choices=("503", "drop"), default="503")
+    parser.add_argument("--no-bulk", action="store_true", help="answer bulk endpoints with 404")
+    parser.add_argument(
+        "--no-dedupe", action="store_true", help="create a new row for every create, even a resent one"
+    )
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--log", help="write every request to this NDJSON file on exit")
+    args = parser.parse_args(argv)
+
+    faults = Faults(
+        latency=args.latency,
+        error_rate=args.error_rate,
+        conflict_rate=args.conflict_rate,
+        outages=args.outage,
+        outage_mode=args.outage_mode,
+        bulk=not args.no_bulk,
+        dedupe=not args.no_dedupe,
+        seed=args.seed,
+    )
+    backend = MockBackend(args.host, args.port, faults).start()
+    print(f"Mock backend on {backend.url}")
+
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        backend.stop()
+
+    print(json.dumps(backend.stats()))
+    if args.log:
+        with open(args.log, "w", encoding="utf-8") as f:
+            for record in backend.requests:
+                f.write(json.dumps(asdict(record)) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+import sqlite3
+import threading
+import time
+from typing import Iterable, Optional
+from src.api.task_types import Task, TaskType, merge_patches
+
+# only carry changed fields, so a newer one can be merged into one still waiting
+MERGED_TYPES = (TaskType.STINT_UPDATE, TaskType.PITSTOP_UPDATE)
+
+
+class Outbox:
+    """Durable, ordered log of API tasks that haven't been confirmed yet.
+
+    Tasks are appended to a SQLite database in WAL mode with
+    synchronous=FULL. Each append or ack is a single transaction, so a batch
+    costs one fsync however many tasks it holds. Bodies are stored as the
+    bytes the producers encoded. Rows are deleted once the server confirms
+    them; until then they are read back, oldest first, a page at a time, so
+    memory stays bounded during long outages. An update for a stint or
+    pitstop that already has one waiting is merged into it, so an outage
+    holds one update per entity rather than one per lap.
+
+    Server ids from creates are kept against the local_id of the stint or
+    pitstop, so tasks replayed after a restart still resolve.
+    """
+
+    def __init__(self, path: str = ":memory:"):
+        self.path = path
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.lock = threading.Lock()
+        self.server_ids: dict[str, int] = {}
+
+        with self.conn:
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("PRAGMA synchronous=FULL")
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS tasks ("
+                "seq INTEGER PRIMARY KEY AUTOINCREMENT, "
+                "type TEXT NOT NULL, "
+                "key TEXT, "
+                "parent_key TEXT, "
+                "session_id INTEGER, "
+                "body BLOB NOT NULL, "
+                "created REAL, "
+                "trace_id TEXT)"
+            )
+            # outboxes from before these were stored
+            columns = {row[1] for row in self.conn.execute("PRAGMA table_info(tasks)")}
+            for column, column_type in (("created", "REAL"), ("trace_id", "TEXT")):
+                if column not in columns:
+                    self.conn.execute(f"ALTER TABLE tasks ADD COLUMN {column} {column_type}")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS tasks_key ON tasks (key)")
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS server_ids ("
+                "local_id TEXT PRIMARY KEY, "
+                "server_id INTEGER NOT NULL)"
+            )
+
+    def __len__(self) -> int:
+        with self.lock:
+            return self.conn.execute("SELECT COUNT(*) FROM tasks").fetchone()[0]
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+    def append(self, tasks: Iterable[Task], merge_after: int = 0) -> list[Task]:
+        """Add tasks in order; returns the updates merged into one already waiting.
+
+        Only rows past seq `merge_after` take merges, since the ones up to it
+        may already be on their way to the server. The merged row keeps its
+        place and creation time, and later fields win.
+        """
+        tasks = list(tasks)
+        if not tasks:
+            return []
+
+        merged = []
+        with self.lock, self.conn:
+            for task in tasks:
+                if task.type in MERGED_TYPES and task.key is not None:
+                    row = self.conn.execute(
+                        "SELECT seq, body FROM tasks WHERE key = ? AND type = ? AND seq > ? "
+                        "ORDER BY seq DESC LIMIT 1",
+                        (task.key, task.type.value, merge_after),
+                    ).fetchone()
+                    if row is not None:
+                        seq, body = row
+                        self.conn.execute(
+                            "UPDATE tasks SET body = ? WHERE seq = ?",
+                            (merge_patches(bytes(body), task.body), seq),
+                        )
+                        merged.append(task)
+                        continue
+
+                self.conn.execute(
+                    "INSERT INTO tasks (type, key, parent_key, session_id, body, created, trace_id) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        task.type.value,
+                        task.key,
+                        task.parent_key,
+                        task.session_id,
+                        task.body,
+                        task.created,
+                        task.trace_id,
+                    ),
+                )
+        return merged
+
+    def peek(self, limit: int, after: int = 0) -> list[tuple[int, Task]]:
+        """The oldest `limit` unacknowledged tasks past seq `after`, as (seq, task)."""
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT seq, type, key, parent_key, session_id, body, created, trace_id "
+                "FROM tasks WHERE seq > ? ORDER BY seq LIMIT ?",
+                (after, limit),
+            ).fetchall()
+
+        now = time.time()
+        return [
+            (
+                seq,
+                Task(
+                    TaskType(task_type),
+                    bytes(body),
+                    key,
+                    parent_key,
+                    session_id,
+                    created or now,
+                    trace_id,
+                ),
+            )
+            for seq, task_type, key, parent_key, session_id, body, created, trace_id in rows
+        ]
+
+    def oldest_age(self) -> float:
+        """Seconds the oldest unacknowledged task has been waiting; 0 when empty."""
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT created FROM tasks ORDER BY seq LIMIT 1"
+            ).fetchone()
+
+        if not row or row[0] is None:
+            return 0.0
+        return max(0.0, time.time() - row[0])
+
+    def record_id(self, local_id: str, server_id: int):
+        """Remember a server id; it's written with the next ack."""
+        with self.lock:
+            self.server_ids[local_id] = server_id
+            self.conn.execute(
+                "INSERT OR REPLACE INTO server_ids (local_id, server_id) VALUES (?, ?)",
+                (local_id, server_id),
+            )
+
+    def ack(self, seqs: Iterable[int]):
+        with self.lock, self.conn:
+            self.conn.executemany("DELETE FROM tasks WHERE seq = ?", [(seq,) for seq in seqs])
+
+    def pending(self, task_type: TaskType, key: Optional[str]) -> bool:
+        """Whether a task of this type for `key` is still waiting to be acknowledged."""
+        if key is None:
+            return False
+
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT 1 FROM tasks WHERE key = ? AND type = ? LIMIT 1", (key, task_type.value)
+            ).fetchone()
+        return row is not None
+
+    def server_id(self, local_id: Optional[str]) -> Optional[int]:
+        """Server id recorded for a local_id, if its create has gone through."""
+        if local_id is None:
+            return None
+
+        with self.lock:
+            if local_id in self.server_ids:
+                return self.server_ids[local_id]
+            row = self.conn.execute(
+                "SELECT server_id FROM server_ids WHERE local_id = ?", (local_id,)
+            ).fetchone()
+            if row:
+                self.server_ids[local_id] = row[0]
+        return row[0] if row else None
@@ -0,0 +1,106 @@
+import random
+import threading
+import time
+from dataclasses import dataclass
+from enum import Enum
+from typing import Callable
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """How often and how patiently a failed request is retried in place."""
+
+    attempts: int = 3
+    base_delay: float = 0.25
+    max_delay: float = 4.0
+
+    def delay(self, attempt: int) -> float:
+        """Full jitter: anywhere between 0 and the exponential cap for this attempt."""
+        return random.uniform(0.0, min(self.max_delay, self.base_delay * 2**attempt))
+
+
+class BreakerState(str, Enum):
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """Stops calls to a backend that keeps failing.
+
+    After `failure_threshold` failures in a row the breaker opens and
+    allow() refuses calls without touching the network. Once `reset_timeout`
+    has passed the next allow() runs `probe` (one cheap health check). If it
+    succeeds the breaker closes; if not it stays open and the wait doubles,
+    up to `max_reset_timeout`.
+    """
+
+    def __init__(
+        self,
+        probe: Callable[[], bool],
+        failure_threshold: int = 3,
+        reset_timeout: float = 2.0,
+        max_reset_timeout: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.probe = probe
+        self.failure_threshold = failure_threshold
+        self.base_reset_timeout = reset_timeout
+        self.max_reset_timeout = max_reset_timeout
+        self.clock = clock
+
+        self.state = BreakerState.CLOSED
+        self.failures = 0
+        self.reset_timeout = reset_timeout
+        self.opened_at = 0.0
+        self.lock = threading.Lock()
+
+    @property
+    def is_closed(self) -> bool:
+        return self.state == BreakerState.CLOSED
+
+    def allow(self) -> bool:
+        with self.lock:
+            if self.state == BreakerState.CLOSED:
+                return True
+            if self.state == BreakerState.HALF_OPEN:
+                # another caller is probing
+                return False
+            if self.clock() - self.opened_at < self.reset_timeout:
+                return False
+            self.state = BreakerState.HALF_OPEN
+
+        healthy = self.probe()
+
+        with self.lock:
+            if healthy:
+                self._close()
+            else:
+                self._open(backoff=True)
+        return healthy
+
+    def record_success(self):
+        with self.lock:
+            if self.state != BreakerState.CLOSED or self.failures:
+                self._close()
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            if self.state == BreakerState.CLOSED and self.failures >= self.failure_threshold:
+                self._open(backoff=False)
+
+    def trip(self):
+        with self.lock:
+            self._open(backoff=False)
+
+    def _close(self):
+        self.state = BreakerState.CLOSED
+        self.failures = 0
+        self.reset_timeout = self.base_reset_timeout
+
+    def _open(self, backoff: bool):
+        if backoff:
+            self.reset_timeout = min(self.reset_timeout * 2, self.max_reset_timeout)
+        self.state = BreakerState.OPEN
+        self.opened_at = self.clock()
@@ -0,0 +1,91 @@
+import time
+from collections import deque
+from dataclasses import replace
+from queue import Queue
+from typing import Optional
+from src.api.task_types import Task, TaskType, merge_patches
+from src.metrics.tracing import TRACER
+
+# task type -> (entity, is create)
+ENTITY_TASKS: dict[TaskType, tuple[str, bool]] = {
+    TaskType.STINT_CREATE: ("stint", True),
+    TaskType.STINT_UPDATE: ("stint", False),
+    TaskType.PITSTOP_CREATE: ("pitstop", True),
+    TaskType.PITSTOP_UPDATE: ("pitstop", False),
+}
+
+
+class TaskQueue(Queue):
+    """FIFO task queue that collapses superseded stint and pitstop writes.
+
+    Updates only carry the fields that changed, so a new update for an
+    entity that has one waiting is merged into it in the earlier slot (later
+    fields win). One whose create is still waiting is merged into the create
+    instead. Dropped puts don't count towards unfinished_tasks, so join()
+    still works.
+    """
+
+    def _init(self, maxsize: int):
+        # one-item lists, so a waiting task can be swapped without a scan
+        self.queue: deque[list[Optional[Task]]] = deque()
+        # (entity, local_id, is create) -> slot of the waiting task
+        self.pending: dict[tuple[str, str, bool], list[Optional[Task]]] = {}
+        self.collapsed: int = 0
+
+    def _qsize(self) -> int:
+        return len(self.queue)
+
+    def oldest_age(self) -> float:
+        """Seconds the task at the head of the queue has been waiting; 0 when empty."""
+        with self.mutex:
+            for slot in self.queue:
+                if slot[0] is not None:
+                    return max(0.0, time.time() - slot[0].created)
+        return 0.0
+
+    @staticmethod
+    def _entity_key(task: Optional[Task]) -> Optional[tuple[str, str, bool]]:
+        if task is None or task.key is None:
+            return None
+
+        spec = ENTITY_TASKS.get(task.type)
+        if spec is None:
+            return None
+
+        entity, is_create = spec
+        return entity, task.key, is_create
+
+    def _put(self, item: Optional[Task]):
+        key = self._entity_key(item)
+
+        if key is not None and not key[2]:
+            entity, local_id, _ = key
+            create_key = (entity, local_id, True)
+            slot = self.pending.get(create_key) or self.pending.get(key)
+
+            if slot is not None:
+                slot[0] = replace(slot[0], body=merge_patches(slot[0].body, item.body))
+                # the waiting task's trace carries on for both
+                TRACER.finish(item.trace_id, "collapsed")
+                self._drop()
+                return
+
+        slot = [item]
+        if key is not None:
+            self.pending[key] = slot
+        self.queue.append(slot)
+
+    def _drop(self):
+        # Queue.put() counts the item after _put() returns
+        self.unfinished_tasks -= 1
+        self.collapsed += 1
+
+    def _get(self) -> Optional[Task]:
+        slot = self.queue.popleft()
+        item = slot[0]
+
+        key = self._entity_key(item)
+        if key is not None and self.pending.get(key) is slot:
+            del self.pending[key]
+
+        return item
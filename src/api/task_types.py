@@ -1,5 +1,8 @@
+import json
+import time
+from dataclasses import dataclass, field
 from enum import Enum
-from typing import Any
+from typing import Any, Optional
 
 
 class TaskType(str, Enum):
@@ -11,8 +14,45 @@ class TaskType(str, Enum):
     PITSTOP_UPDATE = "PitstopUpdate"
 
 
-def get_task_dict(task_type: TaskType, data: Any) -> dict[str, Any]:
-    return {
-        "type": task_type.value,
-        "data": data,
-    }
+@dataclass(frozen=True)
+class Task:
+    """One backend write, snapshotted when it's queued.
+
+    `body` is the JSON object, encoded once on the producer's thread, so
+    later changes to the model can't leak into it. Server ids aren't known
+    at that point: `key` (local_id of the stint or pitstop being written)
+    and `parent_key` (the stint a lap or pitstop belongs to) are resolved
+    by the worker and set with with_fields() when it's sent.
+    `created` (wall clock) is kept through merges and the outbox, for the
+    age of the oldest waiting task, and so is `trace_id` (see Tracer).
+    """
+
+    type: TaskType
+    body: bytes
+    key: Optional[str] = None
+    parent_key: Optional[str] = None
+    session_id: Optional[int] = None
+    created: float = field(default_factory=time.time, compare=False)
+    trace_id: Optional[str] = field(default=None, compare=False)
+
+
+def encode_body(data: dict[str, Any]) -> bytes:
+    return json.dumps(data, separators=(",", ":"), default=str).encode()
+
+
+def merge_patches(first: bytes, second: bytes) -> bytes:
+    """Two encoded patches as one, fields in `second` winning.
+
+    Patches only carry changed fields, so a collapsed one has to keep the
+    fields of both.
+    """
+    return encode_body({**json.loads(first), **json.loads(second)})
+
+
+def with_fields(body: bytes, **fields: Any) -> bytes:
+    """An encoded body with `fields` set, replacing any placeholder already in it.
+
+    Decoded and encoded again rather than spliced, so a key never appears
+    twice (bodies carry the id fields as null until the worker knows them).
+    """
+    return encode_body({**json.loads(body), **fields})
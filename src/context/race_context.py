@@ -1,5 +1,11 @@
-from dataclasses import dataclass
-from typing import Optional
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Optional
+
+if TYPE_CHECKING:
+    from src.export.exporter import SessionExporter
+    from src.models.fuel import FuelSnapshot
+    from src.models.grid import GridCar
+    from src.telemetry.ring_buffer import TelemetryRingBuffer
 
 
 @dataclass
@@ -7,4 +13,17 @@ class RaceContext:
     session_id: Optional[int] = None
     car_id: Optional[int] = None
     stint_id: Optional[int] = None
+    # local_id of the current stint, set as soon as it starts
+    stint_key: Optional[str] = None
     user_name: Optional[str] = None
+    race_duration: Optional[float] = None
+    fuel: Optional["FuelSnapshot"] = None
+    history: Optional["TelemetryRingBuffer"] = None
+    exporter: Optional["SessionExporter"] = None
+    # server ids by local_id, filled in by the API worker as creates go through
+    server_ids: dict[str, int] = field(default_factory=dict)
+    # fields the server has acknowledged, by local_id, filled in by the API
+    # worker; each entry is replaced whole, never changed in place
+    synced_fields: dict[str, dict[str, Any]] = field(default_factory=dict)
+    # every other car in the session by CarIdx, kept by the GridManager
+    grid: dict[int, "GridCar"] = field(default_factory=dict)
@@ -1,15 +1,32 @@
-from queue import Queue
+from dataclasses import fields
+from typing import Optional, Sequence
 import threading
 from src.fsm.driver_fsm import DriverFSM
 from src.telemetry.iracing_client import IRacingClient
 from src.telemetry.telemetry_loop import TelemetryLoop
+from src.telemetry.recording import TelemetryRecorder
+from src.telemetry.ring_buffer import TelemetryRingBuffer
+from src.export.exporter import SessionExporter
 from src.api.api_client import APIClient
 from src.api.api_worker import APIWorker
+from src.api.task_queue import TaskQueue
+from src.api.outbox import Outbox
 from src.context.race_context import RaceContext
 from src.managers.session_manager import SessionManager
 from src.managers.stint_manager import StintManager
 from src.managers.pitstop_manager import PitstopManager
 from src.managers.lap_manager import LapManager
+from src.managers.fuel_manager import FuelManager
+from src.managers.grid_manager import GridManager
+from src.models.fuel import FuelSnapshot
+from src.metrics.registry import REGISTRY
+from src.metrics.profiler import SamplingProfiler
+from src.metrics.server import MetricsServer
+from src.metrics.tracing import TRACER
+
+# how long stop() waits for the telemetry loop to wind down (at most one
+# paced tick, plus whatever the managers still have to process)
+TELEMETRY_STOP_TIMEOUT = 10.0
 
 
 class AppEngine:
@@ -17,27 +34,72 @@ class AppEngine:
         self,
         user_name: str,
         api_base_url: str,
+        ir_client: Optional[IRacingClient] = None,
+        hz: int = 60,
+        record_path: Optional[str] = None,
+        history_seconds: float = 600.0,
+        outbox_path: str = "outbox.db",
+        export_dir: Optional[str] = None,
+        export_formats: Sequence[str] = ("ndjson",),
+        export_channels: Sequence[str] = (),
+        metrics_port: Optional[int] = None,
+        trace_path: Optional[str] = None,
+        trace_sample_rate: float = 1.0,
+        profile_path: Optional[str] = None,
     ):
         self.context = RaceContext(user_name=user_name)
-        self.queue = Queue()
+        TRACER.sample_rate = trace_sample_rate
+        # Chrome trace of the backend tasks, written on stop()
+        self.trace_path = trace_path
+        # hz=0 (unthrottled replay) still covers the same stretch of a 60 Hz session
+        self.context.history = TelemetryRingBuffer(history_seconds, hz or 60)
+        if export_dir:
+            self.context.exporter = SessionExporter(export_dir, export_formats, export_channels)
+        self.queue = TaskQueue()
         self.stop_event = threading.Event()
 
         self.api_client = APIClient(api_base_url)
-        self.api_worker = APIWorker(self.context, self.api_client, self.queue, self.stop_event)
+        self.outbox = Outbox(outbox_path)
+        self.api_worker = APIWorker(
+            self.context,
+            self.api_client,
+            self.queue,
+            self.stop_event,
+            outbox=self.outbox,
+        )
 
         self.fsm = DriverFSM()
         self.managers = [
             SessionManager(self.context, self.queue),
+            # ahead of StintManager: leaving pit road after a box stop, the
+            # pitstop is closed and exported against context.stint_key
+            # before StintManager starts the next stint and moves it on
+            PitstopManager(self.context, self.queue),
             StintManager(self.context, self.queue),
+            LapManager(self.context, self.queue),
+            FuelManager(self.context, self.queue),
+            GridManager(self.context, self.queue),
         ]
-        self.fsm.attach_managers(self.managers)
+        extra_fields = self.context.history.channels
+        if self.context.exporter is not None:
+            extra_fields += self.context.exporter.channels
+        self.fsm.attach_managers(self.managers, extra_fields=extra_fields)
 
         self.telemetry_loop = TelemetryLoop(
-            ir_client=IRacingClient(),
+            ir_client=ir_client or IRacingClient(),
             fsm=self.fsm,
             user_name=user_name,
+            hz=hz,
+            recorder=TelemetryRecorder(record_path) if record_path else None,
+            history=self.context.history,
+            exporter=self.context.exporter,
+            profiler=SamplingProfiler(profile_path) if profile_path else None,
         )
 
+        self._register_metrics()
+        # None leaves the metrics in process only (REGISTRY.snapshot())
+        self.metrics_server = MetricsServer(metrics_port) if metrics_port is not None else None
+
         self.api_thread = threading.Thread(
             target=self.api_worker.run, daemon=True
         )
@@ -45,7 +107,53 @@ class AppEngine:
             target=self.telemetry_loop.run, daemon=True
         )
 
+    def _register_metrics(self):
+        """Gauges read from this engine's parts when the metrics are collected."""
+        scheduler = self.telemetry_loop.scheduler
+        REGISTRY.gauge("queue_depth", "Tasks waiting in the in-memory queue.", fn=self.queue.qsize)
+        REGISTRY.gauge(
+            "queue_oldest_task_age_seconds",
+            "How long the task at the head of the queue has waited.",
+            fn=self.queue.oldest_age,
+        )
+        REGISTRY.gauge("outbox_depth", "Tasks not yet confirmed by the server.", fn=self.outbox.__len__)
+        REGISTRY.gauge(
+            "outbox_oldest_task_age_seconds",
+            "How long the oldest unconfirmed task has waited.",
+            fn=self.outbox.oldest_age,
+        )
+        REGISTRY.gauge(
+            "pipeline_depth",
+            "Sampled ticks waiting for the manager stage.",
+            fn=self.telemetry_loop.ring.__len__,
+        )
+        REGISTRY.gauge(
+            "telemetry_overruns",
+            "Ticks that ran past their deadline.",
+            fn=lambda: scheduler.overruns,
+        )
+        REGISTRY.gauge(
+            "telemetry_skipped_frames",
+            "Whole tick periods missed by overrunning ticks.",
+            fn=lambda: scheduler.skipped_frames,
+        )
+        REGISTRY.gauge(
+            "api_connected",
+            "1 while the API circuit breaker is closed.",
+            fn=lambda: self.api_client.is_connected,
+        )
+        fuel = REGISTRY.gauge(
+            "fuel",
+            "Fuel burn and fuel-to-finish figures as of the last lap, by stat; NaN until known.",
+            labelnames=("stat",),
+        )
+        for stat in (field.name for field in fields(FuelSnapshot)):
+            fuel.labels(stat).fn = lambda stat=stat: getattr(self.context.fuel, stat)
+
     def start(self):
+        if self.metrics_server:
+            self.metrics_server.start()
+
         print ("Starting API Worker")
         self.api_thread.start()
 
@@ -54,5 +162,16 @@ class AppEngine:
 
     def stop(self):
         print("Stopping engine")
+        # the loop closes the recorder, exporter and profiler on its way out,
+        # and its last tasks are queued before the API worker is told to stop
+        self.telemetry_loop.stop()
+        if self.telemetry_thread.is_alive():
+            self.telemetry_thread.join(timeout=TELEMETRY_STOP_TIMEOUT)
+            if self.telemetry_thread.is_alive():
+                print("Telemetry loop did not stop in time")
         self.stop_event.set()
-        self.api_thread.join(timeout=2)
\ No newline at end of file
+        self.api_thread.join(timeout=2)
+        if self.metrics_server:
+            self.metrics_server.stop()
+        if self.trace_path:
+            TRACER.export_chrome(self.trace_path)
\ No newline at end of file
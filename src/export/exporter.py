@@ -0,0 +1,258 @@
+import os
+from typing import Any, Optional, Sequence
+from src.export.writers import WRITERS, ColumnarWriter, Columns, RowWriter
+from src.models.lap import Lap
+from src.models.pitstop import PitStop
+from src.models.session import Session
+from src.models.stint import Stint
+from src.telemetry.tick import TickRecord
+
+TIME_CHANNEL = "SessionTime"
+
+SESSION_COLUMNS: Columns = {
+    "id": int,
+    "track": str,
+    "car_class": str,
+    "car": str,
+    "race_duration": float,
+    "session_date": str,
+}
+
+# stints, laps and pitstops are tied together by local_id, which exists
+# without a backend; server ids are filled in when the worker has them.
+# car_idx tells our own car's rows from the rest of the grid's
+STINT_COLUMNS: Columns = {
+    "stint_key": str,
+    "car_idx": int,
+    "id": int,
+    "session_id": int,
+    "number": int,
+    "driver_name": str,
+    "is_complete": bool,
+    "start_time": float,
+    "end_time": float,
+    "duration": float,
+    "start_position": int,
+    "end_position": int,
+    "start_incidents": int,
+    "end_incidents": int,
+    "incidents": int,
+    "start_fuel": float,
+    "end_fuel": float,
+    "fuel_used": float,
+}
+
+LAP_COLUMNS: Columns = {
+    "stint_key": str,
+    "car_idx": int,
+    "stint_id": int,
+    "number": int,
+    "time": float,
+}
+
+PITSTOP_COLUMNS: Columns = {
+    "pitstop_key": str,
+    "stint_key": str,
+    "car_idx": int,
+    "pitstop_id": int,
+    "stint_id": int,
+    "road_enter_time": float,
+    "service_start_time": float,
+    "service_end_time": float,
+    "road_exit_time": float,
+    "pit_duration": float,
+    "box_time": float,
+    "fuel_start_amount": float,
+    "fuel_end_amount": float,
+    "required_repair_time": float,
+    "optional_repair_time": float,
+    "start_fast_repairs": int,
+    "end_fast_repairs": int,
+    "repairs": bool,
+    "tire_change": bool,
+    "left_front": bool,
+    "right_front": bool,
+    "left_rear": bool,
+    "right_rear": bool,
+}
+
+# ticks come far more often than anything else, so they're batched harder
+TICK_BATCH_ROWS = 3600
+ENTITY_BATCH_ROWS = 32
+
+
+def session_row(session: Session) -> dict[str, Any]:
+    return session.to_dict()
+
+
+def stint_row(
+    stint: Stint, server_id: Optional[int] = None, car_idx: Optional[int] = None
+) -> dict[str, Any]:
+    return {
+        **stint.post_dict(),
+        **stint.patch_dict(),
+        "stint_key": stint.local_id,
+        "car_idx": car_idx,
+        "id": stint.id or server_id,
+        "duration": stint.duration,
+        "incidents": stint.incidents,
+        "fuel_used": stint.fuel_used,
+    }
+
+
+def lap_row(lap: Lap, stint_key: Optional[str], car_idx: Optional[int] = None) -> dict[str, Any]:
+    return {**lap.to_dict(), "stint_key": stint_key, "car_idx": car_idx}
+
+
+def pitstop_row(
+    pitstop: PitStop,
+    stint_key: Optional[str],
+    server_id: Optional[int] = None,
+    car_idx: Optional[int] = None,
+) -> dict[str, Any]:
+    return {
+        **pitstop.to_post_dict(),
+        **pitstop.to_patch_dict(),
+        "pitstop_key": pitstop.local_id,
+        "stint_key": stint_key,
+        "car_idx": car_idx,
+        "pitstop_id": pitstop.pitstop_id or server_id,
+        "pit_duration": pitstop.pit_duration,
+        "box_time": pitstop.box_time,
+        "required_repair_time": pitstop.required_repair_time,
+        "optional_repair_time": pitstop.optional_repair_time,
+        "start_fast_repairs": pitstop.start_fast_repairs,
+        "end_fast_repairs": pitstop.end_fast_repairs,
+        "left_front": pitstop.left_front,
+        "right_front": pitstop.right_front,
+        "left_rear": pitstop.left_rear,
+        "right_rear": pitstop.right_rear,
+    }
+
+
+class SessionExporter:
+    """Streams a session to files in `directory` while it's being driven.
+
+    Managers hand over each session, stint, lap and pitstop once it's
+    final, and the telemetry loop hands over ticks; every row is appended
+    straight away, one file per table and format (e.g. laps.ndjson,
+    laps.csv). Raw tick channels are only exported when `tick_channels`
+    are given, as float64, every `tick_every`-th tick. Nothing needs the
+    backend, and memory stays flat however long the race runs.
+
+    write_tick() is called from the telemetry reader and everything else
+    from the manager stage (see ManagerStage); each table is only written
+    from one of them, and close() runs once both have stopped.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        formats: Sequence[str] = ("ndjson",),
+        tick_channels: Sequence[str] = (),
+        tick_every: int = 1,
+    ):
+        unknown = set(formats) - set(WRITERS)
+        if unknown:
+            raise ValueError(f"Unknown export formats: {', '.join(sorted(unknown))}")
+
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.formats = tuple(formats)
+        self.tick_channels = tuple(name for name in tick_channels if name != TIME_CHANNEL)
+        self.tick_every = max(1, tick_every)
+
+        self._tables: dict[str, list[RowWriter]] = {
+            "sessions": self._open("sessions", SESSION_COLUMNS, ENTITY_BATCH_ROWS),
+            "stints": self._open("stints", STINT_COLUMNS, ENTITY_BATCH_ROWS),
+            "laps": self._open("laps", LAP_COLUMNS, ENTITY_BATCH_ROWS),
+            "pitstops": self._open("pitstops", PITSTOP_COLUMNS, ENTITY_BATCH_ROWS),
+        }
+        if self.tick_channels:
+            tick_columns = {name: float for name in (TIME_CHANNEL, *self.tick_channels)}
+            self._tables["ticks"] = self._open("ticks", tick_columns, TICK_BATCH_ROWS)
+
+        self._tick_count = 0
+        # tick field positions, resolved once per schema
+        self._tick_schema = None
+        self._tick_positions: tuple[int, ...] = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    @property
+    def channels(self) -> tuple[str, ...]:
+        """Tick fields the exporter reads, for TickSchema.for_managers(extra_fields=...)."""
+        return (TIME_CHANNEL, *self.tick_channels) if self.tick_channels else ()
+
+    def _open(self, table: str, columns: Columns, batch_rows: int) -> list[RowWriter]:
+        writers = []
+        for name in self.formats:
+            writer_cls = WRITERS[name]
+            path = os.path.join(self.directory, f"{table}.{writer_cls.extension}")
+            if issubclass(writer_cls, ColumnarWriter):
+                writers.append(writer_cls(path, columns, batch_rows=batch_rows))
+            else:
+                writers.append(writer_cls(path, columns))
+        return writers
+
+    def _write(self, table: str, row: dict[str, Any], flush: bool = True):
+        for writer in self._tables[table]:
+            writer.write(row)
+            # line based files are flushed per entity row so they survive a crash
+            if flush and not isinstance(writer, ColumnarWriter):
+                writer.flush()
+
+    def write_session(self, session: Session):
+        self._write("sessions", session_row(session))
+
+    def write_stint(
+        self, stint: Stint, server_id: Optional[int] = None, car_idx: Optional[int] = None
+    ):
+        self._write("stints", stint_row(stint, server_id, car_idx))
+
+    def write_lap(self, lap: Lap, stint_key: Optional[str] = None, car_idx: Optional[int] = None):
+        self._write("laps", lap_row(lap, stint_key, car_idx))
+
+    def write_pitstop(
+        self,
+        pitstop: PitStop,
+        stint_key: Optional[str] = None,
+        server_id: Optional[int] = None,
+        car_idx: Optional[int] = None,
+    ):
+        self._write("pitstops", pitstop_row(pitstop, stint_key, server_id, car_idx))
+
+    def write_tick(self, tick: TickRecord):
+        if not self.tick_channels:
+            return
+
+        self._tick_count += 1
+        if (self._tick_count - 1) % self.tick_every:
+            return
+
+        if tick.schema is not self._tick_schema:
+            self._tick_schema = tick.schema
+            self._tick_positions = tuple(tick.schema.index.get(name, -1) for name in self.channels)
+
+        values = tick.values
+        row = {}
+        for name, pos in zip(self.channels, self._tick_positions):
+            value = values[pos] if pos >= 0 else None
+            row[name] = float(value) if value is not None else None
+
+        self._write("ticks", row, flush=False)
+
+    def flush(self):
+        for writers in self._tables.values():
+            for writer in writers:
+                writer.flush()
+
+    def close(self):
+        for writers in self._tables.values():
+            for writer in writers:
+                writer.close()
+        self._tables = {}
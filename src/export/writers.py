@@ -0,0 +1,170 @@
+import csv
+import json
+from typing import Any, Mapping, Optional, TextIO
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc
+    import pyarrow.parquet as pq
+except ImportError:  # columnar formats are optional
+    pa = None
+    pq = None
+
+# table columns: name -> python type of its values (None is allowed for any)
+Columns = Mapping[str, type]
+
+
+class RowWriter:
+    """Appends rows of one table to a file as they come.
+
+    Nothing is held beyond the current batch, so memory doesn't grow with
+    the length of the session.
+    """
+
+    extension: str = ""
+
+    def __init__(self, path: str, columns: Columns):
+        self.path = path
+        self.columns = columns
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def write(self, row: Mapping[str, Any]):
+        raise NotImplementedError
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class NDJSONWriter(RowWriter):
+    """One JSON object per line."""
+
+    extension = "ndjson"
+
+    def __init__(self, path: str, columns: Columns):
+        super().__init__(path, columns)
+        self._file: Optional[TextIO] = open(path, "w", encoding="utf-8")
+
+    def write(self, row: Mapping[str, Any]):
+        self._file.write(json.dumps({name: row.get(name) for name in self.columns}, default=str))
+        self._file.write("\n")
+
+    def flush(self):
+        self._file.flush()
+
+    def close(self):
+        if self._file:
+            self._file.close()
+            self._file = None
+
+
+class CSVWriter(RowWriter):
+    """Comma separated with a header row; None is written as an empty field."""
+
+    extension = "csv"
+
+    def __init__(self, path: str, columns: Columns):
+        super().__init__(path, columns)
+        self._file: Optional[TextIO] = open(path, "w", encoding="utf-8", newline="")
+        self._writer = csv.DictWriter(self._file, fieldnames=list(columns), extrasaction="ignore")
+        self._writer.writeheader()
+
+    def write(self, row: Mapping[str, Any]):
+        self._writer.writerow(row)
+
+    def flush(self):
+        self._file.flush()
+
+    def close(self):
+        if self._file:
+            self._file.close()
+            self._file = None
+
+
+ARROW_TYPES = {
+    bool: "bool_",
+    int: "int64",
+    float: "float64",
+    str: "string",
+}
+
+
+class ColumnarWriter(RowWriter):
+    """Buffers up to `batch_rows` rows and writes them as one record batch.
+
+    Needs pyarrow. Arrow IPC streams can be read up to the last batch even
+    if the app dies mid-race; Parquet files are only valid once closed.
+    """
+
+    def __init__(self, path: str, columns: Columns, batch_rows: int = 1024):
+        if pa is None:
+            raise RuntimeError(f"pyarrow is required to export {self.extension} files")
+
+        super().__init__(path, columns)
+        self.batch_rows = batch_rows
+        self.schema = pa.schema(
+            [(name, getattr(pa, ARROW_TYPES[kind])()) for name, kind in columns.items()]
+        )
+        self._rows: list[Mapping[str, Any]] = []
+        self._writer = self._open()
+
+    def _open(self):
+        raise NotImplementedError
+
+    def _write_batch(self, batch: "pa.RecordBatch"):
+        raise NotImplementedError
+
+    def write(self, row: Mapping[str, Any]):
+        self._rows.append(row)
+        if len(self._rows) >= self.batch_rows:
+            self.flush()
+
+    def flush(self):
+        if self._rows:
+            self._write_batch(pa.RecordBatch.from_pylist(self._rows, schema=self.schema))
+            self._rows = []
+
+    def close(self):
+        if self._writer is not None:
+            self.flush()
+            self._writer.close()
+            self._writer = None
+
+
+class ArrowWriter(ColumnarWriter):
+    """Arrow IPC stream format."""
+
+    extension = "arrows"
+
+    def _open(self):
+        return pa.ipc.new_stream(self.path, self.schema)
+
+    def _write_batch(self, batch: "pa.RecordBatch"):
+        self._writer.write_batch(batch)
+
+
+class ParquetWriter(ColumnarWriter):
+    """Parquet, one row group per batch."""
+
+    extension = "parquet"
+
+    def _open(self):
+        return pq.ParquetWriter(self.path, self.schema)
+
+    def _write_batch(self, batch: "pa.RecordBatch"):
+        self._writer.write_table(pa.Table.from_batches([batch]))
+
+
+WRITERS: dict[str, type[RowWriter]] = {
+    "ndjson": NDJSONWriter,
+    "csv": CSVWriter,
+    "arrow": ArrowWriter,
+    "parquet": ParquetWriter,
+}
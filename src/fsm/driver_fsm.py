@@ -1,7 +1,10 @@
-from typing import Optional
-from transitions import Machine, EventData
+from functools import partial
+from typing import Any, Callable, Mapping, NamedTuple, Optional, Sequence, Union
+from src.fsm.events import Events
 from src.fsm.states import States
 from src.managers.base_manager import BaseManager
+from src.metrics.registry import REGISTRY
+from src.telemetry.tick import TickSchema
 
 
 TRANSITIONS = [
@@ -41,25 +44,159 @@ TRANSITIONS = [
     ],
 ]
 
+# trigger names in the order they first appear; a trigger's id is its index
+TRIGGERS: tuple[str, ...] = tuple(dict.fromkeys(t[0] for t in TRANSITIONS))
+TRIGGER_IDS: dict[str, int] = {name: i for i, name in enumerate(TRIGGERS)}
+
+STATE_LIST: tuple[States, ...] = tuple(States)
+STATE_INDEX: dict[States, int] = {state: i for i, state in enumerate(STATE_LIST)}
+
+TRANSITION_COUNT = REGISTRY.counter(
+    "fsm_transitions_total",
+    "DriverFSM transitions, by event and destination state.",
+    labelnames=("event", "dest"),
+)
+
+
+class InvalidTransition(Exception):
+    """Raised when an event is triggered in a state it has no transition from."""
+
+
+class Transition(NamedTuple):
+    """What callbacks receive: the trigger that fired and the states it went between."""
+
+    event: str
+    source: States
+    dest: States
+
+
+class _Compiled(NamedTuple):
+    transition: Transition
+    dest_index: int
+    prepare: tuple[Callable[[Transition], None], ...]
+    conditions: tuple[Callable[[Transition], bool], ...]
+    unless: tuple[Callable[[Transition], bool], ...]
+    # `before`, then on_exit_<source>, before the state changes
+    exit: tuple[Callable[[Transition], None], ...]
+    # on_enter_<dest>, then `after`
+    enter: tuple[Callable[[Transition], None], ...]
+    count: Any
+
+
+def _names(spec: Union[None, str, Sequence[str]]) -> tuple[str, ...]:
+    if spec is None:
+        return ()
+    if isinstance(spec, str):
+        return (spec,)
+    return tuple(spec)
+
 
 class DriverFSM(object):
+    """Driver state machine over TRANSITIONS, dispatched from a precompiled table.
+
+    Entries use the positional format of transitions.Machine: [event,
+    source(s) or "*", dest, conditions, unless, before, after, prepare],
+    where the last five are optional method names. Each event becomes a
+    method (fsm.enter_pit_road()). Triggering runs `prepare`, checks the
+    conditions, then runs `before` and on_exit_<SOURCE>, changes state, and
+    runs on_enter_<DEST> and `after`, each called with the Transition, the
+    same order Machine used. It returns False if a condition held it back
+    and raises InvalidTransition if there's no transition from the current
+    state.
+
+    The table is indexed [trigger id][state index] and built once, with the
+    callbacks already bound, so a trigger does no lookups by name. Managers
+    get the broadcasts they declare in `event_handlers`, from per-event
+    subscriber lists built by attach_managers().
+    """
 
     state: States
-    set_state: callable
-    last_telem: dict[str, any]
+    last_telem: Mapping[str, Any]
 
     def __init__(self):
-        self.machine = Machine(
-            model=self,
-            states=States,
-            transitions=TRANSITIONS,
-            initial=States.DISCONNECTED,
-            send_event=True,
-        )
+        self.state: States = States.DISCONNECTED
+        self._state_index: int = STATE_INDEX[self.state]
+        self._table = self._compile(TRANSITIONS)
 
         self.last_state: Optional[States] = None
+        # the transition being dispatched, for managers still using handle_event()
+        self.transition: Optional[Transition] = None
         self.managers: list[BaseManager] = []
+        self.subscribers: list[tuple[Callable[[], None], ...]] = [() for _ in Events]
         self.required_fields: set[str] = set()
+        self.tick_schema: TickSchema = TickSchema.for_managers([])
+
+    def _compile(self, transitions: list) -> list[list[tuple[_Compiled, ...]]]:
+        table: list[list[list[_Compiled]]] = [[[] for _ in STATE_LIST] for _ in TRIGGERS]
+
+        for spec in transitions:
+            event, sources, dest = spec[:3]
+            conditions, unless, before, after, prepare = (list(spec[3:]) + [None] * 5)[:5]
+
+            if sources == "*":
+                sources = STATE_LIST
+            elif isinstance(sources, States):
+                sources = (sources,)
+
+            for source in sources:
+                exit_cb = getattr(self, f"on_exit_{source.name}", None)
+                enter_cb = getattr(self, f"on_enter_{dest.name}", None)
+                before_cbs = tuple(getattr(self, name) for name in _names(before))
+                after_cbs = tuple(getattr(self, name) for name in _names(after))
+
+                table[TRIGGER_IDS[event]][STATE_INDEX[source]].append(
+                    _Compiled(
+                        transition=Transition(event, source, dest),
+                        dest_index=STATE_INDEX[dest],
+                        prepare=tuple(getattr(self, name) for name in _names(prepare)),
+                        conditions=tuple(getattr(self, name) for name in _names(conditions)),
+                        unless=tuple(getattr(self, name) for name in _names(unless)),
+                        exit=before_cbs + ((exit_cb,) if exit_cb else ()),
+                        enter=((enter_cb,) if enter_cb else ()) + after_cbs,
+                        count=TRANSITION_COUNT.labels(event, dest.name),
+                    )
+                )
+
+        return [[tuple(cell) for cell in row] for row in table]
+
+    def trigger(self, event: Union[str, int]) -> bool:
+        """Fire a trigger by name or id."""
+        trigger_id = TRIGGER_IDS[event] if isinstance(event, str) else event
+        candidates = self._table[trigger_id][self._state_index]
+        if not candidates:
+            raise InvalidTransition(
+                f"Can't trigger event {TRIGGERS[trigger_id]} from state {self.state.name}"
+            )
+
+        for compiled in candidates:
+            transition = compiled.transition
+            for callback in compiled.prepare:
+                callback(transition)
+            if (compiled.conditions or compiled.unless) and not self._allowed(compiled):
+                continue
+
+            for callback in compiled.exit:
+                callback(transition)
+            self.state = transition.dest
+            self._state_index = compiled.dest_index
+            for callback in compiled.enter:
+                callback(transition)
+            compiled.count.inc()
+            return True
+
+        return False
+
+    @staticmethod
+    def _allowed(compiled: _Compiled) -> bool:
+        transition = compiled.transition
+        return all(condition(transition) for condition in compiled.conditions) and not any(
+            condition(transition) for condition in compiled.unless
+        )
+
+    def set_state(self, state: States):
+        """Jump to a state without running any callbacks."""
+        self.state = state
+        self._state_index = STATE_INDEX[state]
 
     def save_state(self):
         if self.state != States.DISCONNECTED:
@@ -71,50 +208,85 @@ class DriverFSM(object):
         else:
             self.set_state(States.IDLE)
 
-    def attach_managers(self, managers: list[BaseManager]):
+    def attach_managers(self, managers: list[BaseManager], extra_fields: Sequence[str] = ()):
         self.managers = managers
         self.required_fields = set()
 
         for m in self.managers:
             self.required_fields.update(m.required_fields.keys())
 
-    def _broadcast(self, event_name: str, event: EventData):
+        # extra_fields are read every tick for non-manager consumers (history)
+        self.tick_schema = TickSchema.for_managers(self.managers, extra_fields)
+        for m in self.managers:
+            m.bind_schema(self.tick_schema)
+
+        subscribers: list[list[Callable[[], None]]] = [[] for _ in Events]
+        for m in self.managers:
+            if type(m).handle_event is not BaseManager.handle_event:
+                # dispatches on event names itself, so it's sent everything
+                for event in Events:
+                    subscribers[event].append(partial(self._deliver, m, event.event_name))
+            else:
+                for event, method in m.event_handlers.items():
+                    subscribers[event].append(getattr(m, method))
+        self.subscribers = [tuple(handlers) for handlers in subscribers]
+
+    def _deliver(self, manager: BaseManager, event_name: str):
+        transition = self.transition
+        # state names, as transitions.Machine passed them
         ctx = {
-            "source": event.transition.source,
-            "dest": event.transition.dest,
-            "event": event.event.name,
+            "source": transition.source.name,
+            "dest": transition.dest.name,
+            "event": transition.event,
         }
+        manager.handle_event(event_name, self.last_telem, ctx)
 
-        for m in self.managers:
-            m.handle_event(event_name, self.last_telem, ctx)
+    def _broadcast(self, event: Events, transition: Transition):
+        self.transition = transition
+        for handler in self.subscribers[event]:
+            handler()
 
     # state based callbacks
 
-    def on_enter_ON_PIT_ROAD(self, event: EventData):
-        self._broadcast("enter_pit_road", event)
+    def on_enter_ON_PIT_ROAD(self, transition: Transition):
+        self._broadcast(Events.ENTER_PIT_ROAD, transition)
 
-    def on_exit_ON_PIT_ROAD(self, event: EventData):
-        self._broadcast("exit_pit_road", event)
+    def on_exit_ON_PIT_ROAD(self, transition: Transition):
+        self._broadcast(Events.EXIT_PIT_ROAD, transition)
 
-    def on_enter_IN_PIT_BOX(self, event: EventData):
-        self._broadcast("enter_pit_box", event)
+    def on_enter_IN_PIT_BOX(self, transition: Transition):
+        self._broadcast(Events.ENTER_PIT_BOX, transition)
 
-    def on_exit_IN_PIT_BOX(self, event: EventData):
-        self._broadcast("exit_pit_box", event)
+    def on_exit_IN_PIT_BOX(self, transition: Transition):
+        self._broadcast(Events.EXIT_PIT_BOX, transition)
 
-    def on_enter_FINISHED(self, event: EventData):
-        self._broadcast("finished", event)
+    def on_enter_FINISHED(self, transition: Transition):
+        self._broadcast(Events.FINISHED, transition)
 
-    def on_enter_DISCONNECTED(self, event: EventData):
-        self._broadcast("disconnected", event)
+    def on_enter_DISCONNECTED(self, transition: Transition):
+        self._broadcast(Events.DISCONNECTED, transition)
 
     # event based callbacks
 
-    def _on_session_start(self, event: EventData):
-        self._broadcast("session_start", event)
+    def _on_session_start(self, transition: Transition):
+        self._broadcast(Events.SESSION_START, transition)
+
+    def _on_driver_swap_in(self, transition: Transition):
+        self._broadcast(Events.DRIVER_SWAP_IN, transition)
+
+    def _on_driver_swap_out(self, transition: Transition):
+        self._broadcast(Events.DRIVER_SWAP_OUT, transition)
+
+
+def _trigger_method(name: str, trigger_id: int) -> Callable[[DriverFSM], bool]:
+    def trigger(self: DriverFSM) -> bool:
+        return self.trigger(trigger_id)
+
+    trigger.__name__ = name
+    trigger.__doc__ = f"Trigger {name}."
+    return trigger
 
-    def _on_driver_swap_in(self, event: EventData):
-        self._broadcast("driver_swap_in", event)
 
-    def _on_driver_swap_out(self, event: EventData):
-        self._broadcast("driver_swap_out", event)
+# fsm.connect(), fsm.enter_pit_road(), ...
+for _trigger_id, _name in enumerate(TRIGGERS):
+    setattr(DriverFSM, _name, _trigger_method(_name, _trigger_id))
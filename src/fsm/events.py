@@ -0,0 +1,20 @@
+from enum import IntEnum
+
+
+class Events(IntEnum):
+    """Events the FSM broadcasts to managers; the ids index its subscriber lists"""
+
+    SESSION_START = 0
+    ENTER_PIT_ROAD = 1
+    EXIT_PIT_ROAD = 2
+    ENTER_PIT_BOX = 3
+    EXIT_PIT_BOX = 4
+    DRIVER_SWAP_IN = 5
+    DRIVER_SWAP_OUT = 6
+    FINISHED = 7
+    DISCONNECTED = 8
+
+    @property
+    def event_name(self) -> str:
+        """The name handle_event() receives, e.g. "enter_pit_road"."""
+        return self.name.lower()
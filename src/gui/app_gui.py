@@ -3,15 +3,17 @@ from tkinter import ttk
 
 
 class StintTrackerGUI:
-    def __init__(self, client, manager, stop_event, driver_name):
+    def __init__(self, client, manager, stop_event, driver_name, context=None):
         """
         Args:
             client: APIClient instance (backend)
             manager: SessionManager instance (backend)
             stop_event: threading.Event used to signal shutdown
             driver_name: string, name of the driver to display
+            context: RaceContext to read fuel numbers from (optional)
         """
         self.client = client
+        self.context = context
         self.manager = manager
         self.stop_event = stop_event
         self.driver_name = driver_name
@@ -19,7 +21,7 @@ class StintTrackerGUI:
         # Tkinter root
         self.root = tk.Tk()
         self.root.title(f"PDR Stint Logger - {self.driver_name}")
-        self.root.geometry("400x175")
+        self.root.geometry("400x200")
         self.root.resizable(False, False)
         self.root.configure(bg="#2b2b2b")
         self.root.protocol("WM_DELETE_WINDOW", self.on_close)
@@ -77,6 +79,16 @@ class StintTrackerGUI:
         )
         self.status_label.pack(expand=True)
 
+        # Fuel line, filled in once laps are being counted
+        self.fuel_label = tk.Label(
+            self.root,
+            text="",
+            font=("Arial", 11),
+            fg="white",
+            bg="#2b2b2b",
+        )
+        self.fuel_label.pack(pady=(0, 10))
+
     # ---------------- GUI update loop ----------------
     def update_status(self):
         """Poll backend threads for connection state and update indicators"""
@@ -101,12 +113,26 @@ class StintTrackerGUI:
         else:
             self.status_label.config(text="Waiting for connections...")
 
-        
+        self.update_fuel()
 
         # Schedule next update
         if not self.stop_event.is_set():
             self.root.after(500, self.update_status)
 
+    def update_fuel(self):
+        """Show the latest fuel snapshot, published once per lap"""
+        fuel = getattr(self.context, "fuel", None)
+        if fuel is None or fuel.rolling_avg is None:
+            self.fuel_label.config(text="")
+            return
+
+        text = f"Fuel/lap: {fuel.rolling_avg:.2f}"
+        if fuel.laps_in_tank is not None:
+            text += f"  Laps left: {fuel.laps_in_tank:.1f}"
+        if fuel.fuel_to_add is not None:
+            text += f"  To add: {fuel.fuel_to_add:.1f}"
+        self.fuel_label.config(text=text)
+
     # ---------------- Shutdown ----------------
     def on_close(self):
         """Called when user closes the window"""
@@ -2,6 +2,22 @@ import time
 import os
 from dotenv import load_dotenv
 from src.engine import AppEngine
+from src.telemetry.ibt_client import IBTClient
+from src.telemetry.replay_client import ReplayClient
+
+
+def get_telemetry_source():
+    """Offline sources run the loop unthrottled; IBT_SPEED paces .ibt playback (1 = real time)."""
+    replay_path = os.getenv("REPLAY_PATH")
+    if replay_path:
+        return ReplayClient(replay_path), 0
+
+    ibt_path = os.getenv("IBT_PATH")
+    if ibt_path:
+        speed = os.getenv("IBT_SPEED")
+        return IBTClient(ibt_path, speed=float(speed) if speed else None), 0
+
+    return None, 60
 
 
 def main():
@@ -9,7 +25,27 @@ def main():
     api_url = os.getenv("TEST_URL")
     user_name = "Kam Wilson"
 
-    engine = AppEngine(user_name=user_name, api_base_url=api_url)
+    ir_client, hz = get_telemetry_source()
+    export_formats = os.getenv("EXPORT_FORMATS", "ndjson")
+    export_channels = os.getenv("EXPORT_CHANNELS", "")
+    metrics_port = os.getenv("METRICS_PORT")
+    trace_sample_rate = os.getenv("TRACE_SAMPLE_RATE")
+
+    engine = AppEngine(
+        user_name=user_name,
+        api_base_url=api_url,
+        ir_client=ir_client,
+        hz=hz,
+        record_path=os.getenv("RECORD_PATH"),
+        outbox_path=os.getenv("OUTBOX_PATH", "outbox.db"),
+        export_dir=os.getenv("EXPORT_DIR"),
+        export_formats=[name for name in export_formats.split(",") if name],
+        export_channels=[name for name in export_channels.split(",") if name],
+        metrics_port=int(metrics_port) if metrics_port else None,
+        trace_path=os.getenv("TRACE_PATH"),
+        trace_sample_rate=float(trace_sample_rate) if trace_sample_rate else 1.0,
+        profile_path=os.getenv("PROFILE_PATH"),
+    )
 
     engine.start()
 
@@ -1,12 +1,21 @@
 from queue import Queue
-from typing import Any
+from typing import Any, Mapping, Optional
+from src.fsm.events import Events
 from src.fsm.states import States
 from src.context.race_context import RaceContext
-from src.api.task_types import get_task_dict, TaskType
+from src.api.task_types import Task, TaskType, encode_body
+from src.metrics.tracing import TRACER
+from src.telemetry.tick import TickRecord, TickSchema
 
 
 class BaseManager:
     required_fields: dict[str, str] = {}
+    # FSM event -> name of the method handling it; the FSM only sends these
+    event_handlers: dict[Events, str] = {}
+
+    # (bit, position, attribute) per required field, resolved by bind_schema()
+    tick_slots: tuple[tuple[int, int, str], ...] = ()
+    tick_mask: int = 0
 
     def __init__(self, context: RaceContext, queue: Queue):
         self.context = context
@@ -15,12 +24,42 @@ class BaseManager:
         for attr in self.required_fields.values():
             setattr(self, attr, None)
 
-    def handle_event(self, event: str, telem: dict[str, Any], ctx: dict[str, Any]):
-        pass
+    def bind_schema(self, schema: TickSchema):
+        self.tick_slots = tuple(
+            (1 << schema.index[key], schema.index[key], attr)
+            for key, attr in self.required_fields.items()
+        )
+        self.tick_mask = 0
+        for bit, _, _ in self.tick_slots:
+            self.tick_mask |= bit
+
+    def handle_event(self, event: str, telem: Mapping[str, Any], ctx: dict[str, Any]):
+        """Deliver an event by name. The FSM calls the declared handlers directly;
+        subclasses overriding this instead are sent every event."""
+        try:
+            method = self.event_handlers.get(Events[event.upper()])
+        except KeyError:
+            return
+        if method:
+            getattr(self, method)()
 
-    def on_tick(self, telem: dict[str, Any], state: States):
-        for telem_key, attr_name in self.required_fields.items():
-            setattr(self, attr_name, telem[telem_key])
+    def on_tick(self, telem: TickRecord, state: States):
+        # only copy the subscribed fields that changed since the last tick
+        values = telem.values
+        changed = telem.changed
+        for bit, idx, attr_name in self.tick_slots:
+            if changed & bit:
+                setattr(self, attr_name, values[idx])
 
-    def _send_data(self, task: TaskType, data: any):
-        self.queue.put(get_task_dict(task, data))
+    def _send_data(
+        self,
+        task: TaskType,
+        data: dict[str, Any],
+        key: Optional[str] = None,
+        parent_key: Optional[str] = None,
+        session_id: Optional[int] = None,
+    ):
+        trace_id = TRACER.start(task.value)
+        # encoded here, so the task is a snapshot of the model as it is now
+        self.queue.put(Task(task, encode_body(data), key, parent_key, session_id, trace_id=trace_id))
+        TRACER.mark(trace_id, "enqueue")
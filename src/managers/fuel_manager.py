@@ -0,0 +1,204 @@
+import math
+from bisect import bisect_left, insort
+from collections import deque
+from queue import Queue
+from typing import Optional
+from src.fsm.events import Events
+from src.managers.base_manager import BaseManager
+from src.context.race_context import RaceContext
+from src.models.fuel import FuelSnapshot
+from src.telemetry.tick import TickRecord
+
+
+class LapWindow:
+    """Last `size` per-lap samples with a running sum and a sorted copy.
+
+    The window is bounded, so adding a lap costs the same however long the
+    race runs, and mean/percentile reads never walk the lap history.
+    """
+
+    def __init__(self, size: int):
+        self.samples: deque[float] = deque(maxlen=size)
+        self.ordered: list[float] = []
+        self.total: float = 0.0
+
+    def __len__(self) -> int:
+        return len(self.samples)
+
+    def clear(self):
+        self.samples.clear()
+        self.ordered.clear()
+        self.total = 0.0
+
+    def add(self, value: float):
+        if len(self.samples) == self.samples.maxlen:
+            oldest = self.samples[0]
+            self.total -= oldest
+            del self.ordered[bisect_left(self.ordered, oldest)]
+
+        self.samples.append(value)
+        self.total += value
+        insort(self.ordered, value)
+
+    @property
+    def last(self) -> Optional[float]:
+        return self.samples[-1] if self.samples else None
+
+    @property
+    def mean(self) -> Optional[float]:
+        return self.total / len(self.samples) if self.samples else None
+
+    def percentile(self, q: float) -> Optional[float]:
+        """Linear interpolation between the closest ranks, q in [0, 100]."""
+        if not self.ordered:
+            return None
+
+        pos = (len(self.ordered) - 1) * q / 100.0
+        lo = math.floor(pos)
+        hi = min(lo + 1, len(self.ordered) - 1)
+        return self.ordered[lo] + (self.ordered[hi] - self.ordered[lo]) * (pos - lo)
+
+
+class FuelManager(BaseManager):
+    """Per-lap fuel burn for the current stint and fuel-to-finish projections.
+
+    Each completed lap updates the stats once and publishes a fresh
+    FuelSnapshot to context.fuel, for the GUI and the fuel metrics to read. Laps that touch
+    pit road are left out of the burn and lap time figures.
+    """
+
+    required_fields = {
+        "SessionTime": "session_time",
+        "FuelLevel": "fuel_level",
+        "LapCompleted": "lap_completed",
+        "LapLastLapTime": "last_lap_time",
+        "OnPitRoad": "on_pit_road",
+    }
+    event_handlers = {
+        Events.SESSION_START: "_handle_session_start",
+        Events.ENTER_PIT_ROAD: "_handle_enter_pit_road",
+        Events.ENTER_PIT_BOX: "_end_stint",
+    }
+
+    session_time: Optional[float]
+    fuel_level: Optional[float]
+    lap_completed: Optional[int]
+    last_lap_time: Optional[float]
+    on_pit_road: Optional[bool]
+
+    def __init__(self, context: RaceContext, queue: Queue, window: int = 10):
+        super().__init__(context, queue)
+        self.burn = LapWindow(window)
+        self.lap_times = LapWindow(window)
+
+        self.race_start_time: Optional[float] = None
+        self.last_lap_completed: Optional[int] = None
+        self.lap_start_fuel: Optional[float] = None
+        self.lap_start_time: Optional[float] = None
+        self.pitted_this_lap = False
+
+        self.stint_laps = 0
+        self.stint_fuel = 0.0
+        self.prev_stint_avg: Optional[float] = None
+
+    def on_tick(self, telem: TickRecord, state):
+        super().on_tick(telem, state)
+
+        self._check_for_new_lap()
+
+    def _handle_enter_pit_road(self):
+        self.pitted_this_lap = True
+
+    def _handle_session_start(self):
+        self.race_start_time = self.session_time
+        self.prev_stint_avg = None
+        self.lap_times.clear()
+        self._end_stint()
+
+    def _end_stint(self):
+        if self.stint_laps:
+            self.prev_stint_avg = self.stint_fuel / self.stint_laps
+
+        self.burn.clear()
+        self.stint_laps = 0
+        self.stint_fuel = 0.0
+        self._publish()
+
+    def _check_for_new_lap(self):
+        if self.lap_completed is None or self.fuel_level is None:
+            return
+
+        if self.last_lap_completed is None or self.lap_completed < self.last_lap_completed:
+            self._start_lap()
+            return
+
+        laps = self.lap_completed - self.last_lap_completed
+        if laps <= 0:
+            return
+
+        burn = (self.lap_start_fuel - self.fuel_level) / laps
+
+        if self.last_lap_time and self.last_lap_time > 0.0:
+            lap_time = self.last_lap_time
+        elif self.session_time is not None and self.lap_start_time is not None:
+            lap_time = (self.session_time - self.lap_start_time) / laps
+        else:
+            lap_time = None
+
+        # in/out laps and refuels would skew the averages
+        if not self.pitted_this_lap and burn > 0.0:
+            self.burn.add(burn)
+            if lap_time is not None:
+                self.lap_times.add(lap_time)
+            self.stint_laps += 1
+            self.stint_fuel += burn
+
+        self._start_lap()
+        self._publish()
+
+    def _start_lap(self):
+        self.last_lap_completed = self.lap_completed
+        self.lap_start_fuel = self.fuel_level
+        self.lap_start_time = self.session_time
+        self.pitted_this_lap = bool(self.on_pit_road)
+
+    def _get_time_remaining(self) -> Optional[float]:
+        if not self.context.race_duration or self.race_start_time is None:
+            return None
+        elapsed = self.session_time - self.race_start_time
+        return max(0.0, self.context.race_duration - elapsed)
+
+    def _publish(self):
+        stint_avg = self.stint_fuel / self.stint_laps if self.stint_laps else None
+
+        # early in a stint fall back on the last one's burn rate
+        avg_burn = self.burn.mean if self.burn.mean is not None else self.prev_stint_avg
+        avg_lap_time = self.lap_times.mean
+        time_remaining = self._get_time_remaining()
+
+        laps_in_tank = None
+        if avg_burn and self.fuel_level is not None:
+            laps_in_tank = self.fuel_level / avg_burn
+
+        laps_to_finish = fuel_to_finish = fuel_to_add = None
+        if avg_burn and avg_lap_time and time_remaining is not None:
+            # the lap running when the clock hits zero still has to be finished
+            laps_to_finish = math.ceil(time_remaining / avg_lap_time)
+            fuel_to_finish = laps_to_finish * avg_burn
+            fuel_to_add = max(0.0, fuel_to_finish - (self.fuel_level or 0.0))
+
+        self.context.fuel = FuelSnapshot(
+            stint_laps=self.stint_laps,
+            fuel_level=self.fuel_level,
+            last_lap=self.burn.last,
+            rolling_avg=self.burn.mean,
+            stint_avg=stint_avg,
+            p50=self.burn.percentile(50),
+            p90=self.burn.percentile(90),
+            avg_lap_time=avg_lap_time,
+            time_remaining=time_remaining,
+            laps_in_tank=laps_in_tank,
+            laps_to_finish=laps_to_finish,
+            fuel_to_finish=fuel_to_finish,
+            fuel_to_add=fuel_to_add,
+        )
@@ -0,0 +1,261 @@
+from typing import Optional
+from queue import Queue
+import numpy as np
+from irsdk import TrkLoc
+from src.fsm.events import Events
+from src.managers.base_manager import BaseManager
+from src.models.grid import GridCar
+from src.models.lap import Lap
+from src.models.pitstop import PitStop
+from src.models.stint import Stint
+from src.context.race_context import RaceContext
+from src.telemetry.tick import TickRecord, TickSchema
+
+# length of every CarIdx array in the iRacing SDK
+MAX_CARS = 64
+
+
+class GridManager(BaseManager):
+    """Stints, laps and pitstops for every other car, from the CarIdx arrays.
+
+    The lap, pit road and track surface arrays are kept in preallocated
+    NumPy buffers, refilled only on ticks where the ChangeTracker says they
+    changed, and compared with the previous values as a whole: finding which
+    of the 64 cars completed a lap or crossed the pit lane is a handful of
+    vectorized operations however full the grid is, and Python only runs for
+    the few cars that did something. Cars are only compared while they are
+    in the world on both sides of a change, so joining, leaving and sitting
+    in the garage don't read as pit stops. The player's car and the pace car
+    are left to the other managers. Rivals have no backend rows, so their
+    stints, laps and pitstops only go to context.grid and the exporter,
+    with their car_idx.
+    """
+
+    required_fields = {
+        "DriverInfo": "driver_info",
+        "PlayerCarIdx": "car_id",
+        "SessionTime": "session_time",
+        "CarIdxLapCompleted": "car_lap_completed",
+        "CarIdxLastLapTime": "car_last_lap_time",
+        "CarIdxOnPitRoad": "car_on_pit_road",
+        "CarIdxTrackSurface": "car_track_surface",
+        "CarIdxPosition": "car_position",
+    }
+    event_handlers = {
+        Events.SESSION_START: "_handle_session_start",
+        Events.FINISHED: "_handle_finished",
+    }
+
+    driver_info: Optional[dict]
+    car_id: Optional[int]
+    session_time: Optional[float]
+    car_lap_completed: Optional[list[int]]
+    car_last_lap_time: Optional[list[float]]
+    car_on_pit_road: Optional[list[bool]]
+    car_track_surface: Optional[list[int]]
+    car_position: Optional[list[int]]
+
+    def __init__(self, context: RaceContext, queue: Queue):
+        super().__init__(context, queue)
+        self.session_started = False
+        # shared with the context, so readers see cars as they're added
+        self.cars: dict[int, GridCar] = context.grid
+
+        # latest and previous values; prev equals latest except on the tick it changed
+        self._lap = np.full(MAX_CARS, -1, dtype=np.int32)
+        self._prev_lap = np.full(MAX_CARS, -1, dtype=np.int32)
+        self._on_pit = np.zeros(MAX_CARS, dtype=bool)
+        self._prev_on_pit = np.zeros(MAX_CARS, dtype=bool)
+        self._surface = np.full(MAX_CARS, TrkLoc.not_in_world, dtype=np.int32)
+        self._in_world = np.zeros(MAX_CARS, dtype=bool)
+        self._prev_in_world = np.zeros(MAX_CARS, dtype=bool)
+
+        # cars worth tracking (have a driver, not us, not the pace car)
+        self._tracked = np.zeros(MAX_CARS, dtype=bool)
+        self._on_stint = np.zeros(MAX_CARS, dtype=bool)
+        self._lap_started = np.full(MAX_CARS, np.nan, dtype=np.float64)
+
+        self._names: dict[int, Optional[str]] = {}
+        self._tracked_from: tuple[Optional[dict], Optional[int]] = (None, None)
+        # look for cars without a stint even if no array changed
+        self._check_starts = False
+
+        self._lap_bit = 0
+        self._pit_bit = 0
+        self._surface_bit = 0
+
+    def bind_schema(self, schema: TickSchema):
+        super().bind_schema(schema)
+        self._lap_bit = 1 << schema.index["CarIdxLapCompleted"]
+        self._pit_bit = 1 << schema.index["CarIdxOnPitRoad"]
+        self._surface_bit = 1 << schema.index["CarIdxTrackSurface"]
+
+    def on_tick(self, telem: TickRecord, state):
+        super().on_tick(telem, state)
+
+        if self.car_lap_completed is None or self.car_on_pit_road is None or self.car_track_surface is None:
+            return
+
+        self._update_tracked()
+
+        # most ticks only positions and session time move
+        changed = telem.changed & (self._lap_bit | self._pit_bit | self._surface_bit)
+        if changed:
+            self._read_arrays(changed)
+            self._check_cars()
+        if self.session_started and (changed or self._check_starts):
+            self._start_stints()
+
+    def _update_tracked(self):
+        # session info sections are cached, so identity says whether it changed
+        if self._tracked_from == (self.driver_info, self.car_id):
+            return
+        self._tracked_from = (self.driver_info, self.car_id)
+        self._check_starts = True
+
+        self._names = {}
+        self._tracked[:] = False
+        for driver in (self.driver_info or {}).get("Drivers") or []:
+            car_idx = driver.get("CarIdx")
+            if car_idx is None or not 0 <= car_idx < MAX_CARS or car_idx == self.car_id:
+                continue
+            if driver.get("CarIsPaceCar") or driver.get("IsSpectator"):
+                continue
+            self._names[car_idx] = driver.get("UserName")
+            self._tracked[car_idx] = True
+
+    def _read_arrays(self, changed: int):
+        # a changed array is swapped and refilled, an unchanged one catches
+        # its previous values up, so every comparison is against the last tick
+        if changed & self._lap_bit:
+            self._lap, self._prev_lap = self._prev_lap, self._lap
+            self._lap[:] = self.car_lap_completed
+        else:
+            self._prev_lap[:] = self._lap
+
+        if changed & self._pit_bit:
+            self._on_pit, self._prev_on_pit = self._prev_on_pit, self._on_pit
+            self._on_pit[:] = self.car_on_pit_road
+        else:
+            self._prev_on_pit[:] = self._on_pit
+
+        if changed & self._surface_bit:
+            self._in_world, self._prev_in_world = self._prev_in_world, self._in_world
+            self._surface[:] = self.car_track_surface
+            np.not_equal(self._surface, TrkLoc.not_in_world, out=self._in_world)
+        else:
+            self._prev_in_world[:] = self._in_world
+
+    def _check_cars(self):
+        # in the world with a lap count on both ticks, so the two are comparable
+        seen = self._tracked & self._in_world & self._prev_in_world & (self._prev_lap >= 0)
+
+        laps_done = seen & (self._lap > self._prev_lap)
+        pit_crossed = seen & (self._on_pit ^ self._prev_on_pit)
+
+        for car_idx in np.flatnonzero(laps_done).tolist():
+            self._complete_lap(car_idx)
+        self._lap_started[laps_done] = self.session_time
+
+        for car_idx in np.flatnonzero(pit_crossed).tolist():
+            if self._on_pit[car_idx]:
+                self._enter_pit_road(car_idx)
+            else:
+                self._exit_pit_road(car_idx)
+
+    def _start_stints(self):
+        self._check_starts = False
+        # on track without a stint: the start, a pit exit, or a car that joined late
+        starts = self._tracked & self._in_world & (self._lap >= 0) & ~self._on_pit & ~self._on_stint
+        for car_idx in np.flatnonzero(starts).tolist():
+            self._start_stint(car_idx)
+
+    def _handle_session_start(self):
+        self.session_started = True
+        self._check_starts = True
+
+    def _handle_finished(self):
+        self.session_started = False
+        for car in self.cars.values():
+            if car.stint is not None:
+                self._update_stint(car)
+                self._export_stint(car)
+
+    def _get_car(self, car_idx: int) -> GridCar:
+        car = self.cars.get(car_idx)
+        if car is None:
+            car = self.cars[car_idx] = GridCar(car_idx)
+        car.driver_name = self._names.get(car_idx)
+        return car
+
+    def _get_position(self, car_idx: int) -> Optional[int]:
+        # 0 until the car is classified
+        if self.car_position is None:
+            return None
+        return self.car_position[car_idx] or None
+
+    def _start_stint(self, car_idx: int):
+        car = self._get_car(car_idx)
+        car.stint = Stint(
+            session_id=self.context.session_id,
+            driver_name=car.driver_name,
+            start_time=self.session_time,
+            start_position=self._get_position(car_idx),
+            # incidents and fuel are only broadcast for our own car
+            start_incidents=None,
+            start_fuel=None,
+            number=len(car.stints) + 1,
+        )
+        self._on_stint[car_idx] = True
+        self._lap_started[car_idx] = self.session_time
+
+    def _update_stint(self, car: GridCar):
+        car.stint.end_time = self.session_time
+        car.stint.end_position = self._get_position(car.car_idx)
+
+    def _complete_lap(self, car_idx: int):
+        car = self._get_car(car_idx)
+        if car.stint is None:
+            return
+
+        lap_time = self.car_last_lap_time[car_idx] if self.car_last_lap_time is not None else -1.0
+        if lap_time <= 0.0:
+            started = float(self._lap_started[car_idx])
+            lap_time = None if np.isnan(started) else self.session_time - started
+
+        lap = Lap(stint_id=None, number=int(self._lap[car_idx]), time=lap_time)
+        car.stint.laps.append(lap)
+
+        if self.context.exporter is not None:
+            self.context.exporter.write_lap(lap, car.stint.local_id, car_idx=car_idx)
+
+    def _enter_pit_road(self, car_idx: int):
+        car = self._get_car(car_idx)
+        car.pitstop = PitStop(stint_id=None, road_enter_time=self.session_time)
+        car.pitstop_stint_key = None
+
+        if car.stint is not None:
+            self._update_stint(car)
+            car.stint.is_complete = True
+            self._export_stint(car)
+
+            car.pitstop_stint_key = car.stint.local_id
+            car.stints.append(car.stint)
+            car.stint = None
+            self._on_stint[car_idx] = False
+
+    def _exit_pit_road(self, car_idx: int):
+        car = self._get_car(car_idx)
+        if car.pitstop is None:
+            return
+
+        car.pitstop.road_exit_time = self.session_time
+        if self.context.exporter is not None:
+            self.context.exporter.write_pitstop(car.pitstop, car.pitstop_stint_key, car_idx=car_idx)
+
+        car.pitstops.append(car.pitstop)
+        car.pitstop = None
+
+    def _export_stint(self, car: GridCar):
+        if self.context.exporter is not None:
+            self.context.exporter.write_stint(car.stint, car_idx=car.car_idx)
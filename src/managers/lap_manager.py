@@ -2,6 +2,7 @@ from typing import Optional
 from src.managers.base_manager import BaseManager
 from src.models.lap import Lap
 from src.api.task_types import TaskType
+from src.telemetry.tick import TickRecord
 
 
 class LapManager(BaseManager):
@@ -22,7 +23,7 @@ class LapManager(BaseManager):
         self.last_lap_completed = 0
         self.lap_start_time = None
 
-    def on_tick(self, telem: dict[str, any], state):
+    def on_tick(self, telem: TickRecord, state):
         super().on_tick(telem, state)
 
         self._check_for_new_lap()
@@ -38,18 +39,26 @@ class LapManager(BaseManager):
 
             if self.last_lap_time and self.last_lap_time > 0.0:
                 lap_time = self.last_lap_time
-            else:
+            elif self.lap_start_time is not None:
                 lap_time = self.session_time - self.lap_start_time
+            else:
+                # joined part way through the lap
+                lap_time = None
 
             self._post_lap_info(lap_time)
             self.last_lap_completed = self.lap_completed
             self.lap_start_time = self.session_time
 
-    def _post_lap_info(self, lap_time: float):
-        data = Lap(
+    def _post_lap_info(self, lap_time: Optional[float]):
+        lap = Lap(
             stint_id=self.context.stint_id,
             number=self.lap_completed,
             time=lap_time,
-        ).to_dict()
+        )
+
+        self._send_data(
+            TaskType.LAP, lap.to_dict(), key=lap.local_id, parent_key=self.context.stint_key
+        )
 
-        self._send_data(TaskType.LAP, data)
+        if self.context.exporter is not None:
+            self.context.exporter.write_lap(lap, self.context.stint_key, self.context.car_id)
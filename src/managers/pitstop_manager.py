@@ -1,5 +1,6 @@
 from queue import Queue
 from typing import Optional
+from src.fsm.events import Events
 from src.managers.base_manager import BaseManager
 from src.context.race_context import RaceContext
 from src.models.pitstop import PitStop
@@ -18,6 +19,14 @@ class PitstopManager(BaseManager):
         "dpLRTireChange": "left_rear",
         "FastRepairAvailable": "fast_repair_available",
     }
+    event_handlers = {
+        Events.ENTER_PIT_ROAD: "_handle_enter_pit_road",
+        Events.EXIT_PIT_ROAD: "_handle_exit_pit_road",
+        Events.ENTER_PIT_BOX: "_handle_enter_pit_box",
+        Events.EXIT_PIT_BOX: "_handle_exit_pit_box",
+        Events.DRIVER_SWAP_IN: "_handle_driver_swap_in",
+        Events.DRIVER_SWAP_OUT: "_handle_driver_swap_out",
+    }
 
     session_time: Optional[float]
     repair_time: Optional[float]
@@ -34,40 +43,49 @@ class PitstopManager(BaseManager):
         self.current_pitstop: Optional[PitStop] = None
         self.road_enter_time: Optional[float] = None
 
-    def handle_event(self, event, telem, ctx):
-        if event == "enter_pit_road":
-            self._handle_enter_pit_road()
-        elif event == "exit_pit_road":
-            self._handle_exit_pit_road()
-        elif event == "enter_pit_box":
-            self._handle_enter_pit_box()
-        elif event == "exit_pit_box":
-            self._handle_exit_pit_box()
-        elif event == "driver_swap_in":
-            self._handle_driver_swap_in()
-        elif event == "driver_swap_out":
-            self._handle_driver_swap_out()
-    
     def _reset_pit(self):
         self.current_pitstop = None
         self.road_enter_time = None
 
     def _post_pitstop_data(self):
-        data = {"stint_id": self.context.stint_id, "pitstop_obj": self.current_pitstop}
-        self._send_data(TaskType.PITSTOP_CREATE, data)
+        self._send_data(
+            TaskType.PITSTOP_CREATE,
+            self.current_pitstop.to_post_dict(),
+            key=self.current_pitstop.local_id,
+            parent_key=self.context.stint_key,
+        )
 
     def _patch_pitstop_data(self):
-        data = {"pitstop_id": self.current_pitstop.pitstop_id, "pitstop_obj": self.current_pitstop}
-        self._send_data(TaskType.PITSTOP_UPDATE, data)
+        pitstop = self.current_pitstop
+        # anything the server hasn't acknowledged yet is sent again
+        pitstop.mark_synced(self.context.synced_fields.get(pitstop.local_id, {}))
+        data = pitstop.to_patch_dict(dirty_only=True)
+        if not data:
+            return
+
+        self._send_data(TaskType.PITSTOP_UPDATE, data, key=pitstop.local_id)
+
+    def _export_pitstop(self):
+        if self.context.exporter is not None:
+            server_id = self.context.server_ids.get(self.current_pitstop.local_id)
+            self.context.exporter.write_pitstop(
+                self.current_pitstop, self.context.stint_key, server_id, self.context.car_id
+            )
+
+    # the FSM also sends exit_pit_road on the way into the box and
+    # enter_pit_road on the way out; neither is the pit lane itself
 
     def _handle_enter_pit_road(self):
-        self.road_enter_time = self.session_time
+        if self.current_pitstop is None:
+            self.road_enter_time = self.session_time
 
     def _handle_exit_pit_road(self):
-        if self.current_pitstop is not None:
-            self.current_pitstop.road_exit_time = self.session_time
-            self._patch_pitstop_data()
-            
+        if self.current_pitstop is None or self.current_pitstop.service_end_time is None:
+            return
+
+        self.current_pitstop.road_exit_time = self.session_time
+        self._patch_pitstop_data()
+        self._export_pitstop()
         self._reset_pit()
 
     def _handle_enter_pit_box(self):
@@ -94,10 +112,8 @@ class PitstopManager(BaseManager):
             self.current_pitstop.end_fast_repairs = self.fast_repair_available
     
     def _handle_driver_swap_in(self):
-        self.current_pitstop = PitStop(
-            stint_id=self.context.stint_id,
-            pitstop_id=self.context.pitstop_id,
-        )
+        # the enter_pit_box that follows starts this driver's pitstop
+        self._reset_pit()
     
     def _handle_driver_swap_out(self):
         self._reset_pit()
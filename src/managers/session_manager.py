@@ -1,6 +1,7 @@
 from queue import Queue
 from datetime import date
 from typing import Optional
+from src.fsm.events import Events
 from src.managers.base_manager import BaseManager
 from src.context.race_context import RaceContext
 from src.models.session import Session
@@ -14,6 +15,7 @@ class SessionManager(BaseManager):
         "DriverInfo": "driver_info",
         "PlayerCarIdx": "car_id",
     }
+    event_handlers = {Events.SESSION_START: "_handle_session_start"}
 
     session_info: Optional[dict]
     weekend_info: Optional[dict]
@@ -28,8 +30,8 @@ class SessionManager(BaseManager):
 
         self.session_sent = False
 
-    def handle_event(self, event, telem, ctx):
-        if event == "session_start" and not self.session_sent:
+    def _handle_session_start(self):
+        if not self.session_sent:
             self.set_context()
             self._post_session_info()
             self.session_sent = True
@@ -37,22 +39,26 @@ class SessionManager(BaseManager):
     def set_context(self):
         self.context.session_id = self.weekend_info["SubSessionID"]
         self.context.car_id = self.car_id
+        self.context.race_duration = self._get_race_duration()
 
     def _post_session_info(self):
         car_info = self.driver_info["Drivers"][self.car_id]
         car_class_name = car_info["CarClassShortName"]
         car_name = car_info["CarScreenName"]
 
-        data = Session(
+        session = Session(
             id=self.context.session_id,
             track=self.weekend_info["TrackDisplayName"],
             car_class=car_class_name if car_class_name else car_name,
             car=car_name,
-            race_duration=self._get_race_duration(),
+            race_duration=self.context.race_duration,
             session_date=date.today(),
-        ).to_dict()
+        )
 
-        self._send_data(TaskType.SESSION, data)
+        self._send_data(TaskType.SESSION, session.to_dict())
+
+        if self.context.exporter is not None:
+            self.context.exporter.write_session(session)
 
     def _get_race_duration(self) -> float:
         sessions = self.session_info.get("Sessions", [])
@@ -1,5 +1,6 @@
 from typing import Optional
 from queue import Queue
+from src.fsm.events import Events
 from src.managers.base_manager import BaseManager
 from src.models.stint import Stint
 from src.context.race_context import RaceContext
@@ -15,6 +16,13 @@ class StintManager(BaseManager):
         "FuelLevel": "fuel_level",
         "LapCompleted": "lap_completed",
     }
+    event_handlers = {
+        Events.SESSION_START: "_handle_session_start",
+        Events.ENTER_PIT_ROAD: "_handle_enter_pit_road",
+        Events.EXIT_PIT_ROAD: "_handle_exit_pit_road",
+        Events.ENTER_PIT_BOX: "_handle_enter_pit_box",
+        Events.FINISHED: "_export_stint",
+    }
 
     driver_info: Optional[dict]
     session_time: Optional[float]
@@ -43,28 +51,21 @@ class StintManager(BaseManager):
                 self._update_stint()
                 self.last_lap_completed = self.lap_completed
 
-    def handle_event(self, event, telem, ctx):
-        if event == "exit_pit_road":
-            self._handle_exit_pit_road()
-        elif event == "enter_pit_road":
-            self._handle_enter_pit_road()
-        elif event == "session_start":
-            self._handle_session_start()
-        elif event == "enter_pit_box":
-            self._handle_enter_pit_box()
-
-
     def _handle_session_start(self):
         self._start_stint()
 
+    # the FSM also sends exit_pit_road on the way into the box and
+    # enter_pit_road on the way out, when the stint has already ended
+
     def _handle_enter_pit_road(self):
-        self._update_stint()
-        self.pending_stint_end = True
+        if self.current_stint is not None:
+            self._update_stint()
+            self.pending_stint_end = True
 
     def _handle_exit_pit_road(self):
-        if self.pending_stint_end:
-            self.pending_stint_end = False
-        else:
+        self.pending_stint_end = False
+        # leaving pit road after a box stop; a drive-through keeps its stint
+        if self.current_stint is None:
             self._start_stint()
 
     def _handle_enter_pit_box(self):
@@ -80,10 +81,14 @@ class StintManager(BaseManager):
             start_incidents=self.incidents,
             start_fuel=self.fuel_level,
         )
+        self.context.stint_key = self.current_stint.local_id
 
-        data = {"session_id": self.context.session_id, "stint_obj": self.current_stint}
-
-        self._send_data(TaskType.STINT_CREATE, data)
+        self._send_data(
+            TaskType.STINT_CREATE,
+            self.current_stint.post_dict(),
+            key=self.current_stint.local_id,
+            session_id=self.context.session_id,
+        )
     
     def _update_stint(self):
         if self.current_stint and not self.current_stint.is_complete:
@@ -92,13 +97,30 @@ class StintManager(BaseManager):
             self.current_stint.end_incidents = self.incidents
             self.current_stint.end_fuel = self.fuel_level
 
-            data = {"stint_id": self.current_stint.id, "stint_obj": self.current_stint}
-
-            self._send_data(TaskType.STINT_UPDATE, data)
+            self._send_stint_update()
 
     def _end_stint(self):
+        if self.current_stint is None:
+            return
+
         self.current_stint.is_complete = True
-        data = {"stint_id": self.current_stint.id, "stint_obj": self.current_stint}
-        self._send_data(TaskType.STINT_UPDATE, data)
+        # the closing patch is sent whole, so it repairs any delta the backend missed
+        self._send_stint_update(dirty_only=False)
+        self._export_stint()
 
         self.current_stint = None
+
+    def _export_stint(self):
+        if self.current_stint and self.context.exporter is not None:
+            server_id = self.context.server_ids.get(self.current_stint.local_id)
+            self.context.exporter.write_stint(self.current_stint, server_id, self.context.car_id)
+
+    def _send_stint_update(self, dirty_only: bool = True):
+        stint = self.current_stint
+        # anything the server hasn't acknowledged yet is sent again
+        stint.mark_synced(self.context.synced_fields.get(stint.local_id, {}))
+        data = stint.patch_dict(dirty_only=dirty_only)
+        if not data:
+            return
+
+        self._send_data(TaskType.STINT_UPDATE, data, key=stint.local_id)
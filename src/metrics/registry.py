@@ -0,0 +1,308 @@
+import math
+import threading
+from bisect import bisect_left
+from collections import deque
+from typing import Any, Callable, Optional, Sequence
+
+# default buckets (seconds), fine-grained around a 60 Hz tick budget
+TICK_BUCKETS = (0.0005, 0.001, 0.002, 0.004, 0.008, 1 / 60, 0.025, 0.05, 0.1, 0.25)
+
+
+class _Shards:
+    """Per-thread storage for one metric value.
+
+    Writers only ever touch the shard of their own thread, so recording
+    takes no lock and can't lose updates. Readers merge the shards; the lock
+    is only taken when a thread writes for the first time and on reads.
+    """
+
+    def __init__(self, new_shard: Callable[[], Any]):
+        self._new_shard = new_shard
+        self._local = threading.local()
+        self._all: list[Any] = []
+        self._lock = threading.Lock()
+
+    def get(self) -> Any:
+        try:
+            return self._local.shard
+        except AttributeError:
+            shard = self._new_shard()
+            with self._lock:
+                self._all.append(shard)
+            self._local.shard = shard
+            return shard
+
+    def all(self) -> list[Any]:
+        with self._lock:
+            return list(self._all)
+
+
+class CounterValue:
+    def __init__(self):
+        self._shards = _Shards(lambda: [0.0])
+
+    def inc(self, amount: float = 1.0):
+        self._shards.get()[0] += amount
+
+    def value(self) -> float:
+        return sum(shard[0] for shard in self._shards.all())
+
+
+class GaugeValue:
+    """Last value set wins; or read from `fn` when it's collected."""
+
+    def __init__(self, fn: Optional[Callable[[], float]] = None):
+        self.fn = fn
+        self._value = 0.0
+
+    def set(self, value: float):
+        self._value = value
+
+    def value(self) -> float:
+        if self.fn is None:
+            return self._value
+        try:
+            return float(self.fn())
+        except Exception:
+            return math.nan
+
+
+class HistogramValue:
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = tuple(buckets)
+        # per shard: one count per bucket, one for +Inf, then the sum
+        self._shards = _Shards(lambda: [0] * (len(self.buckets) + 1) + [0.0])
+
+    def observe(self, value: float):
+        shard = self._shards.get()
+        shard[bisect_left(self.buckets, value)] += 1
+        shard[-1] += value
+
+    def value(self) -> dict[str, Any]:
+        counts = [0] * (len(self.buckets) + 1)
+        total = 0.0
+        for shard in self._shards.all():
+            for i in range(len(counts)):
+                counts[i] += shard[i]
+            total += shard[-1]
+
+        cumulative = []
+        running = 0
+        for count in counts:
+            running += count
+            cumulative.append(running)
+
+        return {
+            "buckets": dict(zip((*self.buckets, math.inf), cumulative)),
+            "count": running,
+            "sum": total,
+        }
+
+
+class SummaryValue:
+    """Quantiles over the most recent `window` observations of each thread."""
+
+    def __init__(self, quantiles: Sequence[float], window: int):
+        self.quantiles = tuple(quantiles)
+        # per shard: recent samples, then [count, sum]
+        self._shards = _Shards(lambda: (deque(maxlen=window), [0, 0.0]))
+
+    def observe(self, value: float):
+        samples, totals = self._shards.get()
+        samples.append(value)
+        totals[0] += 1
+        totals[1] += value
+
+    def value(self) -> dict[str, Any]:
+        samples: list[float] = []
+        count = 0
+        total = 0.0
+        for shard_samples, totals in self._shards.all():
+            samples.extend(list(shard_samples))
+            count += totals[0]
+            total += totals[1]
+
+        samples.sort()
+        quantiles = {}
+        for q in self.quantiles:
+            if samples:
+                quantiles[q] = samples[min(len(samples) - 1, int(q * len(samples)))]
+            else:
+                quantiles[q] = math.nan
+
+        return {"quantiles": quantiles, "count": count, "sum": total}
+
+
+class Metric:
+    """A named metric with one value per combination of label values."""
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        kind: str,
+        labelnames: Sequence[str],
+        new_value: Callable[[], Any],
+    ):
+        self.name = name
+        self.help = help
+        self.kind = kind
+        self.labelnames = tuple(labelnames)
+        self._new_value = new_value
+        self._values: dict[tuple[str, ...], Any] = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values: Any) -> Any:
+        key = tuple(str(value) for value in values)
+        child = self._values.get(key)
+        if child is None:
+            if len(key) != len(self.labelnames):
+                raise ValueError(f"{self.name} takes labels {self.labelnames}, got {key}")
+            with self._lock:
+                child = self._values.setdefault(key, self._new_value())
+        return child
+
+    def items(self) -> list[tuple[tuple[str, ...], Any]]:
+        with self._lock:
+            return list(self._values.items())
+
+    # unlabelled metrics can be used directly
+
+    def inc(self, amount: float = 1.0):
+        self.labels().inc(amount)
+
+    def set(self, value: float):
+        self.labels().set(value)
+
+    def observe(self, value: float):
+        self.labels().observe(value)
+
+
+class MetricsRegistry:
+    """Holds the app's metrics; rendered for Prometheus or snapshotted in process.
+
+    Asking for a metric that's already registered returns it, so modules can
+    declare theirs at import time.
+    """
+
+    def __init__(self, prefix: str = "stint_tracker_"):
+        self.prefix = prefix
+        self.metrics: dict[str, Metric] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, name: str, help: str, kind: str, labelnames: Sequence[str], new_value) -> Metric:
+        full_name = self.prefix + name
+        with self._lock:
+            metric = self.metrics.get(full_name)
+            if metric is None:
+                metric = Metric(full_name, help, kind, labelnames, new_value)
+                self.metrics[full_name] = metric
+            return metric
+
+    def counter(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Metric:
+        return self._register(name, help, "counter", labelnames, CounterValue)
+
+    def gauge(
+        self,
+        name: str,
+        help: str,
+        labelnames: Sequence[str] = (),
+        fn: Optional[Callable[[], float]] = None,
+    ) -> Metric:
+        metric = self._register(name, help, "gauge", labelnames, GaugeValue)
+        if fn is not None:
+            # re-registering points the gauge at the newest source (e.g. a new engine)
+            metric.labels().fn = fn
+        return metric
+
+    def histogram(
+        self,
+        name: str,
+        help: str,
+        buckets: Sequence[float] = TICK_BUCKETS,
+        labelnames: Sequence[str] = (),
+    ) -> Metric:
+        return self._register(name, help, "histogram", labelnames, lambda: HistogramValue(buckets))
+
+    def summary(
+        self,
+        name: str,
+        help: str,
+        labelnames: Sequence[str] = (),
+        quantiles: Sequence[float] = (0.5, 0.9, 0.99),
+        window: int = 1024,
+    ) -> Metric:
+        return self._register(
+            name, help, "summary", labelnames, lambda: SummaryValue(quantiles, window)
+        )
+
+    def snapshot(self) -> dict[str, Any]:
+        """Current values: {metric: value} unlabelled, {metric: {"a=x,b=y": value}} otherwise."""
+        with self._lock:
+            metrics = list(self.metrics.values())
+
+        snapshot: dict[str, Any] = {}
+        for metric in metrics:
+            values = {
+                ",".join(f"{k}={v}" for k, v in zip(metric.labelnames, key)): child.value()
+                for key, child in metric.items()
+            }
+            snapshot[metric.name] = values if metric.labelnames else values.get("")
+        return snapshot
+
+    def render(self) -> str:
+        """Prometheus text exposition format (0.0.4)."""
+        with self._lock:
+            metrics = list(self.metrics.values())
+
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for key, child in metric.items():
+                labels = list(zip(metric.labelnames, key))
+                lines.extend(_render_value(metric, labels, child.value()))
+        return "\n".join(lines) + "\n"
+
+
+def _format_labels(labels: list[tuple[str, str]]) -> str:
+    if not labels:
+        return ""
+    escaped = (
+        (name, value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"'))
+        for name, value in labels
+    )
+    return "{" + ",".join(f'{name}="{value}"' for name, value in escaped) + "}"
+
+
+def _format_number(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if math.isnan(value):
+        return "NaN"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+def _render_value(metric: Metric, labels: list[tuple[str, str]], value: Any) -> list[str]:
+    name = metric.name
+    if metric.kind in ("counter", "gauge"):
+        return [f"{name}{_format_labels(labels)} {_format_number(value)}"]
+
+    lines = []
+    if metric.kind == "histogram":
+        for bound, count in value["buckets"].items():
+            bucket_labels = labels + [("le", _format_number(bound))]
+            lines.append(f"{name}_bucket{_format_labels(bucket_labels)} {count}")
+    else:
+        for q, sample in value["quantiles"].items():
+            lines.append(
+                f"{name}{_format_labels(labels + [('quantile', str(q))])} {_format_number(sample)}"
+            )
+
+    lines.append(f"{name}_sum{_format_labels(labels)} {_format_number(value['sum'])}")
+    lines.append(f"{name}_count{_format_labels(labels)} {value['count']}")
+    return lines
+
+
+# the app's metrics; modules register theirs on import
+REGISTRY = MetricsRegistry()
@@ -0,0 +1,71 @@
+import json
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+from src.metrics.registry import REGISTRY, MetricsRegistry
+
+logger = logging.getLogger(__name__)
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class MetricsServer:
+    """Serves a registry for scraping: /metrics in Prometheus text, /metrics.json as a snapshot.
+
+    Binds to localhost by default; port=0 picks a free port (see `url`).
+    """
+
+    def __init__(
+        self,
+        port: int = 9464,
+        host: str = "127.0.0.1",
+        registry: MetricsRegistry = REGISTRY,
+    ):
+        self.registry = registry
+        self.server = ThreadingHTTPServer((host, port), _Handler)
+        self.server.daemon_threads = True
+        self.server.registry = registry
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "MetricsServer":
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        logger.info("Serving metrics on %s/metrics", self.url)
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+        if self._thread:
+            self._thread.join(timeout=2)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        logger.debug("%s - %s", self.address_string(), format % args)
+
+    def do_GET(self):
+        registry: MetricsRegistry = self.server.registry
+        path = self.path.split("?", 1)[0]
+
+        if path == "/metrics":
+            body = registry.render().encode()
+            content_type = PROMETHEUS_CONTENT_TYPE
+        elif path == "/metrics.json":
+            body = json.dumps(registry.snapshot(), default=str).encode()
+            content_type = "application/json"
+        else:
+            self.send_error(404)
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
@@ -0,0 +1,199 @@
+import json
+import os
+import random
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Iterable, Iterator, Optional
+from src.metrics.registry import REGISTRY, MetricsRegistry
+
+# where a task's time goes, in the order the marks are normally made:
+# detect     tick the manager saw the change on
+# enqueue    task on the queue
+# dequeue    taken off the queue by the worker
+# outbox     durably written to the outbox
+# serialize  its group picked up for sending (ids resolved, payload built)
+# send       HTTP request started (again on retries)
+# response   HTTP response received
+# ack        removed from the outbox
+STAGES = ("detect", "enqueue", "dequeue", "outbox", "serialize", "send", "response", "ack")
+
+# a task retried through a long outage would otherwise collect marks without
+# end; past this only the closing mark from finish() is added
+MAX_MARKS = 64
+
+# "lap visible on the pit wall within 2 s"
+DEFAULT_SLO_SECONDS = 2.0
+SLO_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 5.0, 10.0, 30.0, 60.0)
+
+
+@dataclass
+class Trace:
+    trace_id: str
+    name: str
+    # (stage, time.perf_counter()), in the order they were made
+    marks: list[tuple[str, float]] = field(default_factory=list)
+    # "acked", or why it ended early ("collapsed", "dropped")
+    outcome: Optional[str] = None
+
+    @property
+    def duration(self) -> float:
+        return self.marks[-1][1] - self.marks[0][1] if self.marks else 0.0
+
+    def stage_times(self) -> dict[str, float]:
+        """Seconds spent getting to each stage from the one before it (summed over retries)."""
+        times: dict[str, float] = {}
+        for (_, start), (stage, end) in zip(self.marks, self.marks[1:]):
+            times[stage] = times.get(stage, 0.0) + end - start
+        return times
+
+
+class Tracer:
+    """Follows backend tasks from the tick that produced them to the server's answer.
+
+    Producers start a trace and put its id on the Task; the worker, lanes
+    and client mark stages against it. Stages made inside the client don't
+    know which tasks they're for, so the sending side activate()s the ids
+    of the tasks in flight on its thread and the client calls mark_active().
+
+    A `sample_rate` of 0 disables tracing; finished traces are kept, up to
+    `keep`, for export.
+    """
+
+    def __init__(
+        self,
+        sample_rate: float = 1.0,
+        keep: int = 1000,
+        slo: float = DEFAULT_SLO_SECONDS,
+        registry: MetricsRegistry = REGISTRY,
+    ):
+        self.sample_rate = sample_rate
+        self.slo = slo
+        # start of the tick being processed; set by the telemetry loop
+        self.tick_started: Optional[float] = None
+        self.origin = time.perf_counter()
+
+        self.in_flight: dict[str, Trace] = {}
+        self.completed: deque[Trace] = deque(maxlen=keep)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._rng = random.Random()
+
+        self.end_to_end = registry.histogram(
+            "trace_end_to_end_seconds",
+            "Time from detecting a change to the server acknowledging its task, by task type.",
+            buckets=SLO_BUCKETS,
+            labelnames=("task",),
+        )
+        self.slo_breaches = registry.counter(
+            "trace_slo_breaches_total",
+            "Acknowledged tasks that took longer than the SLO, by task type.",
+            labelnames=("task",),
+        )
+
+    def start(self, name: str) -> Optional[str]:
+        """Open a trace detected on the current tick (or now, outside the loop); None if not sampled."""
+        if self.sample_rate <= 0 or (self.sample_rate < 1 and self._rng.random() >= self.sample_rate):
+            return None
+
+        detected = self.tick_started if self.tick_started is not None else time.perf_counter()
+        # random rather than sequential: ids outlive the process in the outbox
+        trace = Trace(os.urandom(8).hex(), name, [("detect", detected)])
+        with self._lock:
+            self.in_flight[trace.trace_id] = trace
+        return trace.trace_id
+
+    def mark(self, trace_id: Optional[str], stage: str, at: Optional[float] = None):
+        self.mark_many((trace_id,), stage, at)
+
+    def mark_many(self, trace_ids: Iterable[Optional[str]], stage: str, at: Optional[float] = None):
+        at = time.perf_counter() if at is None else at
+        with self._lock:
+            for trace_id in trace_ids:
+                trace = self.in_flight.get(trace_id) if trace_id is not None else None
+                if trace is None:
+                    continue
+                # the same stage again (re-sent while the breaker is open) just
+                # moves the mark on; stage_times() comes out the same either way
+                if trace.marks[-1][0] == stage:
+                    trace.marks[-1] = (stage, at)
+                elif len(trace.marks) < MAX_MARKS:
+                    trace.marks.append((stage, at))
+
+    @contextmanager
+    def activate(self, trace_ids: Iterable[Optional[str]]) -> Iterator[None]:
+        """Make these the traces mark_active() applies to on this thread."""
+        previous = getattr(self._local, "active", ())
+        self._local.active = tuple(trace_id for trace_id in trace_ids if trace_id is not None)
+        try:
+            yield
+        finally:
+            self._local.active = previous
+
+    def mark_active(self, stage: str):
+        active = getattr(self._local, "active", ())
+        if active:
+            self.mark_many(active, stage)
+
+    def finish(self, trace_id: Optional[str], outcome: str = "acked"):
+        if trace_id is None:
+            return
+
+        now = time.perf_counter()
+        with self._lock:
+            trace = self.in_flight.pop(trace_id, None)
+            if trace is None:
+                return
+            trace.marks.append(("ack" if outcome == "acked" else outcome, now))
+            trace.outcome = outcome
+            self.completed.append(trace)
+
+        if outcome == "acked":
+            self.end_to_end.labels(trace.name).observe(trace.duration)
+            if trace.duration > self.slo:
+                self.slo_breaches.labels(trace.name).inc()
+
+    def traces(self) -> list[Trace]:
+        """Finished traces, oldest first, then those still in flight."""
+        with self._lock:
+            return list(self.completed) + list(self.in_flight.values())
+
+    def chrome_events(self) -> list[dict[str, Any]]:
+        """Trace Event Format: one row per task, one span per stage, inside a span for the whole task."""
+        events: list[dict[str, Any]] = [
+            {"name": "process_name", "ph": "M", "pid": 1, "args": {"name": "backend tasks"}}
+        ]
+
+        def us(t: float) -> float:
+            return round((t - self.origin) * 1e6, 3)
+
+        for tid, trace in enumerate(self.traces(), start=1):
+            if not trace.marks:
+                continue
+
+            args = {"trace_id": trace.trace_id, "outcome": trace.outcome or "in flight"}
+            events.append(
+                {"name": "thread_name", "ph": "M", "pid": 1, "tid": tid,
+                 "args": {"name": f"{trace.name} {trace.trace_id}"}}
+            )
+            events.append(
+                {"name": trace.name, "cat": "task", "ph": "X", "pid": 1, "tid": tid,
+                 "ts": us(trace.marks[0][1]), "dur": round(trace.duration * 1e6, 3), "args": args}
+            )
+            for (_, start), (stage, end) in zip(trace.marks, trace.marks[1:]):
+                events.append(
+                    {"name": stage, "cat": "stage", "ph": "X", "pid": 1, "tid": tid,
+                     "ts": us(start), "dur": round((end - start) * 1e6, 3)}
+                )
+        return events
+
+    def export_chrome(self, path: str):
+        """Write the traces for chrome://tracing or https://ui.perfetto.dev."""
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": self.chrome_events(), "displayTimeUnit": "ms"}, f)
+
+
+# the app's tracer; producers, worker and client all mark against it
+TRACER = Tracer()
@@ -0,0 +1,25 @@
+from dataclasses import dataclass, field
+from typing import Any
+
+
+@dataclass
+class DirtyTracked:
+    """Base for models that are patched in place on the backend.
+
+    Remembers the values the server has acknowledged (the API worker
+    publishes them in RaceContext.synced_fields), so a patch can carry only
+    what changed since.
+    """
+
+    _synced: dict[str, Any] = field(default_factory=dict, init=False, repr=False, compare=False)
+
+    def mark_synced(self, data: dict[str, Any]):
+        self._synced.update(data)
+
+    def dirty_fields(self, data: dict[str, Any]) -> dict[str, Any]:
+        synced = self._synced
+        return {
+            key: value
+            for key, value in data.items()
+            if key not in synced or synced[key] != value
+        }
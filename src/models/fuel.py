@@ -0,0 +1,25 @@
+from dataclasses import dataclass
+from typing import Optional
+
+
+@dataclass(frozen=True)
+class FuelSnapshot:
+    """Fuel numbers as of the last completed lap. Replaced whole, never mutated."""
+
+    stint_laps: int
+    fuel_level: Optional[float] = None
+
+    # per lap burn in the current stint
+    last_lap: Optional[float] = None
+    rolling_avg: Optional[float] = None
+    stint_avg: Optional[float] = None
+    p50: Optional[float] = None
+    p90: Optional[float] = None
+
+    # projections
+    avg_lap_time: Optional[float] = None
+    time_remaining: Optional[float] = None
+    laps_in_tank: Optional[float] = None
+    laps_to_finish: Optional[int] = None
+    fuel_to_finish: Optional[float] = None
+    fuel_to_add: Optional[float] = None
@@ -0,0 +1,22 @@
+from dataclasses import dataclass, field
+from typing import Optional
+from src.models.pitstop import PitStop
+from src.models.stint import Stint
+
+
+@dataclass
+class GridCar:
+    """Strategy of one other car in the session, as seen through the CarIdx arrays."""
+
+    car_idx: int
+    driver_name: Optional[str] = None
+
+    # in progress
+    stint: Optional[Stint] = None
+    pitstop: Optional[PitStop] = None
+    # local_id of the stint the car was on when it entered pit road
+    pitstop_stint_key: Optional[str] = None
+
+    # completed, oldest first
+    stints: list[Stint] = field(default_factory=list)
+    pitstops: list[PitStop] = field(default_factory=list)
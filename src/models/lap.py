@@ -1,4 +1,5 @@
-from dataclasses import dataclass, asdict
+import uuid
+from dataclasses import dataclass, field
 from typing import Optional
 
 @dataclass
@@ -6,6 +7,11 @@ class Lap:
     stint_id: int
     number: int
     time: Optional[float] = None
+    local_id: str = field(default_factory=lambda: uuid.uuid4().hex)
 
     def to_dict(self):
-        return asdict(self)
\ No newline at end of file
+        return {
+            "stint_id": self.stint_id,
+            "number": self.number,
+            "time": self.time,
+        }
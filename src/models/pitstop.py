@@ -1,12 +1,15 @@
-from dataclasses import dataclass
+import uuid
+from dataclasses import dataclass, field
 from typing import Optional
+from src.models.dirty import DirtyTracked
 
 
 @dataclass
-class PitStop:
+class PitStop(DirtyTracked):
 
     stint_id: int
     pitstop_id: Optional[int] = None
+    local_id: str = field(default_factory=lambda: uuid.uuid4().hex)
     road_enter_time: Optional[float] = None
 
     service_start_time: Optional[float] = None
@@ -52,7 +55,7 @@ class PitStop:
 
     @property
     def pit_duration(self) -> Optional[float]:
-        if self.road_exit_time is None:
+        if self.road_exit_time is None or self.road_enter_time is None:
             return None
         return self.road_exit_time - self.road_enter_time
 
@@ -72,9 +75,10 @@ class PitStop:
             "tire_change": self.has_tire_change,
         }
 
-    def to_patch_dict(self) -> dict:
-        return {
+    def to_patch_dict(self, dirty_only: bool = False) -> dict:
+        data = {
             "service_end_time": self.service_end_time,
             "fuel_end_amount": self.fuel_end_amount,
             "road_exit_time": self.road_exit_time,
         }
+        return self.dirty_fields(data) if dirty_only else data
@@ -1,9 +1,11 @@
+import uuid
 from typing import Optional
 from dataclasses import dataclass, field
 from src.models.lap import Lap
+from src.models.dirty import DirtyTracked
 
 @dataclass
-class Stint:
+class Stint(DirtyTracked):
 
     # required
     session_id: int
@@ -18,6 +20,7 @@ class Stint:
     id: Optional[int] = None
     laps: list[Lap] = field(default_factory=list)
     is_complete: bool = False
+    local_id: str = field(default_factory=lambda: uuid.uuid4().hex)
 
     # end of stint values
     end_time: Optional[float] = None
@@ -63,14 +66,16 @@ class Stint:
             "start_fuel": self.start_fuel,
         }
 
-    def patch_dict(self) -> dict:
+    def patch_dict(self, dirty_only: bool = False) -> dict:
         """
-        Dictionary for updating an existing stint in the backend
+        Dictionary for updating an existing stint in the backend,
+        optionally only the fields changed since the last sync
         """
-        return {
+        data = {
             "is_complete": self.is_complete,
             "end_time": self.end_time,
             "end_position": self.end_position,
             "end_incidents": self.end_incidents,
             "end_fuel": self.end_fuel,
         }
+        return self.dirty_fields(data) if dirty_only else data
@@ -0,0 +1,58 @@
+from typing import TYPE_CHECKING, Sequence
+
+if TYPE_CHECKING:
+    from src.fsm.states import States
+    from src.managers.base_manager import BaseManager
+    from src.telemetry.tick import TickRecord, TickSchema
+
+
+class ChangeTracker:
+    """Sits between the manager stage and the managers and forwards only what changed.
+
+    Each tick is diffed against the previous one, position by position, into
+    TickRecord.changed. A manager's on_tick only runs when one of its
+    subscribed (required_fields) positions changed, and only those are applied.
+    Session info sections are cached per SessionInfoUpdate, so unchanged ones
+    are caught by the identity check without comparing the dicts.
+    """
+
+    def __init__(self, schema: "TickSchema", managers: Sequence["BaseManager"]):
+        self.schema = schema
+        self.managers = managers
+        self.positions: tuple[int, ...] = tuple(
+            sorted({schema.index[key] for m in managers for key in m.required_fields})
+        )
+
+        self._missing = object()
+        self._prev: list = []
+        self.reset()
+
+    def reset(self):
+        """Forget the previous tick so the next dispatch delivers every field."""
+        self._prev = [self._missing] * len(self.schema.fields)
+
+    def diff(self, tick: "TickRecord") -> int:
+        values = tick.values
+        prev = self._prev
+        missing = self._missing
+        changed = 0
+
+        for i in self.positions:
+            value = values[i]
+            last = prev[i]
+            if value is last or (last is not missing and value == last):
+                continue
+            changed |= 1 << i
+            prev[i] = value
+
+        tick.changed = changed
+        return changed
+
+    def dispatch(self, tick: "TickRecord", state: "States"):
+        changed = self.diff(tick)
+        if not changed:
+            return
+
+        for manager in self.managers:
+            if changed & manager.tick_mask:
+                manager.on_tick(tick, state)
@@ -0,0 +1,74 @@
+import struct
+from operator import itemgetter
+from typing import Any, Mapping, Sequence
+from irsdk import VAR_TYPE_MAP
+
+
+class FieldReader:
+    """Reads a fixed set of telemetry vars out of a var buffer in one pass.
+
+    Offsets and types are resolved once against the var headers, and the
+    whole set is decoded with a single struct.unpack_from straight from the
+    buffer memory. Fields that aren't telemetry vars (session info sections
+    and the like) are listed in `missing` for the caller to fill in.
+    """
+
+    def __init__(self, fields: Sequence[str], var_headers: Mapping[str, Any]):
+        self.fields: tuple[str, ...] = tuple(fields)
+        self.var_headers = var_headers
+        self.missing: list[tuple[int, str]] = []
+
+        located = []
+        for pos, name in enumerate(self.fields):
+            header = var_headers.get(name)
+            if header is None:
+                self.missing.append((pos, name))
+            else:
+                located.append((header.offset, pos, VAR_TYPE_MAP[header.type], header.count))
+        located.sort()
+
+        self.base_offset: int = located[0][0] if located else 0
+
+        fmt = "<"
+        cursor = self.base_offset
+        value_idx = 0
+        # fields without a var point at value 0 until the caller overwrites them
+        gather = [0] * len(self.fields)
+        self._arrays: list[tuple[int, int, int]] = []
+
+        for offset, pos, code, count in located:
+            if offset > cursor:
+                fmt += f"{offset - cursor}x"
+            fmt += f"{count}{code}" if count > 1 else code
+            cursor = offset + struct.calcsize("<" + code) * count
+
+            if count > 1:
+                self._arrays.append((pos, value_idx, value_idx + count))
+            else:
+                gather[pos] = value_idx
+            value_idx += count
+
+        self._struct = struct.Struct(fmt) if located else None
+        self._gather = itemgetter(*gather) if len(gather) > 1 else None
+        self._single = len(gather) == 1
+
+    def matches(self, fields: Sequence[str], var_headers: Mapping[str, Any]) -> bool:
+        return self.var_headers is var_headers and (self.fields is fields or self.fields == tuple(fields))
+
+    def read(self, memory, offset: int, out: list) -> list:
+        """Decode into out (resized in place) and return it."""
+        if self._struct is None:
+            out[:] = [None] * len(self.fields)
+            return out
+
+        values = self._struct.unpack_from(memory, offset + self.base_offset)
+
+        if self._gather is not None:
+            out[:] = self._gather(values)
+        elif self._single:
+            out[:] = values[:1]
+
+        for pos, start, end in self._arrays:
+            out[pos] = list(values[start:end])
+
+        return out
@@ -0,0 +1,182 @@
+import struct
+import time
+from typing import Optional, Sequence
+import irsdk
+import yaml
+from src.telemetry.field_reader import FieldReader
+from src.telemetry.session_info import (
+    SessionInfoCache,
+    SESSION_INFO_KEYS,
+    SESSION_INFO_UPDATE,
+    parse_session_info,
+)
+
+# telemetry vars that live sessions expose but .ibt files don't record,
+# mapped to the DriverInfo entry that carries the same value
+DRIVER_INFO_FALLBACKS = {
+    "PlayerCarIdx": "DriverCarIdx",
+}
+
+
+class Pacer:
+    """Holds a sample stream to wall clock time at a multiple of real time.
+
+    speed=None never waits, speed=1.0 is real time and speed=N is N x real time.
+    Targets are absolute, so the pace doesn't drift with per-sample processing time.
+    """
+
+    def __init__(self, tick_rate: float, speed: Optional[float] = None):
+        self.tick_rate = tick_rate
+        self.speed = speed
+        self._start: Optional[float] = None
+        self._first_index = 0
+
+    def reset(self, index: int = 0):
+        self._start = None
+        self._first_index = index
+
+    def wait(self, index: int):
+        if not self.speed:
+            return
+
+        now = time.monotonic()
+        if self._start is None:
+            self._start = now
+            self._first_index = index
+            return
+
+        target = self._start + (index - self._first_index) / (self.tick_rate * self.speed)
+        if target > now:
+            time.sleep(target - now)
+
+
+class IBTClient:
+    """IRacingClient-compatible source backed by an iRacing .ibt disk telemetry file.
+
+    Every call to update() advances one record. With speed=None records are
+    delivered as fast as the consumer asks for them; otherwise update() paces
+    them at speed x the file's tick rate. Once the last record has been read
+    the client reports itself disconnected and exhausted.
+    """
+
+    def __init__(self, path: str, speed: Optional[float] = None):
+        self.path = path
+        self.ibt = irsdk.IBT()
+        self.pacer: Optional[Pacer] = None
+        self.speed = speed
+
+        self.record_count: int = 0
+        self._session_doc: dict = {}
+        self.session_info = SessionInfoCache(self._session_doc.get)
+
+        self.reader: Optional[FieldReader] = None
+
+        self._opened = False
+        self._index: int = -1
+        self._record_offset: int = 0
+
+    def connect(self) -> bool:
+        if not self._opened:
+            self.ibt.open(self.path)
+            self._opened = True
+
+            header = self.ibt._header
+            self.record_count = self.ibt._disk_header.session_record_count
+            self._session_doc = self._read_session_info()
+            self.session_info = SessionInfoCache(self._session_doc.get)
+            self.session_info.refresh(header.session_info_update)
+            self.pacer = Pacer(header.tick_rate or 60, self.speed)
+            self._index = -1
+
+        return self.is_connected
+
+    def disconnect(self):
+        if self._opened:
+            self.ibt.close()
+            self._opened = False
+            self.reader = None
+
+    @property
+    def is_connected(self) -> bool:
+        return self._opened and self._index + 1 < self.record_count
+
+    @property
+    def is_exhausted(self) -> bool:
+        return self._opened and self._index + 1 >= self.record_count
+
+    @property
+    def tick(self) -> int:
+        return self._index
+
+    def update(self):
+        if self._index + 1 >= self.record_count:
+            return
+
+        self._index += 1
+        self.pacer.wait(self._index)
+
+        header = self.ibt._header
+        self._record_offset = header.var_buf[0].buf_offset + self._index * header.buf_len
+
+    def seek(self, index: int):
+        """Position the file so the next update() loads the given record."""
+        self._index = max(-1, min(index, self.record_count) - 1)
+        self.pacer.reset(index)
+
+    def _read_session_info(self) -> dict:
+        header = self.ibt._header
+        start = header.session_info_offset
+        raw = self.ibt._shared_mem[start : start + header.session_info_len]
+
+        try:
+            return parse_session_info(raw)
+        except yaml.YAMLError:
+            return {}
+
+    def get(self, key: str, default: any = None) -> any:
+        var_header = self.ibt._var_headers_dict.get(key)
+
+        if var_header is not None and self._index >= 0:
+            res = struct.unpack_from(
+                irsdk.VAR_TYPE_MAP[var_header.type] * var_header.count,
+                self.ibt._shared_mem,
+                self._record_offset + var_header.offset,
+            )
+            return res[0] if var_header.count == 1 else list(res)
+
+        if key in SESSION_INFO_KEYS:
+            return self.session_info.get(key, default)
+        if key == SESSION_INFO_UPDATE:
+            return self.session_info.version
+        if key in DRIVER_INFO_FALLBACKS:
+            return self.session_info.get("DriverInfo", {}).get(DRIVER_INFO_FALLBACKS[key], default)
+
+        return default
+
+    def read_fields(self, fields: Sequence[str], out: Optional[list] = None) -> list:
+        out = [] if out is None else out
+        var_headers = self.ibt._var_headers_dict
+
+        if self.reader is None or not self.reader.matches(fields, var_headers):
+            self.reader = FieldReader(fields, var_headers)
+
+        self.reader.read(self.ibt._shared_mem, self._record_offset, out)
+
+        for pos, key in self.reader.missing:
+            out[pos] = self.get(key)
+
+        return out
+
+    def get_driver_name(self, car_idx: Optional[int]) -> Optional[str]:
+        return self.session_info.get_driver_name(car_idx)
+
+    def get_yaml(self, key: str) -> dict:
+        raw = self.get(key)
+
+        if isinstance(raw, dict):
+            return raw
+
+        try:
+            return yaml.safe_load(raw) or {}
+        except Exception:
+            return {}
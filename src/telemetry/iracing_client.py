@@ -1,30 +1,72 @@
+from typing import Optional, Sequence
 import irsdk
 import yaml
+from src.telemetry.field_reader import FieldReader
+from src.telemetry.session_info import SessionInfoCache, SESSION_INFO_KEYS, SESSION_INFO_UPDATE
 
 
 class IRacingClient:
     def __init__(self):
         self.ir = irsdk.IRSDK()
+        # pyirsdk parses the YAML section, the cache makes sure that only
+        # happens again once iRacing bumps SessionInfoUpdate
+        self.session_info = SessionInfoCache(lambda key: self.ir[key])
+        self.reader: Optional[FieldReader] = None
 
     def connect(self) -> bool:
+        self.session_info.clear()
+        self.reader = None
         return self.ir.startup()
 
     def disconnect(self):
         self.ir.shutdown()
+        self.session_info.clear()
+        self.reader = None
 
     @property
     def is_connected(self) -> bool:
         return self.ir.is_initialized and self.ir.is_connected
 
+    @property
+    def is_exhausted(self) -> bool:
+        # a live sim can always come back, only recorded sources run out
+        return False
+
     def update(self):
         self.ir.freeze_var_buffer_latest()
+        self.session_info.refresh(self.ir.session_info_update)
 
     def get(self, key: str, default: any = None) -> any:
+        if key in SESSION_INFO_KEYS:
+            return self.session_info.get(key, default)
+        if key == SESSION_INFO_UPDATE:
+            return self.session_info.version
+
         try:
             return self.ir[key]
         except KeyError:
             return default
 
+    def read_fields(self, fields: Sequence[str], out: Optional[list] = None) -> list:
+        """Values for fields, in order, read from the frozen var buffer in one pass."""
+        out = [] if out is None else out
+        var_headers = self.ir._var_headers_dict
+
+        if self.reader is None or not self.reader.matches(fields, var_headers):
+            self.reader = FieldReader(fields, var_headers)
+
+        # pyirsdk keeps the buffer frozen by freeze_var_buffer_latest() name-mangled
+        buf = self.ir._IRSDK__var_buffer_latest or self.ir._var_buffer_latest
+        self.reader.read(buf.get_memory(), buf.buf_offset, out)
+
+        for pos, key in self.reader.missing:
+            out[pos] = self.get(key)
+
+        return out
+
+    def get_driver_name(self, car_idx: Optional[int]) -> Optional[str]:
+        return self.session_info.get_driver_name(car_idx)
+
     def get_yaml(self, key: str) -> dict:
         raw = self.get(key)
 
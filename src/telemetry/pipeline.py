@@ -0,0 +1,189 @@
+import logging
+import threading
+import time
+from typing import TYPE_CHECKING, Optional
+from src.fsm.driver_fsm import InvalidTransition
+from src.metrics.registry import REGISTRY
+from src.metrics.tracing import TRACER
+from src.telemetry.change_tracker import ChangeTracker
+from src.telemetry.tick import TickRecord, TickSchema
+
+if TYPE_CHECKING:
+    from src.fsm.driver_fsm import DriverFSM
+
+logger = logging.getLogger(__name__)
+
+# what a slot carries
+TICK = 0
+CONNECTED = 1
+DISCONNECTED = 2
+STOP = 3
+
+# what the reader does with a tick when the ring is full:
+# "coalesce" skips the managers for it; its FSM triggers ride along with the
+#            next tick that fits, and the next dispatch picks up every field
+#            that changed in between (the diff is against the last tick
+#            dispatched, not the last one sampled)
+# "block"    waits for the managers to catch up; for replays, where every
+#            tick should be processed and sampling jitter doesn't matter
+OVERFLOW_POLICIES = ("coalesce", "block")
+
+MANAGER_SECONDS = REGISTRY.histogram(
+    "manager_stage_seconds",
+    "Time the manager stage spends on one tick (FSM triggers and managers' on_tick).",
+)
+COALESCED_TICKS = REGISTRY.counter(
+    "pipeline_coalesced_ticks_total",
+    "Ticks the managers skipped because the pipeline was full.",
+)
+
+
+class Slot:
+    """One reusable entry in a TickRing."""
+
+    __slots__ = ("kind", "tick", "triggers", "sampled_at")
+
+    def __init__(self):
+        self.kind: int = TICK
+        self.tick: Optional[TickRecord] = None
+        # FSM trigger ids detected on this tick (and on any coalesced before it)
+        self.triggers: list[int] = []
+        # time.perf_counter() when the tick was sampled
+        self.sampled_at: float = 0.0
+
+    def record(self, schema: TickSchema) -> TickRecord:
+        """The slot's tick record, rebuilt only when the schema changes."""
+        if self.tick is None or self.tick.schema is not schema:
+            self.tick = TickRecord(schema)
+        return self.tick
+
+
+class TickRing:
+    """Bounded single-producer/single-consumer ring of reusable slots.
+
+    The producer claim()s the next free slot, fills it in place and
+    publish()es it; the consumer take()s the oldest published slot and
+    release()s it when it's done, after which the producer may reuse it.
+    Each side only moves its own index. Two semaphores count the free and
+    published slots, so neither side spins while waiting for the other.
+    """
+
+    def __init__(self, capacity: int):
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+
+        self.capacity = capacity
+        self.slots = [Slot() for _ in range(capacity)]
+
+        self._write = 0
+        self._read = 0
+        self._published_count = 0
+        self._released_count = 0
+        self._free = threading.Semaphore(capacity)
+        self._published = threading.Semaphore(0)
+
+    def __len__(self) -> int:
+        """Slots published and not yet released."""
+        return self._published_count - self._released_count
+
+    def claim(self, block: bool = True) -> Optional[Slot]:
+        """The next free slot, or None if the ring is full and block is False."""
+        if not self._free.acquire(block):
+            return None
+        return self.slots[self._write]
+
+    def publish(self):
+        self._write = (self._write + 1) % self.capacity
+        self._published_count += 1
+        self._published.release()
+
+    def take(self, timeout: Optional[float] = None) -> Optional[Slot]:
+        """The oldest published slot; None if nothing was published within `timeout`."""
+        if not self._published.acquire(timeout=timeout):
+            return None
+        return self.slots[self._read]
+
+    def release(self):
+        self._read = (self._read + 1) % self.capacity
+        self._released_count += 1
+        self._free.release()
+
+
+class ManagerStage:
+    """Consumer side of the telemetry pipeline, on its own thread.
+
+    For each tick the reader publishes it runs the tick's FSM triggers (and
+    so the managers' event handlers), then forwards what changed to the
+    managers' on_tick, the same order the loop used to run them in. Connect
+    and disconnect arrive as their own slots. An error in one tick is
+    logged and the stage carries on, so a manager bug can't stall the ring.
+    """
+
+    def __init__(self, fsm: "DriverFSM", ring: TickRing):
+        self.fsm = fsm
+        self.ring = ring
+
+        self._change_tracker: Optional[ChangeTracker] = None
+        self._seconds = MANAGER_SECONDS.labels()
+
+    def _get_change_tracker(self) -> ChangeTracker:
+        # rebuilt only when attach_managers() swaps in a new schema
+        schema = self.fsm.tick_schema
+        if self._change_tracker is None or self._change_tracker.schema is not schema:
+            self._change_tracker = ChangeTracker(schema, self.fsm.managers)
+        return self._change_tracker
+
+    def run(self):
+        while True:
+            slot = self.ring.take()
+            # read before release, after which the reader may reuse the slot
+            kind = slot.kind
+            try:
+                self._process(slot)
+            except Exception:
+                logger.exception("Error processing telemetry tick")
+            finally:
+                self.ring.release()
+
+            if kind == STOP:
+                return
+
+    def _run_triggers(self, triggers: list[int]):
+        for trigger_id in triggers:
+            try:
+                self.fsm.trigger(trigger_id)
+            except InvalidTransition as e:
+                logger.warning("%s", e)
+
+    def _process(self, slot: Slot):
+        fsm = self.fsm
+
+        if slot.kind != TICK:
+            # triggers from ticks coalesced just before this
+            self._run_triggers(slot.triggers)
+
+            if slot.kind == CONNECTED:
+                if fsm.last_state:
+                    fsm.reconnect()
+                else:
+                    fsm.connect()
+            elif slot.kind == DISCONNECTED:
+                fsm.save_state()
+                fsm.disconnect()
+                self._get_change_tracker().reset()
+            return
+
+        start = time.perf_counter()
+        tick = slot.tick
+        fsm.last_telem = tick
+        # tasks queued for this tick are traced from when it was sampled
+        TRACER.tick_started = slot.sampled_at
+
+        try:
+            self._run_triggers(slot.triggers)
+
+            # update managers with whatever changed since the last tick they saw
+            self._get_change_tracker().dispatch(tick, fsm.state)
+        finally:
+            TRACER.tick_started = None
+            self._seconds.observe(time.perf_counter() - start)
@@ -0,0 +1,359 @@
+import json
+import mmap
+import struct
+import zlib
+from bisect import bisect_right
+from typing import Any, BinaryIO, Iterator, Mapping, Optional
+
+# File layout:
+#   header  : magic, version, chunk size, field count, field names
+#   chunks  : u32 length + zlib compressed tick records
+#   index   : one entry per chunk (file offset, first tick, tick count, first SessionTime)
+#   footer  : index offset, chunk count, tick count, magic
+#
+# Each tick record is a bitmask of the fields that changed since the previous
+# tick followed by a tagged value for every set bit. The first tick of every
+# chunk is a keyframe holding all fields, so any chunk can be decoded on its own.
+
+MAGIC = b"IRST"
+FOOTER_MAGIC = b"IRSX"
+VERSION = 1
+DEFAULT_CHUNK_TICKS = 3600  # one minute at 60 Hz
+
+HEADER = struct.Struct("<4sHIH")
+FIELD_NAME = struct.Struct("<H")
+CHUNK_LEN = struct.Struct("<I")
+INDEX_ENTRY = struct.Struct("<QIId")
+FOOTER = struct.Struct("<QIQ4s")
+
+FLOAT32 = struct.Struct("<f")
+FLOAT64 = struct.Struct("<d")
+
+TIME_FIELD = "SessionTime"
+
+TAG_NONE = 0
+TAG_FALSE = 1
+TAG_TRUE = 2
+TAG_INT = 3
+TAG_INT_DELTA = 4
+TAG_FLOAT32 = 5
+TAG_FLOAT64 = 6
+TAG_STR = 7
+TAG_JSON = 8
+
+
+def _write_varint(buf: bytearray, value: int):
+    while value > 0x7F:
+        buf.append((value & 0x7F) | 0x80)
+        value >>= 7
+    buf.append(value)
+
+
+def _read_varint(data: bytes, pos: int) -> tuple[int, int]:
+    result = 0
+    shift = 0
+    while True:
+        b = data[pos]
+        pos += 1
+        result |= (b & 0x7F) << shift
+        if b < 0x80:
+            return result, pos
+        shift += 7
+
+
+def _zigzag(value: int) -> int:
+    return value << 1 if value >= 0 else ((-value) << 1) - 1
+
+
+def _unzigzag(value: int) -> int:
+    return value >> 1 if not value & 1 else -((value + 1) >> 1)
+
+
+def _unchanged(value: Any, prev: Any) -> bool:
+    # session info dicts are cached by the SDK, so identity usually short-circuits
+    return value is prev or (type(value) is type(prev) and value == prev)
+
+
+def _encode_value(buf: bytearray, value: Any, prev: Any):
+    if value is None:
+        buf.append(TAG_NONE)
+    elif value is True:
+        buf.append(TAG_TRUE)
+    elif value is False:
+        buf.append(TAG_FALSE)
+    elif isinstance(value, int):
+        if type(prev) is int:
+            buf.append(TAG_INT_DELTA)
+            _write_varint(buf, _zigzag(value - prev))
+        else:
+            buf.append(TAG_INT)
+            _write_varint(buf, _zigzag(value))
+    elif isinstance(value, float):
+        packed = FLOAT32.pack(value) if abs(value) < 3.4e38 else None
+        if packed is not None and FLOAT32.unpack(packed)[0] == value:
+            buf.append(TAG_FLOAT32)
+            buf += packed
+        else:
+            buf.append(TAG_FLOAT64)
+            buf += FLOAT64.pack(value)
+    elif isinstance(value, str):
+        raw = value.encode("utf-8")
+        buf.append(TAG_STR)
+        _write_varint(buf, len(raw))
+        buf += raw
+    else:
+        raw = json.dumps(value, separators=(",", ":"), default=str).encode("utf-8")
+        buf.append(TAG_JSON)
+        _write_varint(buf, len(raw))
+        buf += raw
+
+
+def _decode_value(data: bytes, pos: int, prev: Any) -> tuple[Any, int]:
+    tag = data[pos]
+    pos += 1
+
+    if tag == TAG_FLOAT32:
+        return FLOAT32.unpack_from(data, pos)[0], pos + 4
+    if tag == TAG_INT_DELTA:
+        raw, pos = _read_varint(data, pos)
+        return prev + _unzigzag(raw), pos
+    if tag == TAG_TRUE:
+        return True, pos
+    if tag == TAG_FALSE:
+        return False, pos
+    if tag == TAG_NONE:
+        return None, pos
+    if tag == TAG_INT:
+        raw, pos = _read_varint(data, pos)
+        return _unzigzag(raw), pos
+    if tag == TAG_FLOAT64:
+        return FLOAT64.unpack_from(data, pos)[0], pos + 8
+
+    length, pos = _read_varint(data, pos)
+    raw = bytes(data[pos : pos + length])
+    pos += length
+
+    if tag == TAG_STR:
+        return raw.decode("utf-8"), pos
+    if tag == TAG_JSON:
+        return json.loads(raw), pos
+
+    raise ValueError(f"Unknown value tag {tag} in telemetry recording")
+
+
+class TelemetryRecorder:
+    """Writes ticks to a compact, chunked, delta-encoded recording file."""
+
+    def __init__(
+        self,
+        path: str,
+        chunk_ticks: int = DEFAULT_CHUNK_TICKS,
+        compress_level: int = 6,
+    ):
+        self.path = path
+        self.chunk_ticks = chunk_ticks
+        self.compress_level = compress_level
+
+        self.fields: Optional[tuple[str, ...]] = None
+        self.tick_count: int = 0
+
+        self._file: Optional[BinaryIO] = open(path, "wb")
+        self._index: list[tuple[int, int, int, float]] = []
+        self._chunk = bytearray()
+        self._chunk_ticks = 0
+        self._chunk_first_tick = 0
+        self._chunk_first_time = float("nan")
+        self._prev: list[Any] = []
+        self._time_pos: Optional[int] = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def _write_header(self, fields: tuple[str, ...]):
+        self.fields = fields
+        self._time_pos = fields.index(TIME_FIELD) if TIME_FIELD in fields else None
+        self._prev = [None] * len(fields)
+
+        self._file.write(HEADER.pack(MAGIC, VERSION, self.chunk_ticks, len(fields)))
+        for name in fields:
+            raw = name.encode("utf-8")
+            self._file.write(FIELD_NAME.pack(len(raw)))
+            self._file.write(raw)
+
+    def write_tick(self, tick: Mapping[str, Any]):
+        """Append one tick. The field layout is fixed by the first tick written."""
+        if self.fields is None:
+            self._write_header(tuple(tick))
+
+        keyframe = self._chunk_ticks == 0
+        prev = self._prev
+        buf = self._chunk
+        mask = 0
+        values = []
+
+        for i, name in enumerate(self.fields):
+            value = tick.get(name)
+            if keyframe or not _unchanged(value, prev[i]):
+                mask |= 1 << i
+                values.append((value, None if keyframe else prev[i]))
+            prev[i] = value
+
+        buf += mask.to_bytes((len(self.fields) + 7) // 8, "little")
+        for value, last in values:
+            _encode_value(buf, value, last)
+
+        if keyframe:
+            self._chunk_first_tick = self.tick_count
+            if self._time_pos is not None and isinstance(prev[self._time_pos], float):
+                self._chunk_first_time = prev[self._time_pos]
+
+        self._chunk_ticks += 1
+        self.tick_count += 1
+
+        if self._chunk_ticks >= self.chunk_ticks:
+            self._flush_chunk()
+
+    def _flush_chunk(self):
+        if not self._chunk_ticks:
+            return
+
+        compressed = zlib.compress(bytes(self._chunk), self.compress_level)
+        offset = self._file.tell()
+        self._file.write(CHUNK_LEN.pack(len(compressed)))
+        self._file.write(compressed)
+
+        self._index.append(
+            (offset, self._chunk_first_tick, self._chunk_ticks, self._chunk_first_time)
+        )
+
+        self._chunk = bytearray()
+        self._chunk_ticks = 0
+        self._chunk_first_time = float("nan")
+
+    def close(self):
+        if self._file is None:
+            return
+
+        if self.fields is None:
+            self._write_header(())
+
+        self._flush_chunk()
+
+        index_offset = self._file.tell()
+        for entry in self._index:
+            self._file.write(INDEX_ENTRY.pack(*entry))
+        self._file.write(
+            FOOTER.pack(index_offset, len(self._index), self.tick_count, FOOTER_MAGIC)
+        )
+
+        self._file.close()
+        self._file = None
+
+
+class TelemetryRecording:
+    """Memory-mapped, random-access reader for files written by TelemetryRecorder."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "rb")
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, self.chunk_ticks, field_count = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError(f"{path} is not a telemetry recording")
+
+        pos = HEADER.size
+        fields = []
+        for _ in range(field_count):
+            (length,) = FIELD_NAME.unpack_from(self._mm, pos)
+            pos += FIELD_NAME.size
+            fields.append(self._mm[pos : pos + length].decode("utf-8"))
+            pos += length
+        self.fields: tuple[str, ...] = tuple(fields)
+        self.field_index: dict[str, int] = {name: i for i, name in enumerate(fields)}
+
+        index_offset, chunk_count, self.tick_count, footer_magic = FOOTER.unpack_from(
+            self._mm, len(self._mm) - FOOTER.size
+        )
+        if footer_magic != FOOTER_MAGIC:
+            self.close()
+            raise ValueError(f"{path} is truncated (recording was not closed)")
+
+        self.index: list[tuple[int, int, int, float]] = [
+            INDEX_ENTRY.unpack_from(self._mm, index_offset + i * INDEX_ENTRY.size)
+            for i in range(chunk_count)
+        ]
+        self._chunk_starts = [entry[1] for entry in self.index]
+
+    def __len__(self) -> int:
+        return self.tick_count
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self):
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def chunk_of_tick(self, tick: int) -> int:
+        return bisect_right(self._chunk_starts, tick) - 1
+
+    def chunk_of_time(self, session_time: float) -> int:
+        """Last chunk starting at or before session_time (chunk times are ascending)."""
+        lo, hi = 0, len(self.index)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.index[mid][3] <= session_time:
+                lo = mid + 1
+            else:
+                hi = mid
+        return max(lo - 1, 0)
+
+    def read_chunk(self, chunk: int) -> bytes:
+        offset = self.index[chunk][0]
+        (length,) = CHUNK_LEN.unpack_from(self._mm, offset)
+        start = offset + CHUNK_LEN.size
+        return zlib.decompress(self._mm[start : start + length])
+
+    def decode_tick(self, data: bytes, pos: int, values: list[Any]) -> int:
+        """Apply the tick record at pos to values in place; returns the next position."""
+        mask_len = (len(self.fields) + 7) // 8
+        mask = int.from_bytes(data[pos : pos + mask_len], "little")
+        pos += mask_len
+
+        i = 0
+        while mask:
+            if mask & 1:
+                values[i], pos = _decode_value(data, pos, values[i])
+            mask >>= 1
+            i += 1
+
+        return pos
+
+    def iter_ticks(self, start: int = 0) -> Iterator[list[Any]]:
+        """Yield tick values in field order. The same list is reused between ticks."""
+        if start >= self.tick_count:
+            return
+
+        values: list[Any] = [None] * len(self.fields)
+        first_chunk = self.chunk_of_tick(start)
+
+        for chunk in range(first_chunk, len(self.index)):
+            data = self.read_chunk(chunk)
+            _, first_tick, count, _ = self.index[chunk]
+            pos = 0
+            for tick in range(first_tick, first_tick + count):
+                pos = self.decode_tick(data, pos, values)
+                if tick >= start:
+                    yield values
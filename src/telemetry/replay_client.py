@@ -0,0 +1,185 @@
+from operator import itemgetter
+from typing import Any, Optional, Sequence
+import yaml
+from src.telemetry.recording import TelemetryRecording, TIME_FIELD
+from src.telemetry.session_info import SessionInfoCache, SESSION_INFO_KEYS, SESSION_INFO_UPDATE
+
+
+class ReplayClient:
+    """Drop-in replacement for IRacingClient that plays back a TelemetryRecorder file.
+
+    Every call to update() advances one recorded tick. Once the recording is
+    exhausted the client reports itself as disconnected and is_exhausted is set,
+    which tells the TelemetryLoop to stop instead of waiting for a reconnect.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.recording: Optional[TelemetryRecording] = None
+
+        self._values: list[Any] = []
+        self._chunk: Optional[int] = None
+        self._chunk_data: bytes = b""
+        self._chunk_end: int = 0
+        self._pos: int = 0
+        self._next_tick: int = 0
+
+        self.session_info = SessionInfoCache(self._get_recorded)
+        self._update_pos: Optional[int] = None
+        self._read_plan: Optional[tuple] = None
+        self._section_positions: tuple[int, ...] = ()
+
+    def connect(self) -> bool:
+        if self.recording is None:
+            self.recording = TelemetryRecording(self.path)
+            self._values = [None] * len(self.recording.fields)
+
+            field_index = self.recording.field_index
+            self._update_pos = field_index.get(SESSION_INFO_UPDATE)
+            self._section_positions = tuple(
+                i for key, i in field_index.items() if key in SESSION_INFO_KEYS
+            )
+        return self.is_connected
+
+    def disconnect(self):
+        if self.recording is not None:
+            self.recording.close()
+            self.recording = None
+        self._chunk = None
+        self._chunk_data = b""
+
+    @property
+    def is_connected(self) -> bool:
+        return self.recording is not None and self._next_tick < self.recording.tick_count
+
+    @property
+    def is_exhausted(self) -> bool:
+        return self.recording is not None and self._next_tick >= self.recording.tick_count
+
+    @property
+    def tick(self) -> int:
+        """Index of the tick currently loaded, -1 before the first update()."""
+        return self._next_tick - 1
+
+    def update(self):
+        recording = self.recording
+
+        if self._next_tick >= recording.tick_count:
+            return
+
+        if self._chunk is None or self._next_tick >= self._chunk_end:
+            self._load_chunk(recording.chunk_of_tick(self._next_tick))
+
+        self._pos = recording.decode_tick(self._chunk_data, self._pos, self._values)
+        self._next_tick += 1
+        self._refresh_session_info()
+
+    def _refresh_session_info(self):
+        values = self._values
+
+        if self._update_pos is not None:
+            self.session_info.refresh(values[self._update_pos])
+        else:
+            # recorded sections are only re-decoded when they changed
+            self.session_info.refresh(tuple(id(values[i]) for i in self._section_positions))
+
+    def _load_chunk(self, chunk: int):
+        _, first_tick, count, _ = self.recording.index[chunk]
+        self._chunk = chunk
+        self._chunk_data = self.recording.read_chunk(chunk)
+        self._chunk_end = first_tick + count
+        self._pos = 0
+        self._next_tick = first_tick
+
+    def seek(self, tick: int):
+        """Position the replay so the next update() loads the given tick."""
+        recording = self.recording
+        tick = max(0, min(tick, recording.tick_count))
+
+        if tick == recording.tick_count:
+            self._chunk = None
+            self._next_tick = tick
+            return
+
+        self._load_chunk(recording.chunk_of_tick(tick))
+        while self._next_tick < tick:
+            self._pos = recording.decode_tick(self._chunk_data, self._pos, self._values)
+            self._next_tick += 1
+
+    def seek_time(self, session_time: float):
+        """Position the replay so the next update() loads the first tick at or after session_time."""
+        recording = self.recording
+        time_pos = recording.field_index.get(TIME_FIELD)
+        if time_pos is None:
+            raise KeyError(f"Recording has no {TIME_FIELD} channel")
+
+        if not recording.index:
+            self.seek(0)
+            return
+
+        self._load_chunk(recording.chunk_of_time(session_time))
+        while self._next_tick < self._chunk_end:
+            pos = recording.decode_tick(self._chunk_data, self._pos, self._values)
+            current = self._values[time_pos]
+            if current is not None and current >= session_time:
+                # rewind one tick so update() reloads this one
+                self.seek(self._next_tick)
+                return
+            self._pos = pos
+            self._next_tick += 1
+
+        self.seek(self._chunk_end)
+
+    def _get_recorded(self, key: str) -> any:
+        idx = self.recording.field_index.get(key) if self.recording else None
+        if idx is None:
+            return None
+        return self._values[idx]
+
+    def get(self, key: str, default: any = None) -> any:
+        if key in SESSION_INFO_KEYS:
+            return self.session_info.get(key, default)
+
+        idx = self.recording.field_index.get(key) if self.recording else None
+        if idx is None:
+            return default
+        return self._values[idx]
+
+    def read_fields(self, fields: Sequence[str], out: Optional[list] = None) -> list:
+        out = [] if out is None else out
+        plan = self._read_plan
+
+        if plan is None or plan[0] != fields:
+            field_index = self.recording.field_index
+            positions = []
+            missing = []
+            for pos, key in enumerate(fields):
+                idx = field_index.get(key)
+                if idx is None or key in SESSION_INFO_KEYS:
+                    missing.append((pos, key))
+                    idx = 0
+                positions.append(idx)
+            # the trailing 0 keeps itemgetter returning a tuple for single-field reads
+            plan = self._read_plan = (tuple(fields), itemgetter(*positions, 0), missing)
+
+        _, gather, missing = plan
+        out[:] = gather(self._values)[:-1]
+
+        for pos, key in missing:
+            out[pos] = self.get(key)
+
+        return out
+
+    def get_driver_name(self, car_idx: Optional[int]) -> Optional[str]:
+        return self.session_info.get_driver_name(car_idx)
+
+    def get_yaml(self, key: str) -> dict:
+        raw = self.get(key)
+
+        if isinstance(raw, dict):
+            return raw
+
+        try:
+            return yaml.safe_load(raw) or {}
+        except Exception:
+            return {}
@@ -0,0 +1,139 @@
+import math
+from typing import TYPE_CHECKING, Optional, Sequence
+import numpy as np
+
+if TYPE_CHECKING:
+    from src.telemetry.tick import TickRecord, TickSchema
+
+TIME_CHANNEL = "SessionTime"
+HISTORY_CHANNELS = ("SessionTime", "FuelLevel", "LapDistPct", "Speed", "OnPitRoad")
+
+
+class TelemetryRingBuffer:
+    """Preallocated history of the last `seconds` of high-rate channels.
+
+    Samples live in one (channels x capacity) float64 array written in place,
+    so appends are O(1) and memory stays flat however long the race runs.
+    Queries are vectorized over the two contiguous halves of the ring and
+    return views whenever the window doesn't wrap. Booleans are stored as
+    0.0/1.0 and missing values as NaN. SessionTime restarts with every
+    iRacing session, so the buffer clears itself when time goes backwards.
+    """
+
+    def __init__(
+        self,
+        seconds: float = 600.0,
+        hz: int = 60,
+        channels: Sequence[str] = HISTORY_CHANNELS,
+    ):
+        if TIME_CHANNEL not in channels:
+            raise ValueError(f"History channels must include {TIME_CHANNEL}")
+
+        self.channels: tuple[str, ...] = tuple(channels)
+        self.rows: dict[str, int] = {name: i for i, name in enumerate(self.channels)}
+        self.capacity: int = max(1, int(seconds * hz))
+
+        self._data = np.full((len(self.channels), self.capacity), np.nan, dtype=np.float64)
+        self._time_row = self.rows[TIME_CHANNEL]
+        self._head = 0
+        self._count = 0
+        self._last_time = -math.inf
+
+        self._schema: Optional["TickSchema"] = None
+        self._positions: tuple[int, ...] = ()
+
+    def __len__(self) -> int:
+        return self._count
+
+    def clear(self):
+        self._head = 0
+        self._count = 0
+        self._last_time = -math.inf
+
+    def append(self, sample: Sequence[Optional[float]]):
+        """Append one sample, given in channel order."""
+        session_time = sample[self._time_row]
+        if session_time is None:
+            return
+        if session_time < self._last_time:
+            self.clear()
+        self._last_time = session_time
+
+        col = self._data[:, self._head]
+        for row, value in enumerate(sample):
+            col[row] = math.nan if value is None else value
+
+        self._head = (self._head + 1) % self.capacity
+        if self._count < self.capacity:
+            self._count += 1
+
+    def append_tick(self, tick: "TickRecord"):
+        if tick.schema is not self._schema:
+            self._schema = tick.schema
+            self._positions = tuple(tick.schema.index[name] for name in self.channels)
+
+        values = tick.values
+        self.append([values[i] for i in self._positions])
+
+    def _segments(self) -> tuple[np.ndarray, ...]:
+        """The ring as chronological, contiguous views."""
+        if self._count < self.capacity:
+            return (self._data[:, : self._count],)
+        return (self._data[:, self._head :], self._data[:, : self._head])
+
+    def _join(self, parts: list[np.ndarray]) -> dict[str, np.ndarray]:
+        if not parts:
+            block = np.empty((len(self.channels), 0))
+        elif len(parts) == 1:
+            block = parts[0]
+        else:
+            block = np.concatenate(parts, axis=1)
+        return {name: block[row] for name, row in self.rows.items()}
+
+    def window(self, start: float = -math.inf, end: float = math.inf) -> dict[str, np.ndarray]:
+        """Samples with start <= SessionTime <= end, per channel."""
+        parts = []
+        for seg in self._segments():
+            times = seg[self._time_row]
+            lo = times.searchsorted(start, "left")
+            hi = times.searchsorted(end, "right")
+            if hi > lo:
+                parts.append(seg[:, lo:hi])
+        return self._join(parts)
+
+    def last(self, n: int) -> dict[str, np.ndarray]:
+        """The n most recent samples, per channel."""
+        n = min(n, self._count)
+        parts = []
+        for seg in reversed(self._segments()):
+            if n <= 0:
+                break
+            take = min(n, seg.shape[1])
+            parts.insert(0, seg[:, seg.shape[1] - take :])
+            n -= take
+        return self._join(parts)
+
+    def fuel_used(self, start: float = -math.inf, end: float = math.inf) -> float:
+        """Fuel burned between two SessionTimes; refuelling doesn't count against it."""
+        fuel = self.window(start, end)["FuelLevel"]
+        fuel = fuel[~np.isnan(fuel)]
+        if fuel.size < 2:
+            return 0.0
+        deltas = np.diff(fuel)
+        return float(-deltas[deltas < 0].sum())
+
+    def last_pit_exit(self) -> Optional[float]:
+        """SessionTime of the most recent pit road exit still in the buffer."""
+        samples = self.window()
+        on_pit_road = samples["OnPitRoad"] > 0.5
+        exits = np.flatnonzero(on_pit_road[:-1] & ~on_pit_road[1:])
+        if exits.size == 0:
+            return None
+        return float(samples[TIME_CHANNEL][exits[-1] + 1])
+
+    def since_pit_exit(self) -> Optional[dict[str, np.ndarray]]:
+        """Samples from the most recent pit exit on, or None if there wasn't one."""
+        exit_time = self.last_pit_exit()
+        if exit_time is None:
+            return None
+        return self.window(exit_time)
@@ -0,0 +1,82 @@
+import time
+from typing import Callable, Optional
+from src.fsm.states import States
+
+# loop rates (Hz) for states that don't need the full rate; anything not
+# listed runs at the loop's configured rate
+DEFAULT_STATE_RATES: dict[States, float] = {
+    States.DISCONNECTED: 1.0,
+    States.IDLE: 10.0,
+    States.FINISHED: 1.0,
+}
+
+
+class TickScheduler:
+    """Paces the telemetry loop against monotonic deadlines.
+
+    Deadlines advance by a fixed interval from the previous deadline rather
+    than from when the work finished, so processing time doesn't stretch the
+    period. The interval depends on the FSM state. When a tick runs past its
+    deadline it counts as an overrun, whole periods missed count as skipped
+    frames, and the schedule restarts from now instead of bursting to catch up.
+    """
+
+    def __init__(
+        self,
+        hz: float,
+        state_rates: Optional[dict[States, float]] = None,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        self.hz = hz
+        self.state_rates = DEFAULT_STATE_RATES if state_rates is None else state_rates
+        self.clock = clock
+        self.sleep = sleep
+
+        self.ticks: int = 0
+        self.overruns: int = 0
+        self.skipped_frames: int = 0
+
+        self._deadline: Optional[float] = None
+
+    def interval(self, state: Optional[States]) -> float:
+        """0.0 means unthrottled."""
+        if not self.hz:
+            return 0.0
+
+        hz = min(self.state_rates.get(state, self.hz), self.hz)
+        return 1.0 / hz
+
+    def reset(self):
+        self._deadline = None
+
+    def wait(self, state: Optional[States]):
+        """Block until the next tick is due for the given state."""
+        self.ticks += 1
+        interval = self.interval(state)
+
+        if not interval:
+            return
+
+        now = self.clock()
+
+        if self._deadline is None:
+            self._deadline = now
+
+        deadline = self._deadline + interval
+
+        if now > deadline:
+            self.overruns += 1
+            self.skipped_frames += int((now - deadline) / interval)
+            self._deadline = now
+            return
+
+        self._deadline = deadline
+        self.sleep(deadline - now)
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "ticks": self.ticks,
+            "overruns": self.overruns,
+            "skipped_frames": self.skipped_frames,
+        }
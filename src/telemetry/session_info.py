@@ -0,0 +1,97 @@
+import re
+from typing import Any, Callable, Hashable, Optional
+import irsdk
+import yaml
+from yaml.reader import Reader as YamlReader
+
+SESSION_INFO_UPDATE = "SessionInfoUpdate"
+
+# top level sections of the session info YAML, everything else is a telemetry var
+SESSION_INFO_KEYS = frozenset(
+    {
+        "WeekendInfo",
+        "SessionInfo",
+        "QualifyResultsInfo",
+        "CameraInfo",
+        "RadioInfo",
+        "DriverInfo",
+        "SplitTimeInfo",
+        "CarSetup",
+    }
+)
+
+
+def parse_session_info(raw: bytes) -> dict:
+    """Parse a raw session info YAML blob the same way pyirsdk does for live sessions."""
+    src = raw.translate(irsdk.YAML_TRANSLATER).rstrip(b"\x00").decode(irsdk.YAML_CODE_PAGE)
+    src = re.sub(YamlReader.NON_PRINTABLE, "", src)
+
+    def name_replace(m):
+        return m.group(1) + '"%s"' % re.sub(r'(["\\])', r"\\\1", m.group(2) or m.group(3))
+
+    src = re.sub(
+        r'((?:DriverSetupName|UserName|TeamName|AbbrevName|Initials): )(?:"(.*)"$|(.+))',
+        name_replace,
+        src,
+        flags=re.M,
+    )
+    src = re.sub(r"(\w+: )(,.*)", r'\1"\2"', src)
+
+    return yaml.load(src, Loader=irsdk.CustomYamlSafeLoader) or {}
+
+
+class SessionInfoCache:
+    """Parsed session info sections plus lookups derived from them.
+
+    Sections are parsed lazily through loader and kept until refresh() is
+    called with a different version, which for live sessions is iRacing's
+    SessionInfoUpdate counter. Until then every get() returns the very same
+    dict object, so consumers can compare sections by identity.
+    """
+
+    def __init__(self, loader: Callable[[str], Optional[dict]]):
+        self.loader = loader
+        self.version: Optional[Hashable] = None
+        self.sections: dict[str, Any] = {}
+
+        self._driver_names: Optional[dict[int, str]] = None
+
+    def refresh(self, version: Hashable) -> bool:
+        if version == self.version:
+            return False
+
+        self.version = version
+        self.sections = {}
+        self._driver_names = None
+        return True
+
+    def clear(self):
+        self.refresh(None)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        section = self.sections.get(key)
+
+        if section is None:
+            section = self.loader(key)
+            if section is None:
+                return default
+            self.sections[key] = section
+
+        return section
+
+    @property
+    def driver_names(self) -> dict[int, str]:
+        """CarIdx -> UserName for every car in the session."""
+        if self._driver_names is None:
+            drivers = (self.get("DriverInfo") or {}).get("Drivers") or []
+            self._driver_names = {
+                d["CarIdx"]: d.get("UserName")
+                for d in drivers
+                if isinstance(d, dict) and "CarIdx" in d
+            }
+        return self._driver_names
+
+    def get_driver_name(self, car_idx: Optional[int]) -> Optional[str]:
+        if car_idx is None:
+            return None
+        return self.driver_names.get(int(car_idx))
@@ -1,22 +1,96 @@
+import threading
 import time
-from typing import TYPE_CHECKING, Optional, Any
+from typing import TYPE_CHECKING, Optional
 from irsdk import SessionState, Flags
+from src.fsm.driver_fsm import TRIGGER_IDS
+from src.fsm.states import States
+from src.metrics.registry import REGISTRY
+from src.telemetry.pipeline import (
+    COALESCED_TICKS,
+    CONNECTED,
+    DISCONNECTED,
+    OVERFLOW_POLICIES,
+    STOP,
+    TICK,
+    ManagerStage,
+    Slot,
+    TickRing,
+)
+from src.telemetry.scheduler import TickScheduler
+from src.telemetry.tick import TickRecord
 
 if TYPE_CHECKING:
+    from src.export.exporter import SessionExporter
     from src.fsm.driver_fsm import DriverFSM
+    from src.metrics.profiler import SamplingProfiler
     from src.telemetry.iracing_client import IRacingClient
+    from src.telemetry.recording import TelemetryRecorder
+    from src.telemetry.ring_buffer import TelemetryRingBuffer
+
+TICK_SECONDS = REGISTRY.histogram(
+    "telemetry_tick_seconds",
+    "Time the reader spends sampling one tick (read, record, edge detection), excluding the wait.",
+)
+
+SESSION_START = TRIGGER_IDS["session_start"]
+ENTER_PIT_ROAD = TRIGGER_IDS["enter_pit_road"]
+EXIT_PIT_ROAD = TRIGGER_IDS["exit_pit_road"]
+ENTER_PIT_BOX = TRIGGER_IDS["enter_pit_box"]
+EXIT_PIT_BOX = TRIGGER_IDS["exit_pit_box"]
+DRIVER_SWAP_IN = TRIGGER_IDS["driver_swap_in"]
+DRIVER_SWAP_OUT = TRIGGER_IDS["driver_swap_out"]
+FINISH_SESSION = TRIGGER_IDS["finish_session"]
+
+# 2 s of ticks at 60 Hz
+DEFAULT_PIPELINE_SIZE = 120
 
 
 class TelemetryLoop:
+    """Samples telemetry at a steady rate and hands it to the managers.
+
+    The thread calling run() is the reader: it only samples, records,
+    exports ticks and detects the edges that become FSM triggers. The FSM and managers run on
+    a ManagerStage thread, fed through a bounded TickRing, so however long
+    the managers take doesn't move the next sample. What happens when they
+    fall behind is the `overflow` policy (see OVERFLOW_POLICIES); by
+    default "coalesce" live and "block" when unthrottled (hz=0).
+    """
+
     def __init__(
-        self, ir_client: "IRacingClient", fsm: "DriverFSM", user_name: str, hz: int = 60
+        self,
+        ir_client: "IRacingClient",
+        fsm: "DriverFSM",
+        user_name: str,
+        hz: int = 60,
+        recorder: Optional["TelemetryRecorder"] = None,
+        state_rates: Optional[dict[States, float]] = None,
+        history: Optional["TelemetryRingBuffer"] = None,
+        exporter: Optional["SessionExporter"] = None,
+        profiler: Optional["SamplingProfiler"] = None,
+        pipeline_size: int = DEFAULT_PIPELINE_SIZE,
+        overflow: Optional[str] = None,
     ):
         self.connected: bool = False
 
         self.user_name: str = user_name
         self.ir: "IRacingClient" = ir_client
         self.fsm: "DriverFSM" = fsm
-        self.interval: float = 1.0 / hz
+        # hz=0 runs unthrottled, e.g. when replaying a recording
+        self.scheduler = TickScheduler(hz, state_rates)
+        self.recorder: Optional["TelemetryRecorder"] = recorder
+        self.history: Optional["TelemetryRingBuffer"] = history
+        self.exporter: Optional["SessionExporter"] = exporter
+        # opt-in; samples the thread running run()
+        self.profiler: Optional["SamplingProfiler"] = profiler
+
+        self.overflow = overflow or ("coalesce" if hz else "block")
+        if self.overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy {self.overflow!r}, expected one of {OVERFLOW_POLICIES}")
+        self.ring = TickRing(pipeline_size)
+        self.stage = ManagerStage(fsm, self.ring)
+
+        # set by stop(); run() returns after the tick in progress
+        self.stop_event = threading.Event()
 
         self.prev_on_track: bool = False
         self.prev_on_pit_road: bool = False
@@ -26,38 +100,33 @@ class TelemetryLoop:
         self.final_lap_completed: Optional[bool] = None
         self.prev_driver_name: Optional[str] = user_name
 
-    def _get_current_driver_name(self) -> Optional[str]:
-        try:
-            car_id = int(self.ir.get("PlayerCarIdx"))
-            drivers = self.ir.get("DriverInfo")["Drivers"]
-
-            return drivers[car_id]["UserName"]
-        except Exception:
-            return None
+        # triggers detected but not published yet (the ticks were coalesced)
+        self._triggers: list[int] = []
+        # sampled into when the ring is full
+        self._spare = Slot()
+        self._tick_seconds = TICK_SECONDS.labels()
+        self._coalesced = COALESCED_TICKS.labels()
 
-    def _get_tick_data(self) -> dict[str, Any]:
-        data = {}
-        get = self.ir.get
+    def _get_current_driver_name(self, tick: TickRecord) -> Optional[str]:
+        return self.ir.get_driver_name(tick["PlayerCarIdx"])
 
-        for key in self.fsm.required_fields:
-            try:
-                data[key] = get(key)
-            except Exception:
-                data[key] = None
+    def _get_tick_data(self, slot: Slot) -> TickRecord:
+        # refilled in place, the slot's record is reused every time round the ring
+        tick = slot.record(self.fsm.tick_schema)
+        self.ir.read_fields(tick.schema.fields, tick.values)
+        return tick
 
-        return data
-
-    def _check_race_start(self) -> bool:
+    def _check_race_start(self, tick: TickRecord) -> bool:
         return (
-            self.ir.get("SessionState") == SessionState.racing
-            and self.ir.get("PlayerCarClassPosition") > 0
+            tick["SessionState"] == SessionState.racing
+            and (tick["PlayerCarClassPosition"] or 0) > 0
         )
     
-    def _check_race_end(self) -> bool:
-        flags = self.ir.get("SessionFlags")
-        on_track = self.ir.get("IsOnTrack")
-        tow = self.ir.get("PlayerCarTowTime") > 0.0
-        lap_completed = self.ir.get("LapCompleted")
+    def _check_race_end(self, tick: TickRecord) -> bool:
+        flags = tick["SessionFlags"] or 0
+        on_track = tick["IsOnTrack"]
+        tow = (tick["PlayerCarTowTime"] or 0.0) > 0.0
+        lap_completed = tick["LapCompleted"]
 
         if flags & Flags.checkered:
             if self.final_lap_completed is None:
@@ -72,85 +141,134 @@ class TelemetryLoop:
 
         return False
 
+    def stop(self):
+        """Ask run() to return; it still finishes the managers and closes its outputs."""
+        self.stop_event.set()
+
     def run(self):
-        while not self.session_finished:
+        stage = threading.Thread(target=self.stage.run, name="manager-stage", daemon=True)
+        stage.start()
+        if self.profiler:
+            self.profiler.start()
+        try:
+            self._run()
+        finally:
+            if self.profiler:
+                self.profiler.stop()
+            # the managers finish whatever was sampled before the exporter closes
+            self._publish(STOP)
+            stage.join()
+            if self.recorder:
+                self.recorder.close()
+            if self.exporter:
+                self.exporter.close()
+
+    def _publish(self, kind: int, slot: Optional[Slot] = None, sampled_at: float = 0.0):
+        """Hand a slot to the manager stage, with the triggers waiting to go."""
+        if slot is None:
+            # connection changes and stop always wait for room
+            slot = self.ring.claim()
+
+        slot.kind = kind
+        slot.sampled_at = sampled_at
+        slot.triggers[:] = self._triggers
+        self._triggers.clear()
+        self.ring.publish()
+
+    def _run(self):
+        triggers = self._triggers
+
+        while not self.session_finished and not self.stop_event.is_set():
 
             # connection handling
 
             if not self.connected:
                 if self.ir.connect():
                     self.connected = True
-                    if self.fsm.last_state:
-                        self.fsm.reconnect()
-                    else:
-                        self.fsm.connect()
+                    self._publish(CONNECTED)
+                elif self.ir.is_exhausted:
+                    break
                 else:
-                    time.sleep(self.interval)
+                    self.scheduler.wait(self.fsm.state)
                     continue
 
             if not self.ir.is_connected:
                 self.connected = False
-                self.fsm.save_state()
-                self.fsm.disconnect()
-                time.sleep(self.interval)
+                self._publish(DISCONNECTED)
+                self.scheduler.wait(self.fsm.state)
                 continue
 
             # telemetry reading
 
+            tick_start = time.perf_counter()
+            slot = self.ring.claim(block=self.overflow == "block")
+            coalesced = slot is None
+            if coalesced:
+                slot = self._spare
+
             self.ir.update()
 
-            on_track = bool(self.ir.get("IsOnTrack", False))
-            on_pit_road = bool(self.ir.get("OnPitRoad", False))
-            pit_active = bool(self.ir.get("PitstopActive", False))
-            tow_time = float(self.ir.get("PlayerCarTowTime", 0.0))
-            driver_name = self._get_current_driver_name()
+            tick_data = self._get_tick_data(slot)
+
+            on_track = bool(tick_data["IsOnTrack"])
+            on_pit_road = bool(tick_data["OnPitRoad"])
+            pit_active = bool(tick_data["PitstopActive"])
+            tow_time = float(tick_data["PlayerCarTowTime"] or 0.0)
+            driver_name = self._get_current_driver_name(tick_data)
+
+            # recorded and exported here, so ticks the managers skip aren't lost
+            if self.recorder:
+                self.recorder.write_tick(tick_data)
 
-            tick_data = self._get_tick_data()
+            if self.exporter:
+                self.exporter.write_tick(tick_data)
 
-            self.fsm.last_telem = tick_data
+            if self.history is not None:
+                self.history.append_tick(tick_data)
 
-            # FSM transitions
+            # FSM triggers, run by the manager stage
 
             # session start
-            if self._check_race_start() and not self.session_started:
+            if self._check_race_start(tick_data) and not self.session_started:
                 self.session_started = True
-                self.fsm.session_start()
+                triggers.append(SESSION_START)
 
             # enter pit road
             if not self.prev_on_pit_road and (on_pit_road or tow_time > 0.0):
-                self.fsm.enter_pit_road()
+                triggers.append(ENTER_PIT_ROAD)
 
             # exit pit road
             if self.prev_on_pit_road and not on_pit_road:
-                self.fsm.exit_pit_road()
+                triggers.append(EXIT_PIT_ROAD)
 
             # enter pit box
             if not self.prev_in_pit_box and pit_active:
-                self.fsm.enter_pit_box()
+                triggers.append(ENTER_PIT_BOX)
 
             # exit pit box
             if self.prev_in_pit_box and not pit_active:
-                self.fsm.exit_pit_box()
+                triggers.append(EXIT_PIT_BOX)
 
             # driver swaps
             if driver_name != self.prev_driver_name:
 
                 # user enters car
                 if driver_name == self.user_name:
-                    self.fsm.driver_swap_in()
+                    triggers.append(DRIVER_SWAP_IN)
 
                 # user exits car
                 elif self.prev_driver_name == self.user_name:
-                    self.fsm.driver_swap_out()
+                    triggers.append(DRIVER_SWAP_OUT)
 
             # session finish
-            if self._check_race_end() and not self.session_finished:
+            if self._check_race_end(tick_data) and not self.session_finished:
                 self.session_finished = True
-                self.fsm.finish_session()
+                triggers.append(FINISH_SESSION)
 
-            # update managers
-            for m in self.fsm.managers:
-                m.on_tick(tick_data, self.fsm.state)
+            if coalesced:
+                self._coalesced.inc()
+            else:
+                self._publish(TICK, slot, tick_start)
 
             # update prev values
             self.prev_on_track = on_track
@@ -158,4 +276,5 @@ class TelemetryLoop:
             self.prev_in_pit_box = pit_active
             self.prev_driver_name = driver_name
 
-            time.sleep(self.interval)
+            self._tick_seconds.observe(time.perf_counter() - tick_start)
+            self.scheduler.wait(self.fsm.state)
@@ -0,0 +1,80 @@
+from collections.abc import Mapping
+from typing import TYPE_CHECKING, Any, Iterator, Sequence
+from src.telemetry.session_info import SESSION_INFO_UPDATE
+
+if TYPE_CHECKING:
+    from src.managers.base_manager import BaseManager
+
+# fields TelemetryLoop.run() reads itself; every tick carries them ahead of
+# the managers' required_fields (they are recorded with the rest)
+LOOP_FIELDS = (
+    "IsOnTrack",
+    "OnPitRoad",
+    "PitstopActive",
+    "PlayerCarTowTime",
+    "PlayerCarIdx",
+    "DriverInfo",
+    "SessionState",
+    "PlayerCarClassPosition",
+    "SessionFlags",
+    "LapCompleted",
+    SESSION_INFO_UPDATE,
+)
+
+
+class TickSchema:
+    """Fixed field layout of a tick, built once when managers are attached."""
+
+    __slots__ = ("fields", "index")
+
+    def __init__(self, fields: Sequence[str]):
+        self.fields: tuple[str, ...] = tuple(dict.fromkeys(fields))
+        self.index: dict[str, int] = {name: i for i, name in enumerate(self.fields)}
+
+    @classmethod
+    def for_managers(
+        cls, managers: Sequence["BaseManager"], extra_fields: Sequence[str] = ()
+    ) -> "TickSchema":
+        required = {key for m in managers for key in m.required_fields}
+        required.update(extra_fields)
+        return cls((*LOOP_FIELDS, *sorted(required)))
+
+    def __len__(self) -> int:
+        return len(self.fields)
+
+
+class TickRecord(Mapping):
+    """One tick of telemetry laid out by a TickSchema.
+
+    The loop keeps a single record and refills `values` in place every tick,
+    so nothing is allocated per tick. `changed` is a bitmask over schema
+    positions marking the values that differ from the previous tick (all set
+    until a ChangeTracker says otherwise). It reads like a dict by field name,
+    but hot paths should index `values` with positions resolved up front.
+    """
+
+    __slots__ = ("schema", "values", "changed")
+
+    def __init__(self, schema: TickSchema):
+        self.schema = schema
+        self.values: list[Any] = [None] * len(schema.fields)
+        self.changed: int = -1
+
+    def __getitem__(self, key: str) -> Any:
+        return self.values[self.schema.index[key]]
+
+    def get(self, key: str, default: Any = None) -> Any:
+        idx = self.schema.index.get(key)
+        return default if idx is None else self.values[idx]
+
+    def __contains__(self, key: object) -> bool:
+        return key in self.schema.index
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.schema.fields)
+
+    def __len__(self) -> int:
+        return len(self.schema.fields)
+
+    def to_dict(self) -> dict[str, Any]:
+        return dict(zip(self.schema.fields, self.values))
@@ -0,0 +1,219 @@
+import logging
+import threading
+import time
+from typing import Any
+import pytest
+from src.api.api_client import APIClient
+from src.api.api_worker import APIWorker
+from src.api.mock_server import Faults, MockBackend
+from src.api.outbox import Outbox
+from src.api.task_queue import TaskQueue
+from src.api.task_types import Task, TaskType, encode_body
+from src.context.race_context import RaceContext
+from src.models.lap import Lap
+from src.models.stint import Stint
+
+
+class RejectingBackend(MockBackend):
+    """Answers every bulk request with 400, as if one item in it were malformed."""
+
+    def _bulk(self, entity: str, items: list[dict]) -> tuple[int, Any]:
+        return 400, {"detail": "bad item"}
+
+
+class SlowFirstBackend(MockBackend):
+    """Acts on the first request for one of `actions`, then answers it too late."""
+
+    def __init__(self, delay: float, actions: tuple[str, ...], **kwargs):
+        super().__init__(**kwargs)
+        self.delay = delay
+        self.actions = actions
+        self.slowed = False
+
+    def handle(self, action: str, args: tuple[str, ...], data: Any) -> tuple[int, Any]:
+        reply = super().handle(action, args, data)
+        if action in self.actions and not self.slowed:
+            self.slowed = True
+            time.sleep(self.delay)
+        return reply
+
+
+def lap_task(number: int, stint_key: str = "stint-1") -> Task:
+    lap = Lap(stint_id=None, number=number, time=90.0)
+    return Task(TaskType.LAP, encode_body(lap.to_dict()), key=lap.local_id, parent_key=stint_key)
+
+
+def stint_task(stint: Stint) -> Task:
+    body = encode_body(stint.post_dict())
+    return Task(TaskType.STINT_CREATE, body, key=stint.local_id, session_id=stint.session_id)
+
+
+def make_worker(url: str, outbox: Outbox, **client_options) -> APIWorker:
+    client = APIClient(url, **client_options)
+    return APIWorker(RaceContext(), client, TaskQueue(), threading.Event(), outbox=outbox)
+
+
+def drain(worker: APIWorker, timeout: float = 10.0):
+    """Wait for a running worker to empty its outbox, then stop it."""
+    worker.queue.join()
+    deadline = time.monotonic() + timeout
+    while len(worker.outbox) and time.monotonic() < deadline:
+        time.sleep(0.01)
+    worker.queue.put(None)
+    worker.join()
+
+
+def run_worker(url: str, tasks: list[Task], outbox: Outbox) -> APIWorker:
+    """Send `tasks` through a fresh worker and wait for it to finish."""
+    worker = make_worker(url, outbox)
+    queue = worker.queue
+    for task in tasks:
+        queue.put(task)
+    queue.put(None)
+    worker.run()
+    return worker
+
+
+def test_rejected_bulk_falls_back_to_single_requests():
+    with RejectingBackend() as backend:
+        outbox = Outbox()
+        outbox.record_id("stint-1", 7)
+        run_worker(backend.url, [lap_task(number) for number in range(3)], outbox)
+
+        assert sorted(lap["number"] for lap in backend.laps) == [0, 1, 2]
+        assert all(lap["stint_id"] == 7 for lap in backend.laps)
+        assert [r.path for r in backend.requests].count("/stints/7/laps") == 3
+
+
+def test_laps_are_held_until_their_stint_is_created():
+    stint = Stint(
+        session_id=1, driver_name="a", start_time=0.0, start_position=1, start_incidents=0, start_fuel=50.0
+    )
+    with MockBackend() as backend:
+        outbox = Outbox()
+        worker = make_worker(backend.url, outbox)
+        outbox.append([stint_task(stint), lap_task(1, stint.local_id), lap_task(2, stint.local_id)])
+
+        # the laps come up before their stint has been sent
+        laps = [(seq, task) for seq, task in outbox.peek(10) if task.type is TaskType.LAP]
+        worker.process_batch(laps)
+        worker.dispatcher.wait()
+        assert len(outbox) == 3
+        assert backend.laps == []
+
+        worker.flush_outbox()
+        worker.dispatcher.wait()
+        assert len(outbox) == 0
+        stint_id = outbox.server_id(stint.local_id)
+        assert sorted(lap["number"] for lap in backend.laps) == [1, 2]
+        assert all(lap["stint_id"] == stint_id for lap in backend.laps)
+
+
+def test_laps_of_a_stint_that_was_never_created_are_dropped():
+    with MockBackend() as backend:
+        outbox = Outbox()
+        worker = make_worker(backend.url, outbox)
+        outbox.append([lap_task(1, "lost-stint")])
+
+        worker.flush_outbox()
+        worker.dispatcher.wait()
+        assert len(outbox) == 0
+        assert not worker.holding.is_set()
+        assert backend.laps == []
+
+
+def test_tasks_left_from_a_previous_run_are_replayed(tmp_path):
+    path = str(tmp_path / "outbox.db")
+    outbox = Outbox(path)
+    outbox.record_id("stint-1", 7)
+    outbox.append([lap_task(1), lap_task(2)])
+    outbox.close()
+
+    with MockBackend() as backend:
+        run_worker(backend.url, [], Outbox(path))
+        assert sorted(lap["number"] for lap in backend.laps) == [1, 2]
+    assert len(Outbox(path)) == 0
+
+
+def test_updates_held_through_an_outage_are_merged():
+    stint = Stint(
+        session_id=1, driver_name="a", start_time=0.0, start_position=1, start_incidents=0, start_fuel=50.0
+    )
+    with MockBackend() as backend:
+        backend.set_outage(True)
+        outbox = Outbox()
+        worker = make_worker(backend.url, outbox)
+        worker.start()
+
+        worker.queue.put(stint_task(stint))
+        worker.queue.join()
+        for lap in range(1, 6):
+            update = {"end_time": 90.0 * lap, "end_fuel": 50.0 - lap}
+            worker.queue.put(Task(TaskType.STINT_UPDATE, encode_body(update), key=stint.local_id))
+            # one per batch, so they meet in the outbox rather than the queue
+            worker.queue.join()
+        assert len(outbox) == 2
+
+        backend.set_outage(False)
+        drain(worker)
+
+        (created,) = backend.stints.values()
+        assert created["end_time"] == 450.0
+        assert created["end_fuel"] == 45.0
+
+
+def test_only_acknowledged_fields_are_published():
+    stint = Stint(
+        session_id=1, driver_name="a", start_time=0.0, start_position=1, start_incidents=0, start_fuel=50.0
+    )
+    update = Task(TaskType.STINT_UPDATE, encode_body({"end_time": 90.0}), key=stint.local_id)
+    # a pitstop the server doesn't know, so its patch is rejected
+    rejected = Task(TaskType.PITSTOP_UPDATE, encode_body({"road_exit_time": 5.0}), key="pitstop-1")
+
+    with MockBackend() as backend:
+        outbox = Outbox()
+        outbox.record_id("pitstop-1", 999)
+        worker = run_worker(backend.url, [stint_task(stint), update, rejected], outbox)
+
+    synced = worker.context.synced_fields
+    assert synced[stint.local_id]["start_fuel"] == 50.0
+    assert synced[stint.local_id]["end_time"] == 90.0
+    assert "pitstop-1" not in synced
+
+
+def test_creates_resent_after_a_timeout_are_not_duplicated():
+    with SlowFirstBackend(0.6, ("bulk",)) as backend:
+        outbox = Outbox()
+        outbox.record_id("stint-1", 7)
+        worker = make_worker(backend.url, outbox, read_timeout=0.2)
+        for number in range(3):
+            worker.queue.put(lap_task(number))
+        worker.start()
+        drain(worker)
+
+        # the first bulk went through on the server, the client gave up on it
+        assert [r.path for r in backend.requests].count("/laps/bulk") == 2
+        assert sorted(lap["number"] for lap in backend.laps) == [0, 1, 2]
+
+
+@pytest.mark.parametrize("dedupe", [True, False])
+def test_a_stint_create_resent_after_a_timeout_keeps_its_stint(dedupe, caplog):
+    stint = Stint(
+        session_id=1, driver_name="a", start_time=0.0, start_position=1, start_incidents=0, start_fuel=50.0
+    )
+    caplog.set_level(logging.INFO, logger="src.api")
+
+    # without dedupe the resend gets a 409 for the number our first try took
+    with SlowFirstBackend(0.6, ("post_stint",), faults=Faults(dedupe=dedupe)) as backend:
+        outbox = Outbox()
+        worker = make_worker(backend.url, outbox, read_timeout=0.2)
+        worker.queue.put(stint_task(stint))
+        worker.start()
+        drain(worker)
+
+        (created,) = backend.stints.values()
+        assert created["number"] == 1
+        assert outbox.server_id(stint.local_id) == created["id"]
+
+    # no stints yet is a 404 from /stints/latest, not an error
+    assert not [r for r in caplog.records if r.levelno >= logging.ERROR]
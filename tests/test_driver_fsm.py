@@ -0,0 +1,145 @@
+from queue import Queue
+import pytest
+from src.context.race_context import RaceContext
+from src.fsm.driver_fsm import TRANSITIONS, TRIGGERS, DriverFSM, InvalidTransition
+from src.fsm.events import Events
+from src.fsm.states import States
+from src.managers.base_manager import BaseManager
+
+
+class Recorder(BaseManager):
+    """Hears every event by name, the way managers did before event_handlers."""
+
+    def __init__(self):
+        super().__init__(RaceContext(), Queue())
+        self.log = []
+
+    def handle_event(self, event, telem, ctx):
+        self.log.append((event, ctx))
+
+
+class Subscriber(BaseManager):
+    event_handlers = {
+        Events.DRIVER_SWAP_IN: "_swap_in",
+        Events.ENTER_PIT_BOX: "_enter_pit_box",
+    }
+
+    def __init__(self):
+        super().__init__(RaceContext(), Queue())
+        self.log = []
+
+    def _swap_in(self):
+        self.log.append("driver_swap_in")
+
+    def _enter_pit_box(self):
+        self.log.append("enter_pit_box")
+
+
+def make_fsm(state: States, *managers: BaseManager) -> DriverFSM:
+    fsm = DriverFSM()
+    fsm.attach_managers(list(managers))
+    fsm.last_telem = {}
+    fsm.set_state(state)
+    return fsm
+
+
+def test_driver_swap_in_broadcasts_before_entering_pit_box():
+    subscriber = Subscriber()
+    fsm = make_fsm(States.IDLE, subscriber)
+
+    assert fsm.driver_swap_in()
+
+    assert fsm.state == States.IN_PIT_BOX
+    assert subscriber.log == ["driver_swap_in", "enter_pit_box"]
+
+
+def test_handle_event_gets_state_names():
+    recorder = Recorder()
+    fsm = make_fsm(States.ON_TRACK, recorder)
+
+    fsm.enter_pit_road()
+
+    assert recorder.log == [
+        ("enter_pit_road", {"source": "ON_TRACK", "dest": "ON_PIT_ROAD", "event": "enter_pit_road"})
+    ]
+
+
+def test_invalid_trigger_raises():
+    fsm = make_fsm(States.IDLE)
+
+    with pytest.raises(InvalidTransition):
+        fsm.exit_pit_box()
+    assert fsm.state == States.IDLE
+
+
+def legacy_machine():
+    """The FSM as it was on transitions.Machine, recording what it broadcast."""
+    transitions = pytest.importorskip("transitions")
+
+    class LegacyFSM:
+        def __init__(self):
+            self.log = []
+            self.machine = transitions.Machine(
+                model=self,
+                states=States,
+                transitions=TRANSITIONS,
+                initial=States.DISCONNECTED,
+                send_event=True,
+            )
+
+        def _broadcast(self, event_name, event):
+            ctx = {
+                "source": event.transition.source,
+                "dest": event.transition.dest,
+                "event": event.event.name,
+            }
+            self.log.append((event_name, ctx))
+
+        def on_enter_ON_PIT_ROAD(self, event):
+            self._broadcast("enter_pit_road", event)
+
+        def on_exit_ON_PIT_ROAD(self, event):
+            self._broadcast("exit_pit_road", event)
+
+        def on_enter_IN_PIT_BOX(self, event):
+            self._broadcast("enter_pit_box", event)
+
+        def on_exit_IN_PIT_BOX(self, event):
+            self._broadcast("exit_pit_box", event)
+
+        def on_enter_FINISHED(self, event):
+            self._broadcast("finished", event)
+
+        def on_enter_DISCONNECTED(self, event):
+            self._broadcast("disconnected", event)
+
+        def _on_session_start(self, event):
+            self._broadcast("session_start", event)
+
+        def _on_driver_swap_in(self, event):
+            self._broadcast("driver_swap_in", event)
+
+        def _on_driver_swap_out(self, event):
+            self._broadcast("driver_swap_out", event)
+
+    return transitions, LegacyFSM()
+
+
+@pytest.mark.parametrize("trigger", TRIGGERS)
+@pytest.mark.parametrize("state", list(States), ids=lambda s: s.name)
+def test_matches_legacy_machine(state, trigger):
+    transitions, legacy = legacy_machine()
+    legacy.machine.set_state(state)
+    recorder = Recorder()
+    fsm = make_fsm(state, recorder)
+
+    try:
+        getattr(legacy, trigger)()
+    except transitions.MachineError:
+        with pytest.raises(InvalidTransition):
+            fsm.trigger(trigger)
+        return
+
+    fsm.trigger(trigger)
+    assert recorder.log == legacy.log
+    assert fsm.state == legacy.state
@@ -0,0 +1,83 @@
+from queue import Queue
+from src.context.race_context import RaceContext
+from src.managers.fuel_manager import FuelManager, LapWindow
+
+
+def make_manager(race_duration: float = 1000.0, fuel_level: float = 10.0) -> FuelManager:
+    manager = FuelManager(RaceContext(race_duration=race_duration), Queue())
+    manager.session_time = 0.0
+    manager.fuel_level = fuel_level
+    manager.lap_completed = 0
+    manager.last_lap_time = -1.0
+    manager.on_pit_road = False
+    manager._handle_session_start()
+    manager._check_for_new_lap()
+    return manager
+
+
+def drive_lap(manager: FuelManager, lap_time: float, burn: float):
+    manager.session_time += lap_time
+    manager.fuel_level -= burn
+    manager.lap_completed += 1
+    manager.last_lap_time = lap_time
+    manager._check_for_new_lap()
+
+
+def test_lap_window_keeps_only_the_last_laps():
+    window = LapWindow(3)
+    assert window.mean is None and window.percentile(50) is None
+
+    for value in (5.0, 1.0, 3.0, 2.0):
+        window.add(value)
+
+    # 5.0 has been pushed out
+    assert len(window) == 3
+    assert window.last == 2.0
+    assert window.mean == 2.0
+    assert window.ordered == [1.0, 2.0, 3.0]
+    assert window.percentile(0) == 1.0
+    assert window.percentile(75) == 2.5
+    assert window.percentile(100) == 3.0
+
+
+def test_projects_fuel_to_the_finish():
+    manager = make_manager()
+    for _ in range(3):
+        drive_lap(manager, 100.0, 2.0)
+
+    fuel = manager.context.fuel
+    assert fuel.stint_laps == 3
+    assert fuel.rolling_avg == 2.0
+    assert fuel.avg_lap_time == 100.0
+    assert fuel.time_remaining == 700.0
+    assert fuel.laps_in_tank == 2.0
+    assert fuel.laps_to_finish == 7
+    assert fuel.fuel_to_finish == 14.0
+    assert fuel.fuel_to_add == 10.0
+
+
+def test_pit_laps_are_left_out_of_the_burn():
+    manager = make_manager()
+    drive_lap(manager, 100.0, 2.0)
+    manager._handle_enter_pit_road()
+    drive_lap(manager, 130.0, 3.0)
+
+    assert manager.context.fuel.stint_laps == 1
+    assert manager.context.fuel.rolling_avg == 2.0
+    assert manager.context.fuel.avg_lap_time == 100.0
+
+
+def test_a_lap_without_times_still_counts_its_burn():
+    manager = FuelManager(RaceContext(), Queue())
+    manager.fuel_level = 10.0
+    manager.lap_completed = 0
+    manager._check_for_new_lap()
+
+    # no SessionTime yet and no valid last lap time
+    manager.fuel_level = 8.0
+    manager.lap_completed = 1
+    manager.last_lap_time = -1.0
+    manager._check_for_new_lap()
+
+    assert manager.context.fuel.rolling_avg == 2.0
+    assert manager.context.fuel.avg_lap_time is None
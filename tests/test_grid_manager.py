@@ -0,0 +1,107 @@
+import json
+from queue import Queue
+from src.context.race_context import RaceContext
+from src.export.exporter import SessionExporter
+from src.managers.grid_manager import MAX_CARS, GridManager
+from src.telemetry.change_tracker import ChangeTracker
+from src.telemetry.tick import TickRecord, TickSchema
+
+DRIVER_INFO = {
+    "Drivers": [
+        {"CarIdx": 0, "UserName": "Us"},
+        {"CarIdx": 1, "UserName": "Rival"},
+        {"CarIdx": 2, "UserName": "Pace Car", "CarIsPaceCar": 1},
+    ]
+}
+ON_TRACK = 3
+IN_PIT_STALL = 1
+
+
+class Grid:
+    """Drives a GridManager tick by tick, changing single cars' values."""
+
+    def __init__(self, context: RaceContext):
+        self.manager = GridManager(context, Queue())
+        self.schema = TickSchema.for_managers([self.manager])
+        self.manager.bind_schema(self.schema)
+        self.tracker = ChangeTracker(self.schema, [self.manager])
+        self.time = 0.0
+        self.arrays = {
+            "CarIdxLapCompleted": [-1] * MAX_CARS,
+            "CarIdxOnPitRoad": [False] * MAX_CARS,
+            "CarIdxTrackSurface": [-1] * MAX_CARS,
+            "CarIdxPosition": [0] * MAX_CARS,
+            "CarIdxLastLapTime": [-1.0] * MAX_CARS,
+        }
+
+    def tick(self, **changes: dict[int, object]):
+        for name, values in changes.items():
+            array = list(self.arrays[name])
+            for car_idx, value in values.items():
+                array[car_idx] = value
+            self.arrays[name] = array
+
+        self.time += 1.0
+        record = TickRecord(self.schema)
+        fields = {"DriverInfo": DRIVER_INFO, "PlayerCarIdx": 0, "SessionTime": self.time, **self.arrays}
+        for name, value in fields.items():
+            record.values[self.schema.index[name]] = value
+        self.tracker.dispatch(record, None)
+
+
+def start_race(grid: Grid):
+    every_car = {0: 0, 1: 0, 2: 0}
+    grid.tick(
+        CarIdxLapCompleted=every_car,
+        CarIdxTrackSurface={0: ON_TRACK, 1: ON_TRACK, 2: ON_TRACK},
+        CarIdxPosition={0: 2, 1: 1},
+    )
+    grid.manager.handle_event("session_start", {}, {})
+    grid.tick()
+
+
+def test_only_rivals_are_tracked():
+    context = RaceContext()
+    start_race(Grid(context))
+
+    assert list(context.grid) == [1]
+    assert context.grid[1].driver_name == "Rival"
+    assert context.grid[1].stint.start_position == 1
+
+
+def test_laps_and_pitstops_split_stints(tmp_path):
+    context = RaceContext(exporter=SessionExporter(str(tmp_path), ["ndjson"]))
+    grid = Grid(context)
+    start_race(grid)
+
+    grid.tick(CarIdxLapCompleted={1: 1}, CarIdxLastLapTime={1: 88.5})
+    grid.tick(CarIdxOnPitRoad={1: True})
+    grid.tick(CarIdxTrackSurface={1: IN_PIT_STALL})
+    grid.tick(CarIdxOnPitRoad={1: False}, CarIdxTrackSurface={1: ON_TRACK})
+    context.exporter.close()
+
+    car = context.grid[1]
+    assert [(lap.number, lap.time) for lap in car.stints[0].laps] == [(1, 88.5)]
+    assert car.stints[0].is_complete
+    assert car.stint.number == 2
+    assert car.pitstops[0].pit_duration == 2.0
+
+    rows = {}
+    for table in ("stints", "laps", "pitstops"):
+        with open(tmp_path / f"{table}.ndjson") as f:
+            rows[table] = [json.loads(line) for line in f]
+    assert {row["car_idx"] for table in rows.values() for row in table} == {1}
+    assert rows["pitstops"][0]["stint_key"] == car.stints[0].local_id
+
+
+def test_leaving_the_world_is_not_a_pitstop():
+    context = RaceContext()
+    grid = Grid(context)
+    start_race(grid)
+
+    grid.tick(CarIdxTrackSurface={1: -1})
+    grid.tick(CarIdxTrackSurface={1: IN_PIT_STALL}, CarIdxOnPitRoad={1: True})
+
+    car = context.grid[1]
+    assert car.pitstop is None
+    assert car.stint is not None and not car.stints
@@ -0,0 +1,75 @@
+import json
+from src.api.outbox import Outbox
+from src.api.task_types import Task, TaskType, encode_body
+
+
+def task(task_type: TaskType, key: str, **fields) -> Task:
+    return Task(task_type, encode_body(fields), key=key)
+
+
+def bodies(outbox: Outbox) -> list[tuple[TaskType, dict]]:
+    return [(t.type, json.loads(t.body)) for _, t in outbox.peek(100)]
+
+
+def test_peek_is_ordered_and_pages_past_seq():
+    outbox = Outbox()
+    outbox.append(task(TaskType.LAP, f"lap-{n}", number=n) for n in range(5))
+
+    first = outbox.peek(2)
+    rest = outbox.peek(10, after=first[-1][0])
+    assert [t.key for _, t in first + rest] == [f"lap-{n}" for n in range(5)]
+
+
+def test_ack_removes_only_the_acknowledged_tasks():
+    outbox = Outbox()
+    outbox.append(task(TaskType.LAP, f"lap-{n}", number=n) for n in range(4))
+    entries = outbox.peek(10)
+
+    outbox.ack(seq for seq, t in entries if t.key in ("lap-0", "lap-2"))
+    assert len(outbox) == 2
+    assert [t.key for _, t in outbox.peek(10)] == ["lap-1", "lap-3"]
+
+
+def test_unacknowledged_tasks_and_server_ids_survive_a_restart(tmp_path):
+    path = str(tmp_path / "outbox.db")
+    outbox = Outbox(path)
+    outbox.append([task(TaskType.STINT_CREATE, "s"), task(TaskType.LAP, "l1"), task(TaskType.LAP, "l2")])
+    outbox.record_id("s", 42)
+    outbox.ack([outbox.peek(1)[0][0]])
+    outbox.close()
+
+    reopened = Outbox(path)
+    assert [t.key for _, t in reopened.peek(10)] == ["l1", "l2"]
+    assert reopened.server_id("s") == 42
+    assert reopened.pending(TaskType.LAP, "l1")
+    assert not reopened.pending(TaskType.STINT_CREATE, "s")
+
+
+def test_updates_are_merged_into_the_one_waiting():
+    outbox = Outbox()
+    outbox.append([task(TaskType.STINT_CREATE, "s", start_time=0.0)])
+    outbox.append([task(TaskType.STINT_UPDATE, "s", end_time=1.0, end_fuel=40.0)])
+    merged = outbox.append(
+        [task(TaskType.STINT_UPDATE, "s", end_time=2.0), task(TaskType.STINT_UPDATE, "other", end_time=5.0)]
+    )
+
+    assert [t.key for t in merged] == ["s"]
+    assert bodies(outbox) == [
+        (TaskType.STINT_CREATE, {"start_time": 0.0}),
+        (TaskType.STINT_UPDATE, {"end_time": 2.0, "end_fuel": 40.0}),
+        (TaskType.STINT_UPDATE, {"end_time": 5.0}),
+    ]
+
+
+def test_updates_already_dispatched_are_left_alone():
+    outbox = Outbox()
+    outbox.append([task(TaskType.PITSTOP_UPDATE, "p", service_end_time=1.0)])
+    dispatched = outbox.peek(1)[0][0]
+
+    merged = outbox.append([task(TaskType.PITSTOP_UPDATE, "p", road_exit_time=2.0)], merge_after=dispatched)
+    assert merged == []
+    assert len(outbox) == 2
+
+    merged = outbox.append([task(TaskType.PITSTOP_UPDATE, "p", road_exit_time=3.0)], merge_after=dispatched)
+    assert len(merged) == 1
+    assert bodies(outbox)[-1] == (TaskType.PITSTOP_UPDATE, {"road_exit_time": 3.0})
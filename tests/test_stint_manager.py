@@ -0,0 +1,104 @@
+import json
+from queue import Queue
+from src.api.task_types import TaskType
+from src.context.race_context import RaceContext
+from src.fsm.driver_fsm import DriverFSM
+from src.managers.pitstop_manager import PitstopManager
+from src.managers.stint_manager import StintManager
+
+
+def make_manager() -> StintManager:
+    manager = StintManager(RaceContext(session_id=1, user_name="a"), Queue())
+    manager.session_time = 0.0
+    manager.position = 3
+    manager.incidents = 0
+    manager.fuel_level = 50.0
+    manager._handle_session_start()
+    manager.queue.get_nowait()
+    return manager
+
+
+def drive_lap(manager: StintManager, session_time: float, fuel_level: float) -> dict:
+    manager.session_time = session_time
+    manager.fuel_level = fuel_level
+    manager._update_stint()
+    task = manager.queue.get_nowait()
+    assert task.type is TaskType.STINT_UPDATE
+    return json.loads(task.body)
+
+
+def test_patches_repeat_fields_until_the_server_acknowledges_them():
+    manager = make_manager()
+    first = drive_lap(manager, 90.0, 45.0)
+    assert first == {
+        "is_complete": False,
+        "end_time": 90.0,
+        "end_position": 3,
+        "end_incidents": 0,
+        "end_fuel": 45.0,
+    }
+
+    # nothing acknowledged yet, so the next patch carries everything again
+    second = drive_lap(manager, 180.0, 40.0)
+    assert second.keys() == first.keys()
+
+    # as the API worker publishes it once the second patch goes through
+    manager.context.synced_fields[manager.current_stint.local_id] = second
+    assert drive_lap(manager, 270.0, 35.0) == {"end_time": 270.0, "end_fuel": 35.0}
+
+
+def drain_queue(queue: Queue) -> list:
+    tasks = []
+    while not queue.empty():
+        tasks.append(queue.get_nowait())
+    return tasks
+
+
+def test_each_box_stop_starts_a_new_stint():
+    context = RaceContext(session_id=1, user_name="a")
+    queue = Queue()
+    stints = StintManager(context, queue)
+    pitstops = PitstopManager(context, queue)
+    fsm = DriverFSM()
+    fsm.attach_managers([pitstops, stints])
+    fsm.last_telem = {}
+
+    def at(session_time: float):
+        for manager in (stints, pitstops):
+            manager.session_time = session_time
+            manager.fuel_level = 50.0
+        stints.position = 3
+        stints.incidents = 0
+
+    at(0.0)
+    fsm.connect()
+    fsm.session_start()
+    stint_keys = [context.stint_key]
+
+    for stop in range(2):
+        at(100.0 * (stop + 1))
+        fsm.enter_pit_road()
+        fsm.enter_pit_box()
+        fsm.exit_pit_box()
+        fsm.exit_pit_road()
+        stint_keys.append(context.stint_key)
+
+    # a drive-through keeps the stint
+    fsm.enter_pit_road()
+    fsm.exit_pit_road()
+    fsm.finish_session()
+
+    tasks = drain_queue(queue)
+    creates = [task.key for task in tasks if task.type is TaskType.STINT_CREATE]
+    assert creates == stint_keys
+    assert len(set(stint_keys)) == 3
+
+    # each pitstop hangs off the stint it ended
+    pitstops = [task.parent_key for task in tasks if task.type is TaskType.PITSTOP_CREATE]
+    assert pitstops == stint_keys[:2]
+    closing = [
+        json.loads(task.body)
+        for task in tasks
+        if task.type is TaskType.STINT_UPDATE and json.loads(task.body).get("is_complete")
+    ]
+    assert len(closing) == 2
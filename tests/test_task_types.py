@@ -0,0 +1,42 @@
+import json
+from src.api.task_types import encode_body, merge_patches, with_fields
+from src.models.lap import Lap
+from src.models.stint import Stint
+
+
+def test_encode_body_is_compact():
+    assert encode_body({"a": 1, "b": None}) == b'{"a":1,"b":null}'
+
+
+def test_with_fields_replaces_placeholders():
+    stint = Stint(
+        session_id=1,
+        driver_name="Driver",
+        start_time=10.0,
+        start_position=3,
+        start_incidents=0,
+        start_fuel=50.0,
+    )
+    body = with_fields(encode_body(stint.post_dict()), number=5)
+
+    assert body.count(b'"number"') == 1
+    assert json.loads(body) == {**stint.post_dict(), "number": 5}
+
+
+def test_with_fields_adds_missing_keys():
+    lap = Lap(stint_id=None, number=4, time=91.5)
+    body = with_fields(encode_body(lap.to_dict()), stint_id=12)
+
+    assert body.count(b'"stint_id"') == 1
+    assert json.loads(body) == {"stint_id": 12, "number": 4, "time": 91.5}
+
+
+def test_merge_patches_keeps_both_newest_wins():
+    first = encode_body({"end_time": 100.0, "end_fuel": 20.0})
+    second = encode_body({"end_time": 160.0, "is_complete": True})
+
+    assert json.loads(merge_patches(first, second)) == {
+        "end_time": 160.0,
+        "end_fuel": 20.0,
+        "is_complete": True,
+    }
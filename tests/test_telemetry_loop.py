@@ -0,0 +1,30 @@
+import threading
+import time
+from benchmarks.synthetic import DRIVER_NAME, SyntheticClient, synthetic_ticks
+from src.fsm.driver_fsm import DriverFSM
+from src.telemetry.recording import TelemetryRecorder, TelemetryRecording
+from src.telemetry.telemetry_loop import TelemetryLoop
+
+
+def test_stop_closes_the_recording(tmp_path):
+    path = str(tmp_path / "rec.bin")
+    fsm = DriverFSM()
+    fsm.attach_managers([])
+    # a minute of ticks, paced, so the loop is still running when stopped
+    loop = TelemetryLoop(
+        SyntheticClient(synthetic_ticks(3600)),
+        fsm,
+        DRIVER_NAME,
+        hz=60,
+        recorder=TelemetryRecorder(path),
+    )
+
+    thread = threading.Thread(target=loop.run)
+    thread.start()
+    time.sleep(0.3)
+    loop.stop()
+    thread.join(timeout=5)
+
+    assert not thread.is_alive()
+    with TelemetryRecording(path) as recording:
+        assert 0 < len(recording) < 3600
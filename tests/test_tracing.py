@@ -0,0 +1,23 @@
+from src.metrics.registry import MetricsRegistry
+from src.metrics.tracing import MAX_MARKS, Tracer
+
+
+def test_a_task_held_through_an_outage_keeps_a_bounded_trace():
+    tracer = Tracer(registry=MetricsRegistry())
+    trace_id = tracer.start("lap")
+    tracer.mark(trace_id, "outbox", at=1.0)
+
+    # re-serialized on every flush while the breaker is open
+    for at in range(2, 1000):
+        tracer.mark(trace_id, "serialize", at=float(at))
+    (trace,) = tracer.traces()
+    assert [stage for stage, _ in trace.marks] == ["detect", "outbox", "serialize"]
+    assert trace.stage_times()["serialize"] == 998.0
+
+    # then retried without ever getting through
+    for at in range(1000, 2000):
+        tracer.mark(trace_id, "send" if at % 2 else "response", at=float(at))
+    assert len(trace.marks) == MAX_MARKS
+
+    tracer.finish(trace_id)
+    assert trace.marks[-1][0] == "ack"